@@ -0,0 +1,261 @@
+""" Measures the memory used by batch impedance workloads: the primitive
+    matrix builder, `perform_kron_reduction` and the sequence transform,
+    as the batch size and the number of conductors grow.
+
+    Each stage is run once per scenario, cold, under `tracemalloc`, which
+    reports the peak bytes allocated by the stage and the number of memory
+    blocks it leaves allocated, its `retained_blocks`; `tracemalloc` does
+    not count the blocks allocated and freed within the stage. During the
+    same run the resident set size is sampled from a background thread and
+    its peak growth over the RSS before the stage is reported; it includes
+    the small per-block cost of tracing. RSS is only sampled where
+    `/proc/self/statm` is available.
+
+    The scenarios are built from the geometries of the tests: IEEE 13
+    configuration 601 with one to eight neutrals, a three phase concentric
+    neutral cable and a quadruplex multi-conductor cable, with randomly
+    perturbed conductor positions.
+
+    Run from the repository root with:
+
+        python -m benchmarks.bench_memory [--output results.json]
+
+    Traced peaks are deterministic for a given numpy version, so recorded
+    results can serve as a baseline for catching regressions:
+
+        python -m benchmarks.bench_memory --check memory_baseline.json
+
+    exits with an error if any stage's traced peak grew by more than
+    `--tolerance` (10% by default) over the baseline.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from functools import partial
+from threading import Event, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from numpy import ndarray
+from numpy.random import default_rng
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    MultiConductorCarsonsEquations,
+    calculate_sequence_impedance_matrix,
+    perform_kron_reduction,
+)
+from carsons.kernels import build_z_primitives
+from tests.helpers import LineModel, MultiLineModel, concentric_cable
+
+BATCH_SIZES = (100, 1_000, 10_000)
+NEUTRAL_COUNTS = (1, 4, 8)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+T = TypeVar('T')
+
+
+def overhead_lines(count: int, neutrals: int, seed: int = 0):
+    rng = default_rng(seed)
+    for _ in range(count):
+        Δx, Δy = rng.normal(0, 0.05, size=(2, 3 + neutrals))
+        conductors = {
+            "A": (0.000115575, 0.00947938, (0.762, 8.5344)),
+            "C": (0.000115575, 0.00947938, (2.1336, 8.5344)),
+            "B": (0.000115575, 0.00947938, (0.0, 8.5344)),
+        }
+        for n in range(neutrals):
+            conductors[f"N{n + 1}"] = \
+                (0.000367852, 0.00248107, (1.2192 * n, 7.3152))
+        yield LineModel({
+            conductor: (r, gmr, (x + Δx[i], y + Δy[i]))
+            for i, (conductor, (r, gmr, (x, y)))
+            in enumerate(conductors.items())
+        })
+
+
+def concentric_cables(count: int, seed: int = 0):
+    rng = default_rng(seed)
+    for spacing in rng.uniform(5, 7, count):
+        yield concentric_cable(spacing=spacing)
+
+
+def quadruplex_cables(count: int, seed: int = 0):
+    rng = default_rng(seed)
+    for height in rng.uniform(4, 6, count):
+        conductor = {
+            'resistance': 0.484 / 1609.344,
+            'gmr': 0.0158 * 0.3048,
+            'wire_positions': (0, height),
+        }
+        phase = {**conductor, 'outside_radius': 0.261 * 0.0254 + 0.00137}
+        neutral = {**conductor, 'outside_radius': 0.261 * 0.0254}
+        yield MultiLineModel({'A': phase, 'B': phase, 'C': phase,
+                              'N': neutral})
+
+
+def scenarios(batch_sizes=BATCH_SIZES, neutral_counts=NEUTRAL_COUNTS):
+    """ (name, batch size, equation objects) for every scenario. """
+    for size in batch_sizes:
+        for neutrals in neutral_counts:
+            yield (f"overhead-{3 + neutrals}", size,
+                   [CarsonsEquations(line)
+                    for line in overhead_lines(size, neutrals)])
+        yield ("concentric-6", size,
+               [ConcentricNeutralCarsonsEquations(cable)
+                for cable in concentric_cables(size)])
+        yield ("quadruplex-4", size,
+               [MultiConductorCarsonsEquations(cable)
+                for cable in quadruplex_cables(size)])
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return None
+
+
+class RSSSampler():
+    """ Samples the resident set size from a background thread while the
+        context is open, recording its peak growth in `growth`.
+    """
+
+    def __init__(self, interval: float = 1e-3):
+        self.interval = interval
+        self.growth: Optional[int] = None
+
+    def __enter__(self) -> 'RSSSampler':
+        self._before = rss_bytes()
+        self._peak = self._before or 0
+        self._done = Event()
+        self._thread = Thread(target=self._sample, daemon=True)
+        if self._before is not None:
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self._peak = max(self._peak, rss_bytes() or 0)
+
+    def __exit__(self, *exception):
+        if self._before is None:
+            return
+        self._done.set()
+        self._thread.join()
+        self.growth = max(self._peak, rss_bytes() or 0) - self._before
+
+
+def traced(run: Callable[[], T]) -> Tuple[T, int, int, Optional[int]]:
+    """ The result of `run`, the peak bytes it allocated and the number of
+        memory blocks it left allocated, as traced by `tracemalloc`, and the
+        peak growth of the resident set size while it ran.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with RSSSampler() as rss:
+            result = run()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    # tracing started with the stage, so every traced block is the stage's
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return result, peak, blocks, rss.growth
+
+
+def measure(models: List) -> Dict[str, Dict[str, Optional[int]]]:
+    dimension = models[0].dimension
+    stages: List[Tuple[str, Callable[[Any], ndarray]]] = [
+        ("primitive", lambda _: build_z_primitives(models, backend='numpy')),
+        ("kron", lambda z_primitive: perform_kron_reduction(
+            z_primitive, dimension=dimension)),
+    ]
+    if dimension == 3:
+        stages.append(("sequence", calculate_sequence_impedance_matrix))
+
+    results: Dict[str, Dict[str, Optional[int]]] = {}
+    value: Optional[ndarray] = None
+    for name, stage in stages:
+        value, peak, blocks, rss = traced(partial(stage, value))
+        results[name] = {"peak_bytes": peak, "retained_blocks": blocks,
+                         "rss_bytes": rss}
+    return results
+
+
+def run(batch_sizes=BATCH_SIZES, neutral_counts=NEUTRAL_COUNTS) -> dict:
+    results: dict = {}
+    for name, size, models in scenarios(batch_sizes, neutral_counts):
+        results.setdefault(name, {})[str(size)] = measure(models)
+    return results
+
+
+def regressions(results: dict, baseline: dict,
+                tolerance: float) -> List[str]:
+    """ The stages whose traced peak exceeds the baseline's by more than
+        `tolerance`, as messages.
+    """
+    found = []
+    for name, sizes in results.items():
+        for size, stages in sizes.items():
+            for stage, measured in stages.items():
+                expected = baseline.get(name, {}).get(size, {}).get(stage)
+                if expected is None:
+                    continue
+                limit = expected["peak_bytes"] * (1 + tolerance)
+                if measured["peak_bytes"] > limit:
+                    found.append(
+                        f"{name} x {size} {stage}: peak "
+                        f"{measured['peak_bytes']} B exceeds baseline "
+                        f"{expected['peak_bytes']} B")
+    return found
+
+
+def report(results: dict):
+    print(f"{'scenario':<14} {'batch':>6} {'stage':<10} {'peak (MiB)':>11} "
+          f"{'retained':>8} {'RSS (MiB)':>10}")
+    for name, sizes in results.items():
+        for size, stages in sizes.items():
+            for stage, measured in stages.items():
+                rss = measured["rss_bytes"]
+                rss_text = "-" if rss is None else f"{rss / 2**20:10.2f}"
+                print(f"{name:<14} {size:>6} {stage:<10} "
+                      f"{measured['peak_bytes'] / 2**20:11.2f} "
+                      f"{measured['retained_blocks']:>8} {rss_text:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+",
+                        default=BATCH_SIZES)
+    parser.add_argument("--neutrals", type=int, nargs="+",
+                        default=NEUTRAL_COUNTS,
+                        help="neutral counts of the overhead scenarios")
+    parser.add_argument("--output", help="write the results to this json "
+                                         "file")
+    parser.add_argument("--check", help="compare with the results in this "
+                                        "json file")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    arguments = parser.parse_args(argv)
+
+    results = run(arguments.batch_sizes, arguments.neutrals)
+    report(results)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if arguments.check:
+        with open(arguments.check) as f:
+            found = regressions(results, json.load(f), arguments.tolerance)
+        for message in found:
+            print(message, file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
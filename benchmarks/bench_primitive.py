@@ -0,0 +1,63 @@
+""" Times primitive impedance matrix construction for a batch of perturbed
+    IEEE 13 configuration 601 lines, comparing the per-model equation
+    classes against every batch kernel backend.
+
+    Run from the repository root with:
+
+        python -m benchmarks.bench_primitive [batch size]
+"""
+import sys
+from timeit import timeit
+
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+
+from carsons.carsons import CarsonsEquations, ModifiedCarsonsEquations
+from carsons.kernels import BACKENDS, build_z_primitives, njit
+from tests.helpers import LineModel
+
+
+def perturbed_lines(count, seed=0):
+    rng = default_rng(seed)
+    for _ in range(count):
+        Δx, Δy = rng.normal(0, 0.05, size=(2, 4))
+        yield LineModel({
+            "A": (0.000115575, 0.00947938, (0.762 + Δx[0], 8.5344 + Δy[0])),
+            "C": (0.000115575, 0.00947938, (2.1336 + Δx[1], 8.5344 + Δy[1])),
+            "B": (0.000115575, 0.00947938, (0.0 + Δx[2], 8.5344 + Δy[2])),
+            "N": (0.000367852, 0.00248107, (1.2192 + Δx[3], 7.3152 + Δy[3])),
+        })
+
+
+def benchmark(equations, count, repeat=3):
+    models = [equations(line) for line in perturbed_lines(count)]
+    reference = [model.build_z_primitive() for model in models]
+
+    timings = {
+        "reference": min(timeit(
+            lambda: [model.build_z_primitive() for model in models],
+            number=1) for _ in range(repeat)),
+    }
+    for backend in BACKENDS:
+        if backend == 'jit' and njit is None:
+            continue
+        # the first call compiles the jit kernel, so it is not timed
+        assert_allclose(build_z_primitives(models, backend=backend),
+                        reference, rtol=1e-12)
+        timings[backend] = min(timeit(
+            lambda: build_z_primitives(models, backend=backend),
+            number=1) for _ in range(repeat))
+    return timings
+
+
+def main(count=10_000):
+    for equations in (CarsonsEquations, ModifiedCarsonsEquations):
+        timings = benchmark(equations, count)
+        print(f"{equations.__name__} x {count}")
+        for name, seconds in timings.items():
+            speedup = timings["reference"] / seconds
+            print(f"    {name:<10} {seconds:8.4f} s   {speedup:6.1f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
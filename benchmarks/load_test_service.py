@@ -0,0 +1,100 @@
+""" Load test for the local impedance service.
+
+    Opens `--connections` concurrent keep-alive connections, each sending
+    `--requests` impedance requests for IEEE 13 configuration 601 lines
+    with randomly perturbed conductor heights. `--repeat` is the fraction
+    of requests that reuse an earlier configuration and so should be
+    answered from the cache. Reports client-side throughput and latency
+    followed by the service's own metrics.
+
+    Run from the repository root against an in-process service with:
+
+        python -m benchmarks.load_test_service
+
+    or against a running service with `--port` or `--unix`.
+"""
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+from numpy import percentile
+from numpy.random import default_rng
+
+from carsons.service import (
+    ImpedanceBatcher,
+    ImpedanceService,
+    http_request,
+    run,
+)
+from tests.helpers import line_request
+
+
+async def client(connect, requests, repeat, seed):
+    rng = default_rng(seed)
+    reader, writer = await connect()
+    latencies = []
+    for _ in range(requests):
+        if rng.random() < repeat:
+            height = 8.5344
+        else:
+            height = 8.5344 + rng.normal(0, 0.1)
+        start = perf_counter()
+        status, _ = await http_request(reader, writer, "POST", "/impedance",
+                                       line_request(height=height))
+        latencies.append(perf_counter() - start)
+        assert status == 200
+    writer.close()
+    return latencies
+
+
+async def load_test(arguments):
+    server = None
+    if arguments.unix:
+        def connect():
+            return asyncio.open_unix_connection(arguments.unix)
+    else:
+        port = arguments.port
+        if port is None:
+            service = ImpedanceService(ImpedanceBatcher(arguments.window))
+            server = await service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+
+        def connect():
+            return asyncio.open_connection("127.0.0.1", port)
+
+    start = perf_counter()
+    latencies = sum(await asyncio.gather(*(
+        client(connect, arguments.requests, arguments.repeat, seed)
+        for seed in range(arguments.connections))), [])
+    elapsed = perf_counter() - start
+
+    p50, p95, p99 = percentile(latencies, [50, 95, 99]) * 1000
+    print(f"{len(latencies)} requests in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.0f} requests/s)")
+    print(f"latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}")
+
+    reader, writer = await connect()
+    _, metrics = await http_request(reader, writer, "GET", "/metrics")
+    writer.close()
+    print(json.dumps(metrics, indent=2))
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--unix")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--repeat", type=float, default=0.5)
+    parser.add_argument("--window", type=float, default=0.002,
+                        help="batching window of the in-process service")
+    run(load_test(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+""" Profiles the accuracy and cost of the equation variants.
+
+    Each variant is an equation class with a number of terms of Carson's
+    P and Q series: `CarsonsEquations` with one to six P terms and one to
+    seven Q terms, and `ModifiedCarsonsEquations`, which only uses Q's
+    first term, with one to six P terms. Every variant is evaluated on a
+    set of line models and compared with the full series, reporting the
+    relative error of each model's phase impedance matrix,
+
+        ‖Z_variant - Z_reference‖ / ‖Z_reference‖     (Frobenius norms),
+
+    and the measured runtime of `calculate_impedance` on the scalar path,
+    so that the cheapest variant meeting an accuracy requirement can be
+    chosen.
+
+    Run it on a catalog, a json list of line model mappings with the keys
+    of the line model protocol, e.g. `phases` and `wire_positions`, with
+
+        python -m carsons.accuracy catalog.json --tolerance 1e-4
+"""
+import argparse
+import json
+from time import perf_counter
+from typing import List, NamedTuple, Optional, Sequence, Type
+
+from numpy import asarray, ndarray
+from numpy.linalg import norm
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    calculate_impedance,
+)
+
+MAX_P_TERMS = 6
+MAX_Q_TERMS = 7
+
+
+class VariantProfile(NamedTuple):
+    name: str
+    equations: Type[CarsonsEquations]
+    errors: ndarray  # relative error of each model
+    runtimes: ndarray  # seconds per model
+
+    @property
+    def max_error(self) -> float:
+        return float(self.errors.max())
+
+    @property
+    def mean_error(self) -> float:
+        return float(self.errors.mean())
+
+    @property
+    def runtime(self) -> float:
+        return float(self.runtimes.sum())
+
+
+def variant(equations: Type[CarsonsEquations], number_of_P_terms: int,
+            number_of_Q_terms: int) -> Type[CarsonsEquations]:
+    """ A subclass of `equations` using the given numbers of series terms.
+    """
+    name = f"{equations.__name__}(P={number_of_P_terms}, " \
+        f"Q={number_of_Q_terms})"
+    return type(name, (equations,), {
+        'number_of_P_terms': number_of_P_terms,
+        'number_of_Q_terms': number_of_Q_terms,
+    })
+
+
+def default_variants() -> List[Type[CarsonsEquations]]:
+    return [
+        variant(CarsonsEquations, p, q)
+        for p in range(1, MAX_P_TERMS + 1)
+        for q in range(1, MAX_Q_TERMS + 1)
+    ] + [
+        variant(ModifiedCarsonsEquations, p, 1)
+        for p in range(1, MAX_P_TERMS + 1)
+    ]
+
+
+def profile_variants(
+        models: Sequence,
+        variants: Optional[Sequence[Type[CarsonsEquations]]] = None,
+        reference: Optional[Type[CarsonsEquations]] = None,
+        repeat: int = 3) -> List[VariantProfile]:
+    """ Evaluates every variant on every line model in `models`, returning
+        one profile per variant ordered by total runtime. Errors are
+        relative to `reference`, by default the full P and Q series, and
+        runtimes are the best of `repeat` evaluations of each model.
+    """
+    variants = default_variants() if variants is None else variants
+    reference = reference or variant(
+        CarsonsEquations, MAX_P_TERMS, MAX_Q_TERMS)
+    expected = [calculate_impedance(reference(model), strategy='scalar')
+                for model in models]
+
+    profiles = []
+    for equations in variants:
+        errors, runtimes = [], []
+        for model, z_reference in zip(models, expected):
+            best = float('inf')
+            for _ in range(repeat):
+                start = perf_counter()
+                z_abc = calculate_impedance(equations(model),
+                                            strategy='scalar')
+                best = min(best, perf_counter() - start)
+            errors.append(norm(z_abc - z_reference) / norm(z_reference))
+            runtimes.append(best)
+        profiles.append(VariantProfile(
+            equations.__name__, equations, asarray(errors),
+            asarray(runtimes)))
+    return sorted(profiles, key=lambda profile: profile.runtime)
+
+
+def cheapest_variant(profiles: Sequence[VariantProfile],
+                     tolerance: float) -> Optional[VariantProfile]:
+    """ The fastest variant whose error on every model is within
+        `tolerance`, or None if there is none.
+    """
+    meeting = [profile for profile in profiles
+               if profile.max_error <= tolerance]
+    return min(meeting, key=lambda profile: profile.runtime, default=None)
+
+
+def format_table(profiles: Sequence[VariantProfile],
+                 tolerance: Optional[float] = None) -> str:
+    """ The error/runtime trade-off of `profiles` as a text table, marking
+        the cheapest variant within `tolerance` if one is given.
+    """
+    cheapest = None if tolerance is None else \
+        cheapest_variant(profiles, tolerance)
+    width = max(len(profile.name) for profile in profiles)
+    lines = [f"  {'variant':<{width}}  {'max error':>10}  "
+             f"{'mean error':>10}  {'runtime (s)':>11}"]
+    for profile in profiles:
+        marker = "*" if profile is cheapest else " "
+        lines.append(
+            f"{marker} {profile.name:<{width}}  {profile.max_error:10.3e}  "
+            f"{profile.mean_error:10.3e}  {profile.runtime:11.3e}")
+    return "\n".join(lines)
+
+
+def load_catalog(path: str) -> List[dict]:
+    """ The line models of a json catalog, a list of model mappings. """
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("catalog", help="json list of line models")
+    parser.add_argument("--tolerance", type=float,
+                        help="mark the cheapest variant within this "
+                             "relative error")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--per-model", action="store_true",
+                        help="also print the error of each model")
+    arguments = parser.parse_args(argv)
+
+    models = load_catalog(arguments.catalog)
+    profiles = profile_variants(models, repeat=arguments.repeat)
+    print(format_table(profiles, arguments.tolerance))
+    if arguments.per_model:
+        for profile in profiles:
+            errors = " ".join(f"{error:.2e}" for error in profile.errors)
+            print(f"{profile.name}: {errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+""" Exact reduction of bundled conductors, for validating the equivalent
+    bundle conductors that the equation classes use.
+
+    Every subconductor of a bundle is modelled as a conductor of its own,
+    and the bundle is then reduced with the constraints that the
+    subconductors share one voltage and carry the phase current between
+    them. This costs a primitive matrix with one row per subconductor.
+"""
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+from numpy import cos, ndarray, sin
+from numpy import pi as π
+
+from carsons.carsons import (
+    CarsonsEquations,
+    bundle_radius,
+    perform_kron_reduction,
+)
+from carsons.models import normalize_model
+
+
+def subconductor_positions(position: Tuple[float, float], count: int,
+                           spacing: float) -> List[Tuple[float, float]]:
+    """ Positions of `count` subconductors evenly spaced `spacing` meters
+        apart around `position`: side by side for two, a triangle with its
+        apex up for three, and a square for four.
+    """
+    x, y = position
+    A = bundle_radius(count, spacing)
+    angles = [-π / 2 + π / count + 2 * π * k / count for k in range(count)]
+    return [(x + A * cos(θ), y + A * sin(θ)) for θ in angles]
+
+
+def expand_bundles(line) -> Tuple[SimpleNamespace, Dict[str, List[str]]]:
+    """ A copy of `line`, any line model accepted by the equation classes,
+        with each bundle replaced by its subconductors, labelled `A`, `A:2`,
+        `A:3`, ..., and the labels of the subconductors of each conductor.
+    """
+    line = normalize_model(line)
+    bundles = getattr(line, 'bundles', {})
+    centres, gmr_, r_, _ = line.conductor_data()
+    subconductors: Dict[str, List[str]] = {}
+    phases, positions, gmr, r = [], {}, {}, {}
+    for phase in line.conductors:
+        if phase not in centres:
+            continue
+        count, spacing = bundles.get(phase, (1, 0.0))
+        labels = [phase] + [f"{phase}:{k}" for k in range(2, count + 1)]
+        subconductors[phase] = labels
+        for label, position in zip(labels, subconductor_positions(
+                centres[phase], count, spacing)):
+            phases.append(label)
+            positions[label] = position
+            gmr[label] = gmr_[phase]
+            r[label] = r_[phase]
+
+    expanded = SimpleNamespace(
+        phases=phases,
+        wire_positions=positions,
+        geometric_mean_radius=gmr,
+        resistance=r,
+        circuits=[[
+            label
+            for phase in circuit
+            for label in subconductors.get(phase, [phase])
+        ] for circuit in line.circuits],
+    )
+    for name in ('frequency', 'resistivity'):
+        if hasattr(line, name):
+            setattr(expanded, name, getattr(line, name))
+    return expanded, subconductors
+
+
+def calculate_impedance_exact(line, equations=CarsonsEquations) -> ndarray:
+    """ The phase impedance matrix of a line with bundled conductors, with
+        every subconductor modelled explicitly. It agrees with
+        `calculate_impedance(equations(line))` up to the equivalent bundle
+        approximation.
+    """
+    expanded_line, subconductors = expand_bundles(line)
+    model, expanded = equations(line), equations(expanded_line)
+    z_primitive = expanded.build_z_primitive()
+    index = {label: i for i, label in enumerate(expanded.conductors)}
+
+    # the currents of all but the first subconductor become currents
+    # circulating through the first, and their voltage equations become a
+    # zero voltage difference to the first
+    circulating = []
+    for phase in model.conductors:
+        labels = subconductors.get(phase, [phase])
+        first = index[labels[0]]
+        for label in labels[1:]:
+            i = index[label]
+            z_primitive[:, i] -= z_primitive[:, first]
+            z_primitive[i, :] -= z_primitive[first, :]
+            circulating.append(i)
+
+    phase_rows = [index[phase] for phase in model.phase_conductors]
+    neutral_rows = [index[phase] for phase in model.conductors
+                    if index[phase] not in phase_rows]
+    order = phase_rows + circulating + neutral_rows
+    return perform_kron_reduction(z_primitive[order][:, order],
+                                  dimension=len(phase_rows))
@@ -0,0 +1,315 @@
+import os
+import sqlite3
+from collections import OrderedDict
+from hashlib import sha256
+from io import BytesIO
+from threading import Lock, local
+from time import time
+from typing import Callable, Hashable, Mapping, NamedTuple, Optional, Tuple
+
+from numpy import argsort, array, ix_, load, ndarray, save
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedances,
+    perform_kron_reduction,
+)
+from carsons.packed import is_packed, pack_symmetric, unpack_symmetric
+
+with open(os.path.join(os.path.dirname(__file__), 'VERSION')) as version:
+    VERSION = version.read().strip()
+
+# conductor properties that follow a conductor when phases are relabelled
+PER_CONDUCTOR = ('phases', 'phase_positions', 'gmr', 'r', 'conductor_radius',
+                 'bundles', 'circuits')
+
+
+def model_key(model) -> Hashable:
+    """ A hashable key identifying an equation object by its class and all
+        of its inputs, so that equal configurations share cache entries.
+    """
+    return (type(model).__name__,) + tuple(
+        (name, _freeze(value))
+        for name, value in sorted(vars(model).items())
+        if not name.startswith('_')
+    )
+
+
+def canonical_form(model) -> Tuple[Hashable, Optional[ndarray]]:
+    """ A key for an overhead line equation object that is the same for
+        every relabelling of its phase conductors or of its neutrals, and
+        for horizontal reflections and translations of the configuration,
+        e.g. for ABC, BCA and ACB phasing of one framing or a mirror-image
+        crossarm. Also returns the `order` of the model's phase conductors
+        in the canonical configuration, so that
+        `Z_canonical = Z_abc[ix_(order, order)]`.
+
+        Cable models are returned with their `model_key` and no order,
+        since their conductors are tied to their labels.
+    """
+    if type(model).compute_d is not CarsonsEquations.compute_d:
+        return model_key(model), None
+
+    shared = tuple(
+        (name, _freeze(value))
+        for name, value in sorted(vars(model).items())
+        if name not in PER_CONDUCTOR and not name.startswith('_')
+    )
+    phases = model.phase_conductors
+    neutrals = model.conductors[len(phases):]
+
+    candidates = []
+    for reflection in (1.0, -1.0):
+        x = {conductor: reflection * model.phase_positions[conductor][0]
+             for conductor in model.conductors if conductor in model.phases}
+        offset = min(x.values())
+
+        def record(conductor: str) -> tuple:
+            if conductor not in model.phases:
+                return (0,)
+            return (1, round(x[conductor] - offset, 9),
+                    round(model.phase_positions[conductor][1], 9),
+                    model.gmr[conductor], model.r[conductor],
+                    model.conductor_radius.get(conductor, 0.0))
+
+        order = sorted(range(len(phases)), key=lambda i: record(phases[i]))
+        candidates.append((
+            tuple(record(phases[i]) for i in order),
+            tuple(sorted(record(neutral) for neutral in neutrals)),
+            order,
+        ))
+    phase_records, neutral_records, order = min(
+        candidates, key=lambda candidate: candidate[:2])
+    key = (type(model).__name__, 'canonical', shared, phase_records,
+           neutral_records)
+    return key, array(order)
+
+
+def to_canonical(z_abc: ndarray, order: Optional[ndarray]) -> ndarray:
+    return z_abc if order is None else z_abc[ix_(order, order)]
+
+
+def from_canonical(z_abc: ndarray, order: Optional[ndarray]) -> ndarray:
+    if order is None:
+        return z_abc
+    inverse = argsort(order)
+    return z_abc[ix_(inverse, inverse)]
+
+
+def _freeze(value) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted(
+            ((key, _freeze(item)) for key, item in value.items()), key=str))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value, key=str))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ImpedanceCache():
+    """ A thread-safe, size-bounded in-memory cache of phase impedance
+        matrices, evicting the least recently used entry when full.
+        Cached matrices are read-only copies shared between the callers
+        that hit them; the caller computing a matrix keeps its own.
+
+        With `packed`, only the upper triangle of each symmetric matrix is
+        held (see `carsons.packed`), halving the memory per entry, and
+        `get` returns a new dense matrix. `put` then also takes a matrix
+        already packed as a 1-D triangle.
+    """
+
+    def __init__(self, max_entries: int = 65536, packed: bool = False):
+        self.max_entries = max_entries
+        self.packed = packed
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[ndarray]:
+        with self._lock:
+            z_abc = self._entries.get(key)
+            if z_abc is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return unpack_symmetric(z_abc) if self.packed else z_abc
+
+    def put(self, key: Hashable, z_abc: ndarray):
+        # the caller's array is left writable; one that is already
+        # read-only can be shared as it is
+        if self.packed and not is_packed(z_abc):
+            z_abc = pack_symmetric(z_abc)
+        elif z_abc.flags.writeable:
+            z_abc = z_abc.copy()
+        z_abc.flags.writeable = False
+        with self._lock:
+            self._entries[key] = z_abc
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(
+            self, model,
+            compute: Callable[..., ndarray] = calculate_impedance,
+            symmetries: bool = False) -> ndarray:
+        """ The cached phase impedance matrix of `model`, computed with
+            `compute` on a miss. With `symmetries`, a model whose phases
+            are a relabelling or a reflection of a cached configuration is
+            answered by permuting its matrix (see `canonical_form`).
+        """
+        if symmetries:
+            key, order = canonical_form(model)
+        else:
+            key, order = model_key(model), None
+        z_abc = self.get(key)
+        if z_abc is None:
+            z_abc = to_canonical(compute(model), order)
+            self.put(key, z_abc)
+        return from_canonical(z_abc, order)
+
+
+class ImpedanceRecord(NamedTuple):
+    z_primitive: ndarray
+    z_abc: ndarray
+    z1: Optional[complex]  # sequence impedances, for three phase models
+    z0: Optional[complex]
+
+
+def content_hash(model) -> str:
+    """ A hash of an equation object's class, inputs and the library
+        version, stable across processes.
+    """
+    return sha256(repr((VERSION, model_key(model))).encode()).hexdigest()
+
+
+class PersistentImpedanceCache():
+    """ An impedance cache in a SQLite database file, shared between
+        processes.
+
+        Entries are keyed by `content_hash` and hold the primitive and
+        phase impedance matrices, packed (see `carsons.packed`) in `.npy`
+        format, and the sequence impedances. The database runs in
+        write-ahead-log mode so that readers are not blocked by a writer,
+        and when it holds more than `max_entries` the least recently used
+        entries are evicted. So that hits stay reads, the time an entry was
+        last used is only updated by a hit once it is `touch_interval`
+        seconds old, which bounds how stale the eviction order can be.
+        Connections are opened per thread.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000,
+                 timeout: float = 30.0, touch_interval: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self._local = local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS impedances ("
+                " key TEXT PRIMARY KEY,"
+                " z_primitive BLOB NOT NULL,"
+                " z_abc BLOB NOT NULL,"
+                " z1_real REAL, z1_imag REAL, z0_real REAL, z0_imag REAL,"
+                " last_used REAL NOT NULL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS impedances_last_used"
+                " ON impedances (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM impedances").fetchone()[0]
+
+    def get(self, model) -> Optional[ImpedanceRecord]:
+        key = content_hash(model)
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT z_primitive, z_abc, z1_real, z1_imag, z0_real,"
+                " z0_imag, last_used FROM impedances WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            now = time()
+            if now - row[-1] >= self.touch_interval:
+                connection.execute(
+                    "UPDATE impedances SET last_used = ? WHERE key = ?",
+                    (now, key))
+        z_primitive, z_abc, z1_real, z1_imag, z0_real, z0_imag, _ = row
+        return ImpedanceRecord(
+            _decode(z_primitive), _decode(z_abc),
+            None if z1_real is None else complex(z1_real, z1_imag),
+            None if z0_real is None else complex(z0_real, z0_imag),
+        )
+
+    def put(self, model, record: ImpedanceRecord):
+        z1, z0 = record.z1, record.z0
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO impedances VALUES"
+                " (?, ?, ?, ?, ?, ?, ?, ?)", (
+                    content_hash(model),
+                    _encode(record.z_primitive), _encode(record.z_abc),
+                    None if z1 is None else z1.real,
+                    None if z1 is None else z1.imag,
+                    None if z0 is None else z0.real,
+                    None if z0 is None else z0.imag,
+                    time(),
+                ))
+            connection.execute(
+                "DELETE FROM impedances WHERE key IN ("
+                " SELECT key FROM impedances ORDER BY last_used DESC"
+                " LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def get_record(self, model) -> ImpedanceRecord:
+        record = self.get(model)
+        if record is None:
+            z_primitive = model.build_z_primitive()
+            z_abc = perform_kron_reduction(z_primitive,
+                                           dimension=model.dimension)
+            z1, z0 = (calculate_sequence_impedances(z_abc)
+                      if model.dimension == 3 else (None, None))
+            record = ImpedanceRecord(z_primitive, z_abc, z1, z0)
+            self.put(model, record)
+        return record
+
+    def get_or_compute(self, model) -> ndarray:
+        return self.get_record(model).z_abc
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def _encode(matrix: ndarray) -> bytes:
+    buffer = BytesIO()
+    save(buffer, pack_symmetric(matrix), allow_pickle=False)
+    return buffer.getvalue()
+
+
+# the `.npy` header is parsed with `ast.literal_eval`, which is not
+# thread-safe on some Python versions
+_decode_lock = Lock()
+
+
+def _decode(blob: bytes) -> ndarray:
+    with _decode_lock:
+        matrix = load(BytesIO(blob), allow_pickle=False)
+    # entries written before packing hold the dense matrix
+    return unpack_symmetric(matrix) if matrix.ndim == 1 else matrix
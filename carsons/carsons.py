@@ -1,11 +1,15 @@
 from collections import defaultdict
 from itertools import islice
-from typing import Dict, Iterable, Iterator, Tuple
+from typing import Dict, FrozenSet, Iterator, List, Sequence, Tuple
 
 from numpy import arctan, cos, log, sin, sqrt, zeros, exp
-from numpy import array, ndarray
+from numpy import array, asarray, diagonal, eye, ndarray, where
+from numpy import complex64, complex128, finfo, result_type
 from numpy import pi as π
-from numpy.linalg import inv
+from numpy.linalg import cond, inv, solve
+
+from carsons.lazy import LazyImpedanceMatrix
+from carsons.models import CONCENTRIC_NEUTRAL_ATTRIBUTES, normalize_model
 
 alpha = exp(2j*π/3)
 
@@ -21,23 +25,78 @@ Ainv = (1/3)*array([
                 [1, alpha**2, alpha],
 ])
 
+# Single precision Kron reductions are promoted to double precision when
+# the condition number of Ẑnn would amplify rounding error past ~1e-4.
+SINGLE_PRECISION_MAX_CONDITION = 1e-4 / finfo(complex64).eps
+
 
-def convert_geometric_model(geometric_model) -> ndarray:
+def convert_geometric_model(geometric_model, cache=None) -> ndarray:
     carsons_model = CarsonsEquations(geometric_model)
+    if cache is not None:
+        return cache.get_or_compute(carsons_model)
 
     z_primitive = carsons_model.build_z_primitive()
     z_abc = perform_kron_reduction(z_primitive)
     return z_abc
 
 
-def calculate_impedance(model) -> ndarray:
+def calculate_impedance(model, cache=None, strategy=None) -> ndarray:
+    """ The phase impedance matrix of an equation object. A `cache`, such
+        as `carsons.cache.ImpedanceCache` or `PersistentImpedanceCache`,
+        answers configurations it has seen before without recomputing.
+
+        The matrix is computed with the model's own `build_z_primitive`
+        unless another execution `strategy` of `carsons.dispatch` is given.
+    """
+    if cache is not None:
+        return cache.get_or_compute(model)
+    if strategy not in (None, 'scalar'):
+        from carsons.dispatch import calculate_impedances
+        return calculate_impedances([model], strategy)[0]
     z_primitive = model.build_z_primitive()
     z_abc = perform_kron_reduction(z_primitive, dimension=model.dimension)
 
     return z_abc
 
 
-def perform_kron_reduction(z_primitive: ndarray, dimension=3) -> ndarray:
+def concentric_neutral_gmr(strand_gmr: float, strand_count: float,
+                           radius: float) -> float:
+    """ The GMR of the equivalent conductor of `strand_count` neutral
+        strands of GMR `strand_gmr` on a circle of `radius`.
+    """
+    k = strand_count
+    return (strand_gmr * k * radius**(k-1))**(1/k)
+
+
+def bundle_radius(count: int, spacing: float) -> float:
+    """ The radius of the circle through the subconductors of a bundle of
+        `count` subconductors evenly spaced `spacing` meters apart.
+    """
+    return spacing / (2 * sin(π / count)) if count > 1 else 0.0
+
+
+def bundle_gmr(gmr: float, count: int, spacing: float) -> float:
+    """ The GMR of a conductor equivalent to a bundle of `count`
+        subconductors of GMR `gmr`, evenly spaced `spacing` meters apart.
+    """
+    A = bundle_radius(count, spacing)
+    return (count * gmr * A**(count-1))**(1/count)
+
+
+def calculate_admittance(model) -> ndarray:
+    p_primitive = model.build_p_primitive()
+    return perform_admittance_reduction(p_primitive, model.ω,
+                                        dimension=model.dimension)
+
+
+def calculate_circuit_impedances(model) -> List[List[ndarray]]:
+    z_primitive = model.build_z_primitive()
+    return perform_block_kron_reduction(
+        z_primitive, [len(circuit) for circuit in model.circuits])
+
+
+def perform_kron_reduction(z_primitive: ndarray, dimension=3,
+                           dtype=None) -> ndarray:
     """ Reduces the primitive impedance matrix to an equivalent impedance
         matrix.
 
@@ -70,56 +129,224 @@ def perform_kron_reduction(z_primitive: ndarray, dimension=3) -> ndarray:
                      Zabc = [Zaa, Zab, Zac]
                             [Zba, Zbb, Zbc]
                             [Zca, Zcb, Zcc]
+
+        A stack of primitive matrices of shape (..., N, N) is reduced in one
+        call, returning a (..., dimension, dimension) stack.
+
+        The reduction is carried out in the precision of `z_primitive`, or
+        of `dtype` if one is given. In single precision (complex64) an
+        ill-conditioned Ẑnn is detected and the reduction is promoted to
+        double precision (complex128), which is then the returned type.
     """
-    Ẑpp, Ẑpn = (z_primitive[0:dimension, 0:dimension],
-                z_primitive[0:dimension, dimension:])
-    Ẑnp, Ẑnn = (z_primitive[dimension:,  0:dimension],
-                z_primitive[dimension:,  dimension:])
-    Z_abc = Ẑpp - Ẑpn @ inv(Ẑnn) @ Ẑnp
+    # materializes a `LazyImpedanceMatrix`
+    z_primitive = asarray(z_primitive)
+    z_primitive = z_primitive.astype(
+        reduction_dtype(z_primitive, dimension, dtype), copy=False)
+
+    Ẑpp, Ẑpn = (z_primitive[..., 0:dimension, 0:dimension],
+                z_primitive[..., 0:dimension, dimension:])
+    Ẑnp, Ẑnn = (z_primitive[..., dimension:,  0:dimension],
+                z_primitive[..., dimension:,  dimension:])
+    Z_abc = Ẑpp - Ẑpn @ solve(Ẑnn, Ẑnp)
     return Z_abc
 
 
-def calculate_sequence_impedance_matrix(Z):
-    return Ainv @ Z @ A
+def perform_block_kron_reduction(z_primitive: ndarray,
+                                 circuits: Sequence[int] = (3,),
+                                 dtype=None) -> List[List[ndarray]]:
+    """ Reduces the primitive impedance matrix of several circuits sharing
+        the same neutrals and shield wires, e.g. a double-circuit tower.
+
+        The phase conductors of the circuits come first in `z_primitive`,
+        `circuits` giving the number of phase conductors in each. Ẑnn is
+        factored once and solved against the phase conductors of every
+        circuit together. Returns the block matrix
+
+              [[Z₁₁, Z₁₂, ...],
+               [Z₂₁, Z₂₂, ...],
+               ...]
+
+        where Zᵢᵢ is the phase impedance matrix of circuit i and Zᵢⱼ the
+        mutual coupling between circuits i and j. `numpy.block` reassembles
+        the full phase impedance matrix.
+    """
+    Z = perform_kron_reduction(z_primitive, dimension=sum(circuits),
+                               dtype=dtype)
+    bounds = [0]
+    for size in circuits:
+        bounds.append(bounds[-1] + size)
+    return [
+        [Z[..., i:i_end, j:j_end]
+         for j, j_end in zip(bounds, bounds[1:])]
+        for i, i_end in zip(bounds, bounds[1:])
+    ]
+
+
+def perform_admittance_reduction(p_primitive: ndarray, ω,
+                                 dimension=3) -> ndarray:
+    """ Kron-reduces a primitive potential coefficient matrix, as from
+        `build_p_primitive`, with the neutrals at ground potential, and
+        returns the shunt admittance matrix jω·P_abc⁻¹ in Siemens / meter.
+
+        Phases that are not present have zero potential coefficients and
+        get zero rows and columns in the admittance matrix. Stacks of
+        matrices are reduced in one call, with `ω` of shape (...).
+    """
+    P_abc = perform_kron_reduction(p_primitive, dimension=dimension)
+    present = diagonal(P_abc, axis1=-2, axis2=-1) != 0
+    mask = present[..., :, None] & present[..., None, :]
+    # absent phases are given a unit potential coefficient so that P_abc
+    # can be inverted, and are masked out again afterwards
+    P_abc = P_abc + eye(P_abc.shape[-1]) * ~present[..., None, :]
+    ω = asarray(ω)[..., None, None]
+    return where(mask, 1j * ω * inv(P_abc), 0)
+
+
+def _none() -> None:
+    # the default of the concentric neutral dicts, which unlike a lambda
+    # can be pickled, so that equation objects can be sent to processes
+    return None
+
+
+def _is_ill_conditioned(Ẑnn: ndarray) -> bool:
+    if Ẑnn.size == 0:
+        return False
+    return bool((cond(Ẑnn) > SINGLE_PRECISION_MAX_CONDITION).any())
+
+
+def reduction_dtype(z_primitive: ndarray, dimension=3, dtype=None):
+    """ The precision to store and reduce `z_primitive` in: `dtype`, by
+        default its own, unless that is single precision and Ẑnn of any
+        matrix in the stack is too ill-conditioned for it, in which case
+        double precision. Checked before rounding, so that a primitive
+        evaluated in double precision is never reduced from rounded values.
+    """
+    dtype = result_type(z_primitive if dtype is None else dtype)
+    if dtype == complex64 and \
+            _is_ill_conditioned(z_primitive[..., dimension:, dimension:]):
+        return result_type(z_primitive, complex128)
+    return dtype
+
+
+def calculate_sequence_impedance_matrix(Z, dtype=None):
+    dtype = result_type(Z if dtype is None else dtype, complex64)
+    return (Ainv.astype(dtype, copy=False) @
+            Z.astype(dtype, copy=False) @
+            A.astype(dtype, copy=False))
 
 
 def calculate_sequence_impedances(Z):
     Z012 = calculate_sequence_impedance_matrix(Z)
-    return Z012[1, 1], Z012[0, 0]
+    # indexing with [()] unwraps the result of a single matrix to a scalar
+    return Z012[..., 1, 1][()], Z012[..., 0, 0][()]
 
 
 class CarsonsEquations():
 
     ρ = 100  # resistivity, ohms/meter^3
     μ = 4 * π * 1e-7  # permeability, Henry / meter
+    ε0 = 8.854187817e-12  # permittivity of free space, Farad / meter
 
-    def __init__(self, model):
-        self.phases: Iterable[str] = model.phases
-        self.phase_positions: Dict[str, Tuple[float, float]] = \
-            model.wire_positions
-        self.gmr: Dict[str, float] = model.geometric_mean_radius
-        self.r: Dict[str, float] = model.resistance
+    number_of_P_terms = 1
+    number_of_Q_terms = 2
+
+    # the optional per-conductor attributes of the line model that the
+    # class needs, validated by `normalize_model`
+    required_attributes: Tuple[str, ...] = ()
+
+    def __init__(self, model, dtype=complex):
+        model = normalize_model(model, self.required_attributes)
+        self.phases: FrozenSet[str] = model.phases
+        # new dicts built from the normalized array, which subclasses extend
+        # with derived conductors
+        self.phase_positions: Dict[str, Tuple[float, float]]
+        self.gmr: Dict[str, float]
+        self.r: Dict[str, float]
+        # the radii are only needed for the potential coefficients
+        self.conductor_radius: Dict[str, float]
+        self.phase_positions, self.gmr, self.r, self.conductor_radius = \
+            model.conductor_data()
 
         self.ƒ = getattr(model, 'frequency', 60)
         self.ω = 2.0 * π * self.ƒ  # angular frequency radians / second
+        self.ρ = getattr(model, 'resistivity', self.ρ)
+        self.dtype = dtype
+
+        # bundled conductors, as {phase: (subconductor count, spacing)}, are
+        # given the resistance and GMR of one subconductor and the position
+        # of the bundle centre, and are replaced by one equivalent conductor
+        self.bundles: Dict[str, Tuple[int, float]] = dict(
+            getattr(model, 'bundles', {}))
+        for phase, (count, spacing) in self.bundles.items():
+            if phase not in self.phases:
+                continue
+            self.gmr[phase] = bundle_gmr(self.gmr[phase], count, spacing)
+            self.r[phase] = self.r[phase] / count
+            if phase in self.conductor_radius:
+                self.conductor_radius[phase] = bundle_gmr(
+                    self.conductor_radius[phase], count, spacing)
+        # the phase conductors of each circuit, e.g. [["A1", "B1", "C1"],
+        # ["A2", "B2", "C2"]] for a double-circuit tower
+        self.circuits: List[List[str]] = model.circuits
+        self._conductors: List[str] = model.conductors
 
     def build_z_primitive(self) -> ndarray:
         dimension = len(self.conductors)
-        z_primitive = zeros(shape=(dimension, dimension), dtype=complex)
+        # evaluated in double precision and rounded to `dtype` once, unless
+        # Ẑnn is too ill-conditioned for single precision
+        z_primitive = zeros(shape=(dimension, dimension), dtype=complex128)
+
+        for index_i, phase_i in enumerate(self.conductors):
+            for index_j, phase_j in enumerate(self.conductors):
+                z_primitive[index_i, index_j] = self.compute_z(phase_i,
+                                                               phase_j)
+
+        return z_primitive.astype(
+            reduction_dtype(z_primitive, self.dimension, self.dtype),
+            copy=False)
+
+    def build_lazy_z_primitive(self) -> LazyImpedanceMatrix:
+        """ The primitive impedance matrix as a `LazyImpedanceMatrix`,
+            which only evaluates the entries that are read.
+        """
+        return LazyImpedanceMatrix(self.conductors, self.compute_z,
+                                   self.dtype)
+
+    def compute_z(self, i, j) -> complex:
+        if i not in self.phases or j not in self.phases:
+            return 0j
+        return complex(self.compute_R(i, j), self.compute_X(i, j))
+
+    def build_p_primitive(self) -> ndarray:
+        """ The primitive potential coefficient matrix in meters / Farad,
+            from the conductor heights and the `conductor_radius` of the
+            line model.
+        """
+        dimension = len(self.conductors)
+        p_primitive = zeros(shape=(dimension, dimension))
 
         for index_i, phase_i in enumerate(self.conductors):
             for index_j, phase_j in enumerate(self.conductors):
                 if phase_i not in self.phases or phase_j not in self.phases:
                     continue
-                R = self.compute_R(phase_i, phase_j)
-                X = self.compute_X(phase_i, phase_j)
-                z_primitive[index_i, index_j] = complex(R, X)
+                p_primitive[index_i, index_j] = \
+                    self.compute_potential_coefficient(phase_i, phase_j)
+
+        return p_primitive
 
-        return z_primitive
+    def compute_potential_coefficient(self, i, j) -> float:
+        if i == j:
+            Sᵢⱼ = 2.0 * self.get_h(i)
+            dᵢⱼ = self.conductor_radius[i]
+        else:
+            Sᵢⱼ = self.compute_D(i, j)
+            dᵢⱼ = self.compute_d(i, j)
+        return log(Sᵢⱼ / dᵢⱼ) / (2 * π * self.ε0)
 
     def compute_R(self, i, j) -> float:
         rᵢ = self.r[i]
-        ΔR = self.μ * self.ω / π * self.compute_P(i, j)
+        ΔR = self.μ * self.ω / π * self.compute_P(i, j,
+                                                  self.number_of_P_terms)
 
         if i == j:
             return rᵢ + ΔR
@@ -127,7 +354,7 @@ class CarsonsEquations():
             return ΔR
 
     def compute_X(self, i, j) -> float:
-        Qᵢⱼ = self.compute_Q(i, j)
+        Qᵢⱼ = self.compute_Q(i, j, self.number_of_Q_terms)
         ΔX = self.μ * self.ω / π * Qᵢⱼ
 
         # calculate geometry ratio 𝛥G
@@ -212,16 +439,15 @@ class CarsonsEquations():
 
     @property
     def dimension(self):
-        return 2 if getattr(self, 'is_secondary', False) else 3
+        return sum(map(len, self.circuits))
 
     @property
-    def conductors(self):
-        neutral_conductors = sorted([
-            ph for ph in self.phases
-            if ph.startswith("N")
-        ])
+    def phase_conductors(self) -> List[str]:
+        return self._conductors[:self.dimension]
 
-        return ["A", "B", "C"] + neutral_conductors
+    @property
+    def conductors(self) -> List[str]:
+        return self._conductors
 
 
 class ModifiedCarsonsEquations(CarsonsEquations):
@@ -250,17 +476,25 @@ class ModifiedCarsonsEquations(CarsonsEquations):
 
 
 class ConcentricNeutralCarsonsEquations(ModifiedCarsonsEquations):
+    required_attributes = CONCENTRIC_NEUTRAL_ATTRIBUTES
+
     def __init__(self, model, *args, **kwargs):
-        super().__init__(model)
+        model = normalize_model(model, self.required_attributes)
+        super().__init__(model, *args, **kwargs)
+        self.εr = getattr(model, 'insulation_permittivity', 2.3)
+        if getattr(model, 'library', None) is not None:
+            self._use_library(model.library, model.conductor_types)
+            return
+
         self.neutral_strand_gmr: Dict[str, float] = model.neutral_strand_gmr
         self.neutral_strand_count: Dict[str, float] = defaultdict(
-            lambda: None,
+            _none,
             model.neutral_strand_count
         )
         self.neutral_strand_resistance: Dict[str, float] = \
             model.neutral_strand_resistance
         self.radius: Dict[str, float] = defaultdict(
-            lambda: None, {
+            _none, {
                 phase: (diameter_over_neutral -
                         model.neutral_strand_diameter[phase]) / 2
                 for phase, diameter_over_neutral
@@ -279,8 +513,60 @@ class ConcentricNeutralCarsonsEquations(ModifiedCarsonsEquations):
             phase: resistance / model.neutral_strand_count[phase]
             for phase, resistance in model.neutral_strand_resistance.items()
         })
+        self.neutral_strand_diameter: Dict[str, float] = \
+            model.neutral_strand_diameter
         return
 
+    def _use_library(self, library, types):
+        """ Takes the neutral constants of each cable from the derived
+            constants of its type in a `ConductorLibrary`.
+        """
+        neutrals = {f"N{phase}": index for phase, index in types.items()
+                    if f"N{phase}" in self.phases}
+        self.neutral_strand_gmr = {
+            n: library[i].neutral_strand_gmr for n, i in neutrals.items()}
+        self.neutral_strand_count = defaultdict(_none, {
+            n: library[i].neutral_strand_count for n, i in neutrals.items()})
+        self.neutral_strand_resistance = {
+            n: library[i].neutral_strand_resistance
+            for n, i in neutrals.items()}
+        self.neutral_strand_diameter = {
+            n: library[i].neutral_strand_diameter
+            for n, i in neutrals.items()}
+        self.radius = defaultdict(_none, {
+            n: library.neutral_radius[i] for n, i in neutrals.items()})
+        self.phase_positions.update({
+            f"N{phase}": self.phase_positions[phase]
+            for phase in list(self.phase_positions.keys())
+        })
+        self.gmr.update({
+            n: library.neutral_gmr[i] for n, i in neutrals.items()})
+        self.r.update({
+            n: library.neutral_resistance[i] for n, i in neutrals.items()})
+
+    def build_p_primitive(self) -> ndarray:
+        """ The potential coefficients of the phase conductors to their
+            concentric neutrals. The neutrals are at ground potential and
+            screen each phase conductor from the others and from earth, so
+            the matrix is diagonal and has no rows for the neutrals.
+        """
+        dimension = len(self.phase_conductors)
+        p_primitive = zeros(shape=(dimension, dimension))
+        for index, phase in enumerate(self.phase_conductors):
+            if phase in self.phases:
+                p_primitive[index, index] = \
+                    self.compute_potential_coefficient(phase, phase)
+        return p_primitive
+
+    def compute_potential_coefficient(self, i, j) -> float:
+        neutral = f"N{i}"
+        R = self.radius[neutral]
+        k = self.neutral_strand_count[neutral]
+        RDc = self.conductor_radius[i]
+        RDs = self.neutral_strand_diameter[neutral] / 2
+        return (log(R / RDc) - log(k * RDs / R) / k) / \
+            (2 * π * self.ε0 * self.εr)
+
     def compute_d(self, i, j) -> float:
         I, J = set(i), set(j)
         r = self.radius[i] or self.radius[j]
@@ -305,17 +591,29 @@ class ConcentricNeutralCarsonsEquations(ModifiedCarsonsEquations):
             return distance_ij
 
     def GMR_cn(self, phase) -> float:
-        GMR_s = self.neutral_strand_gmr[phase]
-        k = self.neutral_strand_count[phase]
-        R = self.radius[phase]
-        return (GMR_s * k * R**(k-1))**(1/k)
+        return concentric_neutral_gmr(self.neutral_strand_gmr[phase],
+                                      self.neutral_strand_count[phase],
+                                      self.radius[phase])
 
 
 class MultiConductorCarsonsEquations(ModifiedCarsonsEquations):
-    def __init__(self, model):
-        super().__init__(model)
-        self.outside_radius: Dict[str, float] = model.outside_radius
+    required_attributes = ('outside_radius',)
 
+    def __init__(self, model, *args, **kwargs):
+        model = normalize_model(model, self.required_attributes)
+        super().__init__(model, *args, **kwargs)
+        library = getattr(model, 'library', None)
+        if library is None:
+            self.outside_radius: Dict[str, float] = model.outside_radius
+        else:
+            self.outside_radius = {
+                conductor: library.outside_radius[index]
+                for conductor, index in model.conductor_types.items()
+            }
+
+    # the potential coefficients are those of `CarsonsEquations`, from the
+    # `conductor_radius` of each conductor and the spacing of `compute_d`,
+    # with the insulation treated as air
     def compute_d(self, i, j) -> float:
         # Assumptions:
         # 1. All conductors in the cable are touching each other and
@@ -324,22 +622,6 @@ class MultiConductorCarsonsEquations(ModifiedCarsonsEquations):
         #    which are diagonally positioned is neglected.
         return self.outside_radius[i] + self.outside_radius[j]
 
-    @property
-    def conductors(self):
-        neutral_conductors = sorted([
-            ph for ph in self.phases if ph.startswith("N")
-        ])
-        if self.is_secondary:
-            conductors = ["S1", "S2"] + neutral_conductors
-        else:
-            conductors = ["A", "B", "C"] + neutral_conductors
-
-        return conductors
-
     @property
     def is_secondary(self):
-        phase_conductors = [ph for ph in self.phases if not ph.startswith('N')]
-        if phase_conductors == ["S1", "S2"]:
-            return True
-        else:
-            return False
+        return self.phase_conductors == ["S1", "S2"]
@@ -0,0 +1,312 @@
+""" Automatic choice of the execution strategy for impedance workloads.
+
+    The phase impedances of a batch of equation objects can be computed
+    in several ways, whose relative speed depends on the batch size, the
+    number of conductors, the equation class and the machine:
+
+    scalar    -- `build_z_primitive` and `perform_kron_reduction` per model
+    numpy     -- the vectorized numpy kernel and one stacked kron reduction
+    jit       -- the compiled kernel, when Numba is installed
+    threads   -- shards of the batch on a thread pool
+                 (`calculate_impedances_threaded`)
+    processes -- shards of the batch on a process pool
+
+    `calibrate` times every strategy on synthetic overhead lines over a
+    grid of batch sizes and conductor counts and saves the timings as
+    json, by default to `~/.cache/carsons/calibration.json` or to the path
+    in the `CARSONS_CALIBRATION` environment variable. `select_strategy`
+    then picks the fastest strategy measured at the nearest grid point.
+    Without a calibration batches are computed by the compiled or numpy
+    kernel. `carsons.calculate_impedance` only dispatches when given a
+    strategy other than 'scalar'. Calibrate with
+
+        python -m carsons.dispatch [--output calibration.json]
+
+    For batches the kernels can compute, a strategy can be forced for
+    `calculate_impedances` with the `strategy` argument or the
+    `CARSONS_STRATEGY` environment variable. `last_strategy` reports the
+    strategy used by the calling thread's last computation.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from math import log
+from threading import local
+from time import perf_counter
+from typing import Dict, Optional, Sequence, Type
+
+from numpy import concatenate, ndarray, stack
+from numpy.random import default_rng
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    MultiConductorCarsonsEquations,
+    calculate_impedance,
+    perform_kron_reduction,
+)
+from carsons.kernels import build_z_primitives, check_batch, njit
+from carsons.parallel import calculate_impedances_threaded
+
+STRATEGIES = ('scalar', 'numpy', 'jit', 'threads', 'processes')
+DEFAULT_CALIBRATION_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "carsons", "calibration.json")
+
+CALIBRATION_BATCH_SIZES = (1, 10, 100, 1_000, 10_000)
+CALIBRATION_CONDUCTOR_COUNTS = (4, 8, 16)
+
+# the methods the kernels reimplement; subclasses overriding any of them
+# can only be computed by the scalar path
+KERNEL_METHODS = ('build_z_primitive', 'compute_z', 'compute_R',
+                  'compute_X', 'compute_P', 'compute_Q', 'compute_k',
+                  'compute_θ', 'compute_d', 'compute_D')
+KERNEL_CLASSES = (MultiConductorCarsonsEquations,
+                  ConcentricNeutralCarsonsEquations,
+                  ModifiedCarsonsEquations, CarsonsEquations)
+
+_state = local()
+
+
+def last_strategy() -> Optional[str]:
+    """ The strategy used by this thread's last call of
+        `calculate_impedances`, or None.
+    """
+    return getattr(_state, 'strategy', None)
+
+
+def available_strategies(cores: Optional[int] = None):
+    cores = cores or os.cpu_count() or 1
+    return tuple(
+        strategy for strategy in STRATEGIES
+        if (strategy != 'jit' or njit is not None) and
+        (strategy not in ('threads', 'processes') or cores > 1)
+    )
+
+
+def kernel_compatible(equations: Type) -> bool:
+    """ Whether the batch kernels compute the same impedances as the
+        per-model methods of the equation class `equations`.
+    """
+    for base in KERNEL_CLASSES:
+        if issubclass(equations, base):
+            return all(getattr(equations, name) is getattr(base, name)
+                       for name in KERNEL_METHODS)
+    return False
+
+
+def select_strategy(batch_size: int, conductor_count: int,
+                    equations: Type = CarsonsEquations,
+                    cores: Optional[int] = None,
+                    calibration: Optional[dict] = None) -> str:
+    """ The strategy for a batch of `batch_size` objects of the equation
+        class `equations` with `conductor_count` conductors each, from
+        `calibration` (by default the saved calibration, if any).
+    """
+    if not kernel_compatible(equations):
+        return 'scalar'
+    available = available_strategies(cores)
+    if calibration is None:
+        calibration = load_calibration()
+    if calibration:
+        timings = _nearest_timings(calibration, batch_size, conductor_count,
+                                   equations)
+        measured = {strategy: seconds for strategy, seconds
+                    in timings.items() if strategy in available}
+        if measured:
+            return min(measured, key=measured.__getitem__)
+    if batch_size == 1:
+        return 'scalar'
+    return 'jit' if 'jit' in available else 'numpy'
+
+
+def calculate_impedances(models: Sequence,
+                         strategy: Optional[str] = None,
+                         max_workers: Optional[int] = None) -> ndarray:
+    """ The phase impedance matrices of `models`, a sequence of equation
+        objects, as a `(len(models), dim, dim)` stack, computed with
+        `strategy` or the strategy chosen by `select_strategy`.
+
+        Batches mixing equation classes or conductors, and subclasses
+        overriding the methods the kernels reimplement, can only be
+        computed by the scalar path. `CARSONS_STRATEGY` does not apply to
+        them, and forcing another `strategy` raises ValueError.
+    """
+    models = list(models)
+    first = models[0]
+    try:
+        check_batch(models)
+    except ValueError:
+        batchable = False
+    else:
+        batchable = kernel_compatible(type(first))
+
+    forced = strategy or os.environ.get("CARSONS_STRATEGY")
+    if forced is not None and forced not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {forced!r}, expected one of "
+                         f"{STRATEGIES}")
+    if not batchable:
+        if strategy not in (None, 'scalar'):
+            raise ValueError(
+                f"The {strategy!r} strategy cannot compute this batch: its "
+                f"models must share a kernel-compatible equation class and "
+                f"their conductors")
+        strategy = 'scalar'
+    else:
+        strategy = forced or select_strategy(
+            len(models), len(first.conductors), type(first))
+
+    _state.strategy = strategy
+    return _run(strategy, models, max_workers)
+
+
+def _run(strategy: str, models: list,
+         max_workers: Optional[int] = None) -> ndarray:
+    if strategy == 'scalar':
+        return stack([calculate_impedance(model, strategy='scalar')
+                      for model in models])
+    if strategy == 'threads':
+        return calculate_impedances_threaded(models, max_workers=max_workers)
+    if strategy == 'processes':
+        return _calculate_impedances_in_processes(models, max_workers)
+    return _calculate_shard(models, strategy)
+
+
+def _calculate_shard(models: list, backend: Optional[str] = None) -> ndarray:
+    z_primitives = build_z_primitives(models, backend=backend)
+    return perform_kron_reduction(z_primitives,
+                                  dimension=models[0].dimension)
+
+
+def _calculate_impedances_in_processes(
+        models: list, max_workers: Optional[int] = None) -> ndarray:
+    max_workers = max_workers or os.cpu_count() or 1
+    shard_size = max(1, -(-len(models) // max_workers))
+    shards = [models[start:start + shard_size]
+              for start in range(0, len(models), shard_size)]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return concatenate(list(pool.map(_calculate_shard, shards)))
+
+
+@lru_cache(maxsize=8)
+def _read_calibration(path: str, modified: float) -> Optional[dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_calibration(path: Optional[str] = None) -> Optional[dict]:
+    """ The saved calibration, or None if there is none. """
+    path = path or os.environ.get("CARSONS_CALIBRATION",
+                                  DEFAULT_CALIBRATION_PATH)
+    try:
+        modified = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _read_calibration(path, modified)
+
+
+def calibrate(path: Optional[str] = None,
+              batch_sizes: Sequence[int] = CALIBRATION_BATCH_SIZES,
+              conductor_counts: Sequence[int] = CALIBRATION_CONDUCTOR_COUNTS,
+              equations: Sequence[Type] = (CarsonsEquations,
+                                           ModifiedCarsonsEquations),
+              repeat: int = 3) -> dict:
+    """ Times every available strategy on synthetic overhead lines for
+        every equation class, conductor count and batch size, saves the
+        timings to `path` and returns them. A strategy more than ten times
+        slower than the fastest at one batch size is not timed at larger
+        ones.
+    """
+    calibration: dict = {"cores": os.cpu_count(), "timings": {}}
+    for equation_class in equations:
+        by_count = calibration["timings"].setdefault(
+            equation_class.__name__, {})
+        for conductor_count in conductor_counts:
+            by_size: Dict[str, Dict[str, float]] = {}
+            remaining = list(available_strategies())
+            for batch_size in sorted(batch_sizes):
+                models = [equation_class(line) for line in
+                          _calibration_lines(batch_size, conductor_count)]
+                timings = {
+                    strategy: min(_time(strategy, models)
+                                  for _ in range(repeat))
+                    for strategy in remaining
+                }
+                by_size[str(batch_size)] = timings
+                fastest = min(timings.values())
+                remaining = [strategy for strategy in remaining
+                             if timings[strategy] <= 10 * fastest]
+            by_count[str(conductor_count)] = by_size
+
+    path = path or os.environ.get("CARSONS_CALIBRATION",
+                                  DEFAULT_CALIBRATION_PATH)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(calibration, f, indent=2)
+    return calibration
+
+
+def _time(strategy: str, models: list) -> float:
+    start = perf_counter()
+    _run(strategy, models)
+    return perf_counter() - start
+
+
+def _calibration_lines(count: int, conductor_count: int, seed: int = 0):
+    """ Overhead lines with three phases and `conductor_count - 3`
+        neutrals at random positions.
+    """
+    rng = default_rng(seed)
+    labels = ["A", "B", "C"] + [f"N{n + 1}"
+                                for n in range(conductor_count - 3)]
+    for _ in range(count):
+        x = rng.permutation(conductor_count) * 0.5
+        y = rng.uniform(7, 10, conductor_count)
+        yield {
+            "phases": labels,
+            "wire_positions": {label: (x[i], y[i])
+                               for i, label in enumerate(labels)},
+            "geometric_mean_radius": {label: 0.00947938 for label in labels},
+            "resistance": {label: 0.000115575 for label in labels},
+        }
+
+
+def _nearest_timings(calibration: dict, batch_size: int,
+                     conductor_count: int, equations: Type) -> dict:
+    timings = calibration.get("timings", {})
+    by_count = next((timings[base.__name__] for base in equations.__mro__
+                     if base.__name__ in timings), None)
+    if not by_count:
+        return {}
+    count = min(by_count, key=lambda key: abs(int(key) - conductor_count))
+    by_size = by_count[count]
+    size = min(by_size, key=lambda key: abs(log(int(key)) -
+                                            log(max(batch_size, 1))))
+    return by_size[size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calibrates the execution strategies on this machine")
+    parser.add_argument("--output", help="where to save the calibration")
+    parser.add_argument("--batch-sizes", type=int, nargs="+",
+                        default=CALIBRATION_BATCH_SIZES)
+    parser.add_argument("--conductors", type=int, nargs="+",
+                        default=CALIBRATION_CONDUCTOR_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args(argv)
+
+    calibration = calibrate(arguments.output, arguments.batch_sizes,
+                            arguments.conductors, repeat=arguments.repeat)
+    for name, by_count in calibration["timings"].items():
+        for count, by_size in by_count.items():
+            for size, timings in by_size.items():
+                fastest = min(timings, key=timings.__getitem__)
+                print(f"{name:<26} {count:>3} conductors {size:>6} models "
+                      f"-> {fastest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+""" Cumulative impedances from the source to every bus of a radial feeder.
+
+    A feeder is described by arrays over its buses: the index of each
+    bus's parent bus (-1 for the source bus), and the line code and
+    length of the segment from the parent to the bus. The impedance of
+    each line code is computed once, and the path impedances are then
+    accumulated one tree level at a time, with every bus of a level
+    handled in one vectorized step.
+"""
+from typing import NamedTuple, Optional, Sequence, Union
+
+from numpy import (argsort, asarray, bincount, cumsum, ndarray, split, stack,
+                   where, zeros)
+
+from carsons.carsons import calculate_impedance, calculate_sequence_impedances
+
+
+class FeederImpedances(NamedTuple):
+    z_abc: ndarray  # (num_buses, dim, dim) phase impedances from the source
+    z1: Optional[ndarray]  # positive sequence impedances, for three phases
+    z0: Optional[ndarray]  # zero sequence impedances, for three phases
+
+
+def bus_depths(parent) -> ndarray:
+    """ The number of segments between each bus and the source, found by
+        pointer jumping in about log₂(depth) vectorized passes.
+    """
+    parent = asarray(parent)
+    depth = (parent >= 0).astype(int)
+    ancestor = parent.copy()
+    for _ in range(len(parent).bit_length() + 1):
+        has = ancestor >= 0
+        if not has.any():
+            return depth
+        safe = where(has, ancestor, 0)
+        depth = depth + where(has, depth[safe], 0)
+        ancestor = where(has, ancestor[safe], -1)
+    raise ValueError("`parent` does not describe a radial feeder")
+
+
+def calculate_path_impedances(
+        parent, code, length,
+        line_codes: Union[ndarray, Sequence],
+        source_impedance: Optional[ndarray] = None) -> FeederImpedances:
+    """ The phase impedance from the source to every bus.
+
+        parent           -- for each bus, the index of its parent, or -1
+                            for the source bus
+        code, length     -- for each bus, the line code index and length in
+                            meters of the segment from its parent; ignored
+                            for the source bus
+        line_codes       -- equation objects, e.g. `CarsonsEquations(line)`,
+                            or a `(K, dim, dim)` stack of impedances per
+                            meter, indexed by `code`
+        source_impedance -- the impedance behind the source bus, if any
+
+        Phases missing from a segment contribute no impedance on it.
+    """
+    parent = asarray(parent)
+    if isinstance(line_codes, ndarray):
+        z_codes = line_codes
+    else:
+        z_codes = stack([calculate_impedance(model) for model in line_codes])
+
+    is_source = parent < 0
+    segment = z_codes[where(is_source, 0, asarray(code))] * \
+        where(is_source, 0.0, asarray(length, dtype=float))[:, None, None]
+    if source_impedance is not None:
+        segment[is_source] += source_impedance
+
+    depth = bus_depths(parent)
+    order = argsort(depth, kind='stable')
+    levels = split(order, cumsum(bincount(depth))[:-1])
+
+    z_abc = zeros(segment.shape, dtype=segment.dtype)
+    z_abc[levels[0]] = segment[levels[0]]
+    for level in levels[1:]:
+        z_abc[level] = segment[level] + z_abc[parent[level]]
+
+    if z_abc.shape[-1] != 3:
+        return FeederImpedances(z_abc, None, None)
+    z1, z0 = calculate_sequence_impedances(z_abc)
+    return FeederImpedances(z_abc, z1, z0)
@@ -0,0 +1,395 @@
+""" Batched construction of primitive impedance matrices.
+
+    The equation classes in `carsons.carsons` evaluate Carson's equations
+    one conductor pair at a time. The kernels in this module evaluate the
+    same equations for a whole batch of models at once, from flat arrays
+    of conductor positions, GMRs and resistances.
+
+    Two backends are available:
+
+    numpy -- vectorized over the batch with numpy broadcasting.
+    jit   -- a single fused loop over every model and conductor pair, with
+             no intermediate arrays. It is compiled with Numba when Numba
+             is installed, which makes it the default backend; without
+             Numba it runs interpreted and is only useful for validation.
+"""
+from itertools import islice
+from math import atan, cos, log, sin, sqrt
+from typing import Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from numpy import arctan, empty, eye, ndarray, ones, stack, where, zeros
+from numpy import abs as absolute
+from numpy import array, cos as np_cos, log as np_log, sin as np_sin
+from numpy import sqrt as np_sqrt
+from numpy import pi as π
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    reduction_dtype,
+)
+from carsons.packed import pack_symmetric
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - depends on the environment
+    njit = None
+
+μ = CarsonsEquations.μ
+ε0 = CarsonsEquations.ε0
+
+BACKENDS = ('numpy', 'jit')
+DEFAULT_BACKEND = 'jit' if njit is not None else 'numpy'
+
+
+def build_z_primitives(models: Sequence,
+                       backend: Optional[str] = None,
+                       packed: bool = False) -> ndarray:
+    """ Builds the primitive impedance matrix of every model in `models`,
+        returning a `(len(models), dim, dim)` stack.
+
+        `models` are instances of one of the equation classes, e.g.
+        `CarsonsEquations(line)`. All models in a batch must be of the same
+        class and describe the same conductors, since they share one output
+        stack and one set of series terms.
+
+        With `packed`, the upper triangles of the matrices are returned as
+        a `(len(models), dim(dim+1)/2)` array (see `carsons.packed`).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of "
+                         f"{BACKENDS}")
+
+    check_batch(models)
+    first = models[0]
+
+    x, y, gmr, r, present, d = stack_models(models)
+    ω = array([model.ω for model in models], dtype=float)
+    ρ = array([model.ρ for model in models], dtype=float)
+    modified = isinstance(first, ModifiedCarsonsEquations)
+
+    if backend == 'numpy':
+        z_primitive = numpy_z_primitive(
+            x, y, gmr, r, present, ω, ρ, d,
+            first.number_of_P_terms, first.number_of_Q_terms, modified)
+    else:
+        z_primitive = empty(x.shape + x.shape[-1:], dtype=complex)
+        has_d = d is not None
+        fused_z_primitive(
+            x, y, gmr, r, present, ω, ρ,
+            d if has_d else zeros((0, 0, 0)), has_d,
+            first.number_of_P_terms, first.number_of_Q_terms, modified,
+            z_primitive)
+    z_primitive = z_primitive.astype(
+        reduction_dtype(z_primitive, first.dimension, first.dtype),
+        copy=False)
+    return pack_symmetric(z_primitive) if packed else z_primitive
+
+
+def build_zy_primitives(models: Sequence) -> Tuple[ndarray, ndarray]:
+    """ Builds the primitive impedance and potential coefficient matrices
+        of every model in `models` from one shared conductor geometry,
+        returning two `(len(models), ...)` stacks.
+
+        Overhead line models need a `conductor_radius` for every conductor.
+        The cable models only couple each phase conductor to its own
+        neutral, and their potential coefficients are built per model.
+        Both stacks are computed with the numpy backend.
+    """
+    check_batch(models)
+    first = models[0]
+
+    x, y, gmr, r, present, d = stack_models(models)
+    ω = array([model.ω for model in models], dtype=float)
+    ρ = array([model.ρ for model in models], dtype=float)
+    modified = isinstance(first, ModifiedCarsonsEquations)
+    overhead = type(first).build_p_primitive is \
+        CarsonsEquations.build_p_primitive
+    geometry = numpy_geometry(
+        x, y, present, d,
+        image=overhead or not (modified and first.number_of_P_terms == 1))
+
+    z_primitive = numpy_z_primitive(
+        x, y, gmr, r, present, ω, ρ, d,
+        first.number_of_P_terms, first.number_of_Q_terms, modified,
+        geometry=geometry,
+    ).astype(first.dtype, copy=False)
+
+    if not overhead:
+        p_primitive = stack([model.build_p_primitive() for model in models])
+        return z_primitive, p_primitive
+
+    radius = ones(x.shape)
+    for b, model in enumerate(models):
+        for i, conductor in enumerate(first.conductors):
+            if present[b, i]:
+                radius[b, i] = model.conductor_radius[conductor]
+    return z_primitive, numpy_p_primitive(y, radius, geometry)
+
+
+def check_batch(models: Sequence):
+    """ Checks that `models` can share one batch: all of one equation class
+        and describing the same conductors.
+    """
+    first = models[0]
+    for model in models:
+        if type(model) is not type(first) or \
+                model.conductors != first.conductors:
+            raise ValueError(
+                "All models in a batch must be of the same equation class "
+                "and describe the same conductors"
+            )
+
+
+def stack_models(models: Sequence) -> Tuple[
+        ndarray, ndarray, ndarray, ndarray, ndarray, Optional[ndarray]]:
+    """ Flattens a batch of equation objects into `(B, N)` arrays of
+        positions, GMRs, resistances and a mask of the conductors present.
+
+        Conductors missing from a model get placeholder values and are
+        masked out. Equation classes that override `compute_d`, such as the
+        cable models, also get a `(B, N, N)` array of conductor distances;
+        for the others the distance array is `None` and the kernels
+        compute it from the positions.
+    """
+    conductors = models[0].conductors
+    shape = (len(models), len(conductors))
+    x, y = zeros(shape), zeros(shape)
+    gmr, r = zeros(shape), zeros(shape)
+    present = zeros(shape, dtype=bool)
+
+    overrides_d = type(models[0]).compute_d is not CarsonsEquations.compute_d
+    d = zeros(shape + shape[-1:]) if overrides_d else None
+
+    for b, model in enumerate(models):
+        for i, conductor in enumerate(conductors):
+            if conductor not in model.phases:
+                y[b, i] = gmr[b, i] = 1.0
+                continue
+            present[b, i] = True
+            x[b, i], y[b, i] = model.phase_positions[conductor]
+            gmr[b, i] = model.gmr[conductor]
+            r[b, i] = model.r[conductor]
+
+        if d is None:
+            continue
+        for i, conductor_i in enumerate(conductors):
+            for j, conductor_j in enumerate(conductors):
+                if i != j and present[b, i] and present[b, j]:
+                    d[b, i, j] = model.compute_d(conductor_i, conductor_j)
+
+    return x, y, gmr, r, present, d
+
+
+class Geometry(NamedTuple):
+    """ Distances and angles between the conductors of a batch of models,
+        shared by the impedance and potential coefficient kernels. Entries
+        for conductors that are not both present are set to 1.
+    """
+    pair: ndarray  # both conductors present
+    d: ndarray  # distance between the conductors
+    D: Optional[ndarray]  # distance to the image of the other conductor
+    θ: Optional[ndarray]  # angle between D and the vertical
+
+
+def numpy_geometry(x, y, present, d=None, image=True) -> Geometry:
+    """ The conductor geometry of arrays of shape `(..., N)` as from
+        `stack_models`, where `d` overrides the conductor distances. The
+        image distances and angles are left out unless `image` is set.
+    """
+    pair = present[..., :, None] & present[..., None, :]
+    xᵢ, xⱼ = x[..., :, None], x[..., None, :]
+    hᵢ, hⱼ = y[..., :, None], y[..., None, :]
+    if d is None:
+        d = np_sqrt((xᵢ - xⱼ)**2 + (hᵢ - hⱼ)**2)
+    if not image:
+        return Geometry(pair, where(pair, d, 1.0), None, None)
+    return Geometry(
+        pair,
+        where(pair, d, 1.0),
+        where(pair, np_sqrt((xᵢ - xⱼ)**2 + (hᵢ + hⱼ)**2), 1.0),
+        arctan(absolute(xⱼ - xᵢ) / where(pair, hᵢ + hⱼ, 1.0)),
+    )
+
+
+def numpy_z_primitive(x, y, gmr, r, present, ω, ρ, d=None,
+                      number_of_P_terms=1, number_of_Q_terms=2,
+                      modified=False,
+                      geometry: Optional[Geometry] = None) -> ndarray:
+    """ Vectorized Carson's equations. Conductor arrays have shape
+        `(..., N)` and `ω`, `ρ` have shape `(...)`; the leading dimensions
+        broadcast against each other. A `geometry` from `numpy_geometry`
+        may be passed to reuse it in place of `x`, `y` and `d`.
+    """
+    N = x.shape[-1]
+    diagonal = eye(N, dtype=bool)
+    ω, ρ = array(ω)[..., None, None], array(ρ)[..., None, None]
+
+    # the first P term is constant, so the Modified equations need no
+    # image distances
+    constant_P = modified and number_of_P_terms == 1
+    if geometry is None:
+        geometry = numpy_geometry(x, y, present, d, image=not constant_P)
+    # the self terms use the GMR in place of a conductor distance
+    d = where(diagonal, gmr[..., :, None], geometry.d)
+    R = where(diagonal, r[..., :, None], 0.0)
+
+    z = _numpy_z(d, geometry.D, geometry.θ, R, ω, ρ,
+                 number_of_P_terms, number_of_Q_terms, modified)
+    return where(geometry.pair, z, 0)
+
+
+def numpy_z_pairs(x, y, gmr, r, i, j, ω, ρ, d=None,
+                  number_of_P_terms=1, number_of_Q_terms=2,
+                  modified=False) -> ndarray:
+    """ Vectorized Carson's equations for the conductor pairs `(i, j)`
+        only, where `i` and `j` are index arrays of shape `(K,)`. Conductor
+        arrays have shape `(..., N)` as for `numpy_z_primitive`, and the
+        `(..., K)` primitive impedances of the pairs are returned without
+        building the `(..., N, N)` matrices. The conductors of every pair
+        must be present.
+    """
+    same = i == j
+    ω, ρ = array(ω)[..., None], array(ρ)[..., None]
+    xᵢ, xⱼ, hᵢ, hⱼ = x[..., i], x[..., j], y[..., i], y[..., j]
+    if d is None:
+        distance = np_sqrt((xᵢ - xⱼ)**2 + (hᵢ - hⱼ)**2)
+    else:
+        distance = d[..., i, j]
+    d = where(same, gmr[..., i], distance)
+    R = where(same, r[..., i], 0.0)
+
+    if modified and number_of_P_terms == 1:
+        D = θ = None
+    else:
+        D = np_sqrt((xᵢ - xⱼ)**2 + (hᵢ + hⱼ)**2)
+        θ = arctan(absolute(xⱼ - xᵢ) / (hᵢ + hⱼ))
+    return _numpy_z(d, D, θ, R, ω, ρ,
+                    number_of_P_terms, number_of_Q_terms, modified)
+
+
+def _numpy_z(d, D, θ, R, ω, ρ, number_of_P_terms, number_of_Q_terms,
+             modified) -> ndarray:
+    """ Carson's equations from the conductor distances `d` (GMRs for the
+        self terms), image distances `D` and angles `θ`, and the conductor
+        resistances `R` (zero for the mutual terms).
+    """
+    ratio = np_sqrt(ω * μ / ρ)
+    if modified and number_of_P_terms == 1:
+        P = π / 8.0
+    else:
+        assert D is not None and θ is not None
+        k = D * ratio
+        P = sum(islice(numpy_P_terms(k, θ), number_of_P_terms))
+
+    if modified:
+        ΔX = -0.0386 * 2 + np_log(2)
+        X_o = -np_log(d) - np_log(ratio)
+        X = (X_o + ΔX) * ω * μ / (2 * π)
+    else:
+        Q = sum(islice(numpy_Q_terms(k, θ), number_of_Q_terms))
+        X = ω * μ / (2 * π) * np_log(D / d) + μ * ω / π * Q
+
+    return R + μ * ω / π * P + 1j * X
+
+
+def numpy_p_primitive(y, radius, geometry: Geometry) -> ndarray:
+    """ Vectorized primitive potential coefficient matrices, in
+        meters / Farad, from the conductor heights, radii and geometry.
+    """
+    assert geometry.D is not None
+    diagonal = eye(y.shape[-1], dtype=bool)
+    # the self terms use the distance to the conductor's own image over
+    # its radius
+    S = where(diagonal, 2 * y[..., :, None], geometry.D)
+    d = where(diagonal, radius[..., :, None], geometry.d)
+    return where(geometry.pair, np_log(S / d) / (2 * π * ε0), 0.0)
+
+
+def numpy_P_terms(k, θ) -> Iterator:
+    yield π / 8.0 + 0 * k
+    yield -k / (3 * np_sqrt(2)) * np_cos(θ)
+    yield k ** 2 / 16 * (0.6728 + np_log(2 / k)) * np_cos(2 * θ)
+    yield k ** 2 / 16 * θ * np_sin(2 * θ)
+    yield k ** 3 / (45 * np_sqrt(2)) * np_cos(3 * θ)
+    yield -π * k ** 4 * np_cos(4 * θ) / 1536
+
+
+def numpy_Q_terms(k, θ) -> Iterator:
+    yield -0.0386 + 0 * k
+    yield 0.5 * np_log(2 / k)
+    yield k / (3 * np_sqrt(2)) * np_cos(θ)
+    yield -π * k ** 2 / 64 * np_cos(2 * θ)
+    yield k ** 3 / (45 * np_sqrt(2)) * np_cos(3 * θ)
+    yield -k ** 4 / 384 * θ * np_sin(4 * θ)
+    yield -k ** 4 / 384 * np_cos(4 * θ) * (np_log(2 / k) + 1.0895)
+
+
+def _fused_z_primitive(x, y, gmr, r, present, ω, ρ, d, has_d,
+                       number_of_P_terms, number_of_Q_terms, modified, out):
+    B, N = x.shape
+    for b in range(B):
+        ratio = sqrt(ω[b] * μ / ρ[b])
+        scale = μ * ω[b] / π
+        for i in range(N):
+            for j in range(N):
+                if not (present[b, i] and present[b, j]):
+                    out[b, i, j] = 0
+                    continue
+
+                if i == j:
+                    dᵢⱼ = gmr[b, i]
+                elif has_d:
+                    dᵢⱼ = d[b, i, j]
+                else:
+                    dᵢⱼ = sqrt((x[b, i] - x[b, j])**2 +
+                               (y[b, i] - y[b, j])**2)
+
+                R = r[b, i] if i == j else 0.0
+                P = π / 8.0
+                Q = -0.0386
+                if modified and number_of_P_terms == 1:
+                    X = -log(dᵢⱼ) - log(ratio) + Q * 2 + log(2)
+                    out[b, i, j] = complex(R + scale * P, X * scale / 2)
+                    continue
+
+                Dᵢⱼ = sqrt((x[b, i] - x[b, j])**2 + (y[b, i] + y[b, j])**2)
+                θ = atan(abs(x[b, j] - x[b, i]) / (y[b, i] + y[b, j]))
+                k = Dᵢⱼ * ratio
+
+                if number_of_P_terms > 1:
+                    P += -k / (3 * sqrt(2)) * cos(θ)
+                if number_of_P_terms > 2:
+                    P += k ** 2 / 16 * (0.6728 + log(2 / k)) * cos(2 * θ)
+                if number_of_P_terms > 3:
+                    P += k ** 2 / 16 * θ * sin(2 * θ)
+                if number_of_P_terms > 4:
+                    P += k ** 3 / (45 * sqrt(2)) * cos(3 * θ)
+                if number_of_P_terms > 5:
+                    P += -π * k ** 4 * cos(4 * θ) / 1536
+
+                if modified:
+                    X = -log(dᵢⱼ) - log(ratio) + Q * 2 + log(2)
+                    out[b, i, j] = complex(R + scale * P, X * scale / 2)
+                    continue
+
+                if number_of_Q_terms > 1:
+                    Q += 0.5 * log(2 / k)
+                if number_of_Q_terms > 2:
+                    Q += k / (3 * sqrt(2)) * cos(θ)
+                if number_of_Q_terms > 3:
+                    Q += -π * k ** 2 / 64 * cos(2 * θ)
+                if number_of_Q_terms > 4:
+                    Q += k ** 3 / (45 * sqrt(2)) * cos(3 * θ)
+                if number_of_Q_terms > 5:
+                    Q += -k ** 4 / 384 * θ * sin(4 * θ)
+                if number_of_Q_terms > 6:
+                    Q += -k ** 4 / 384 * cos(4 * θ) * (log(2 / k) + 1.0895)
+
+                X = scale / 2 * log(Dᵢⱼ / dᵢⱼ) + scale * Q
+                out[b, i, j] = complex(R + scale * P, X)
+
+
+fused_z_primitive = njit(cache=True, nogil=True)(_fused_z_primitive) \
+    if njit is not None else _fused_z_primitive
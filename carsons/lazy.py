@@ -0,0 +1,90 @@
+""" A primitive impedance matrix whose entries are evaluated on demand.
+
+    Evaluating Carson's series for every conductor pair is wasted work for
+    callers that only read the self impedances, or the mutual impedance of
+    one pair, of a wide configuration. `LazyImpedanceMatrix` evaluates an
+    entry the first time it is read, through any numpy index, and
+    memoizes it together with its symmetric counterpart. Converting it to
+    an array, e.g. in `perform_kron_reduction`, evaluates the entries not
+    yet read.
+"""
+from typing import Callable, List, Tuple
+
+from numpy import asarray, indices, ndarray, zeros
+
+
+class LazyImpedanceMatrix():
+    """ The `(N, N)` primitive impedance matrix over `conductors`, where
+        `compute(conductor_i, conductor_j)` evaluates one entry.
+    """
+
+    def __init__(self, conductors: List[str],
+                 compute: Callable[[str, str], complex], dtype=complex):
+        self.conductors = list(conductors)
+        self.index = {conductor: index
+                      for index, conductor in enumerate(self.conductors)}
+        self.compute = compute
+        N = len(self.conductors)
+        self._values = zeros((N, N), dtype=dtype)
+        self._known = zeros((N, N), dtype=bool)
+        self._rows, self._columns = indices((N, N))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._values.shape
+
+    @property
+    def dtype(self):
+        return self._values.dtype
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def evaluated(self) -> int:
+        """ The number of entries evaluated so far. """
+        return int(self._known.sum())
+
+    def __len__(self) -> int:
+        return len(self.conductors)
+
+    def __getitem__(self, key):
+        self._evaluate(self._rows[key], self._columns[key])
+        return self._values[key]
+
+    def entry(self, conductor_i: str, conductor_j: str) -> complex:
+        """ The entry of two conductors, by label. """
+        return self[self.index[conductor_i], self.index[conductor_j]]
+
+    def diagonal(self) -> ndarray:
+        """ The self impedances of every conductor. """
+        N = len(self.conductors)
+        return self[range(N), range(N)]
+
+    def block(self, conductors_i: List[str],
+              conductors_j: List[str]) -> ndarray:
+        """ The entries between two lists of conductors, by label. """
+        rows = [[self.index[conductor]] for conductor in conductors_i]
+        columns = [self.index[conductor] for conductor in conductors_j]
+        return self[rows, columns]
+
+    def toarray(self) -> ndarray:
+        """ The dense matrix, evaluating every remaining entry. """
+        return self[:, :].copy()
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.toarray()
+        return values if dtype is None else values.astype(dtype)
+
+    def _evaluate(self, rows, columns):
+        rows, columns = asarray(rows).ravel(), asarray(columns).ravel()
+        missing = ~self._known[rows, columns]
+        for i, j in zip(rows[missing], columns[missing]):
+            if self._known[i, j]:
+                continue
+            # impedance matrices are symmetric, so one evaluation serves
+            # both entries
+            self._values[i, j] = self._values[j, i] = self.compute(
+                self.conductors[i], self.conductors[j])
+            self._known[i, j] = self._known[j, i] = True
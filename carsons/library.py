@@ -0,0 +1,147 @@
+""" A library of conductor and cable types with their derived constants.
+
+    Each type is described once, and the constants that the equation
+    classes derive from it -- the equivalent GMR, radius and resistance of
+    a concentric neutral, the outside radius of a multi-conductor cable
+    -- are computed once per type and kept in arrays indexed by type.
+
+    Line models then name their conductors' types instead of repeating
+    their data:
+
+        class Line:
+            library = library
+            conductor_types = {'A': 0, 'B': 0, 'C': 0, 'N': 1}
+            wire_positions = {...}
+            phases = [...]
+
+    and whole catalogs of overhead lines can be described by integer
+    arrays of types and arrays of positions (see
+    `build_z_primitives_from_types`).
+"""
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from numpy import array, asarray, nan, ndarray, where
+from numpy import pi as π
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    concentric_neutral_gmr,
+)
+from carsons.kernels import numpy_z_primitive
+
+
+class ConductorType(NamedTuple):
+    resistance: float  # ohms / meter
+    gmr: float  # meters
+    radius: float = nan  # meters, for potential coefficients
+    outside_radius: float = nan  # meters, including insulation and jacket
+
+
+class ConcentricNeutralCableType(NamedTuple):
+    resistance: float  # of the phase conductor, ohms / meter
+    gmr: float  # of the phase conductor, meters
+    neutral_strand_gmr: float  # meters
+    neutral_strand_resistance: float  # ohms / meter
+    neutral_strand_diameter: float  # meters
+    diameter_over_neutral: float  # meters
+    neutral_strand_count: int
+    radius: float = nan  # of the phase conductor, meters
+
+
+Type = Union[ConductorType, ConcentricNeutralCableType]
+
+DERIVED = ('resistance', 'gmr', 'radius', 'outside_radius', 'neutral_gmr',
+           'neutral_radius', 'neutral_resistance')
+
+
+class ConductorLibrary():
+    """ Conductor and cable types, by name and by index.
+
+        The per-type constants are available as arrays indexed by type,
+        e.g. `library.gmr[index]`; constants that do not apply to a type
+        are NaN.
+    """
+
+    def __init__(self, types: Optional[Dict[str, Type]] = None):
+        self.names: List[str] = []
+        self.types: List[Type] = []
+        self._indices: Dict[str, int] = {}
+        self._constants: Dict[str, ndarray] = {}
+        for name, conductor in (types or {}).items():
+            self.add(name, conductor)
+
+    def add(self, name: str, conductor: Type) -> int:
+        if name in self._indices:
+            raise ValueError(f"Conductor type {name!r} is already defined")
+        self._indices[name] = len(self.types)
+        self.names.append(name)
+        self.types.append(conductor)
+        self._constants = {}
+        return self._indices[name]
+
+    def index(self, name: str) -> int:
+        return self._indices[name]
+
+    def __getitem__(self, key: Union[int, str]) -> Type:
+        if isinstance(key, str):
+            key = self._indices[key]
+        return self.types[key]
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getattr__(self, name: str) -> ndarray:
+        if name not in DERIVED:
+            raise AttributeError(name)
+        if not self._constants:
+            self._constants = self._derive()
+        return self._constants[name]
+
+    def _derive(self) -> Dict[str, ndarray]:
+        rows = []
+        for conductor in self.types:
+            if isinstance(conductor, ConcentricNeutralCableType):
+                R = (conductor.diameter_over_neutral -
+                     conductor.neutral_strand_diameter) / 2
+                k = conductor.neutral_strand_count
+                rows.append((
+                    conductor.resistance, conductor.gmr, conductor.radius,
+                    nan, concentric_neutral_gmr(
+                        conductor.neutral_strand_gmr, k, R),
+                    R, conductor.neutral_strand_resistance / k,
+                ))
+            else:
+                rows.append((
+                    conductor.resistance, conductor.gmr, conductor.radius,
+                    conductor.outside_radius, nan, nan, nan,
+                ))
+        columns = array(rows, dtype=float).reshape(-1, len(DERIVED)).T
+        return dict(zip(DERIVED, columns))
+
+
+def build_z_primitives_from_types(
+        library: ConductorLibrary, types, x, y, frequency=60,
+        resistivity=100, equations=CarsonsEquations) -> ndarray:
+    """ Primitive impedance matrices of a catalog of overhead lines, with
+        `types`, `x` and `y` arrays of shape `(B, N)` holding each
+        conductor's type index (-1 where it is absent) and position. The
+        conductors are ordered phases first, as in `model.conductors`.
+        `frequency` and `resistivity` may be arrays of shape `(B,)`.
+    """
+    if equations.compute_d is not CarsonsEquations.compute_d:
+        raise ValueError("Catalogs of types are only supported for overhead "
+                         "line equations")
+    types = asarray(types)
+    present = types >= 0
+    index = where(present, types, 0)
+    gmr = where(present, library.gmr[index], 1.0)
+    r = where(present, library.resistance[index], 0.0)
+    x = where(present, asarray(x, dtype=float), 0.0)
+    y = where(present, asarray(y, dtype=float), 1.0)
+    ω = 2.0 * π * asarray(frequency, dtype=float)
+    return numpy_z_primitive(
+        x, y, gmr, r, present, ω, asarray(resistivity, dtype=float), None,
+        equations.number_of_P_terms, equations.number_of_Q_terms,
+        issubclass(equations, ModifiedCarsonsEquations),
+    )
@@ -0,0 +1,234 @@
+""" Normalization of the line models accepted by the equation classes.
+
+    A line model may be any object or mapping providing `phases`,
+    `wire_positions`, `geometric_mean_radius` and `resistance`, with
+    `phases` a list, set or dict of conductor labels, together with the
+    optional attributes of the different equation classes. The equation
+    classes read it once through `normalize_model`, which validates it and
+    returns a `NormalizedLine` holding the data of every conductor in one
+    array, in the order of the conductors.
+"""
+from functools import lru_cache
+from math import isfinite
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+)
+
+from numpy import array, ndarray
+
+REQUIRED = ('phases', 'wire_positions')
+OPTIONAL = (
+    'frequency', 'resistivity', 'bundles',
+    # concentric neutral cables
+    'neutral_strand_gmr', 'neutral_strand_resistance',
+    'neutral_strand_diameter', 'diameter_over_neutral',
+    'neutral_strand_count', 'insulation_permittivity',
+    # multi-conductor cables
+    'outside_radius',
+    # conductor types from a `ConductorLibrary`
+    'library', 'conductor_types',
+)
+
+# the per-conductor attributes that describe the concentric neutrals of a
+# cable, e.g. `NA`; the others describe every conductor present
+CONCENTRIC_NEUTRAL_ATTRIBUTES = (
+    'neutral_strand_gmr', 'neutral_strand_resistance',
+    'neutral_strand_diameter', 'diameter_over_neutral',
+    'neutral_strand_count',
+)
+
+NaN = float('nan')
+# the row of a conductor that is absent or derived from another conductor
+MISSING = (NaN,) * 5
+
+
+class NormalizedLine():
+    """ A validated line model. `conductors` lists the phase conductors of
+        every circuit followed by the sorted neutrals, and the rows of the
+        `(N, 5)` array `values` hold the x and y position, GMR, resistance
+        and conductor radius of each, in that order. The rows of conductors
+        that are absent, or derived from another conductor such as a
+        concentric neutral, are NaN, as are radii that were not given.
+
+        The per-conductor dicts of the line model protocol, e.g.
+        `wire_positions`, are built from the array on each access.
+    """
+
+    def __init__(self, phases: FrozenSet[str], conductors: List[str],
+                 circuits: List[List[str]], values: ndarray,
+                 **attributes: Any):
+        self.phases = phases
+        self.conductors = conductors
+        self.circuits = circuits
+        self.values = values
+        self.__dict__.update(attributes)
+
+    def conductor_data(self) -> Tuple[Dict[str, Tuple[float, float]],
+                                      Dict[str, float], Dict[str, float],
+                                      Dict[str, float]]:
+        """ New dicts of the positions, GMRs, resistances and radii of the
+            conductors that have them, built in one pass over `values`.
+        """
+        positions: Dict[str, Tuple[float, float]] = {}
+        gmr: Dict[str, float] = {}
+        resistance: Dict[str, float] = {}
+        radius: Dict[str, float] = {}
+        for conductor, (x, y, g, r, a) in zip(self.conductors,
+                                              self.values.tolist()):
+            if x == x:  # not NaN
+                positions[conductor] = (x, y)
+                gmr[conductor] = g
+                resistance[conductor] = r
+                if a == a:
+                    radius[conductor] = a
+        return positions, gmr, resistance, radius
+
+    @property
+    def wire_positions(self) -> Dict[str, Tuple[float, float]]:
+        return self.conductor_data()[0]
+
+    @property
+    def geometric_mean_radius(self) -> Dict[str, float]:
+        return self.conductor_data()[1]
+
+    @property
+    def resistance(self) -> Dict[str, float]:
+        return self.conductor_data()[2]
+
+    @property
+    def conductor_radius(self) -> Dict[str, float]:
+        return self.conductor_data()[3]
+
+
+def normalize_model(model, required: Sequence[str] = ()) -> NormalizedLine:
+    """ Reads and validates a line model in one pass, raising ValueError
+        for missing conductor data or values that cannot be physical.
+
+        `required` names the optional per-conductor attributes an equation
+        class needs, its `required_attributes`, which must then hold every
+        conductor they describe unless the model takes its conductors from
+        a `library`.
+    """
+    if isinstance(model, NormalizedLine):
+        _check_required(model.phases, vars(model), required)
+        return model
+
+    if isinstance(model, Mapping):
+        get: Callable[[str], Any] = model.get
+        attributes = {name: model[name] for name in OPTIONAL
+                      if model.get(name) is not None}
+    else:
+        def get(name):
+            return getattr(model, name, None)
+        attributes = {name: value for name in OPTIONAL
+                      for value in (getattr(model, name, None),)
+                      if value is not None}
+    phases, positions = get('phases'), get('wire_positions')
+    for name, value in zip(REQUIRED, (phases, positions)):
+        if value is None:
+            raise ValueError(f"The line model has no {name!r}")
+    phases = frozenset(phases)
+    _check_required(phases, attributes, required)
+
+    circuits = get('circuits')
+    if circuits is None:
+        circuit, layout = _default_layout(phases)
+        circuits = [list(circuit)]
+        conductors = list(layout)
+    else:
+        circuits = [list(circuit) for circuit in circuits]
+        conductors = [phase for circuit in circuits for phase in circuit]
+        conductors += sorted(phase for phase in phases
+                             if phase.startswith("N"))
+
+    # concentric neutrals are derived from their phase conductor
+    derived = set(attributes.get('diameter_over_neutral', ()))
+    library = attributes.get('library')
+    if library is None:
+        gmr = get('geometric_mean_radius') or {}
+        resistance = get('resistance') or {}
+        radius = get('conductor_radius') or {}
+    else:
+        types = attributes['conductor_types']
+        derived.update(f"N{conductor}" for conductor in types)
+        gmr = {c: library.gmr[i] for c, i in types.items()}
+        resistance = {c: library.resistance[i] for c, i in types.items()}
+        radius = {c: library.radius[i] for c, i in types.items()}
+
+    rows: List[Tuple[float, ...]] = []
+    for conductor in conductors:
+        if conductor not in phases or conductor in derived:
+            rows.append(MISSING)
+            continue
+        try:
+            (x, y), g, r = \
+                positions[conductor], gmr[conductor], resistance[conductor]
+        except KeyError:
+            _raise_missing(conductor, positions, gmr, resistance)
+        if not (isfinite(x) and isfinite(y) and isfinite(g) and g > 0 and
+                isfinite(r) and r >= 0):
+            _raise_invalid(conductor, x, y, g, r)
+        rows.append((x, y, g, r, radius.get(conductor, NaN)))
+
+    for name in ('frequency', 'resistivity'):
+        value = attributes.get(name, 1.0)
+        if not (isfinite(value) and value > 0):
+            raise ValueError(f"The line model has a {name} of {value}, "
+                             f"expected a positive value")
+
+    return NormalizedLine(phases, conductors, circuits,
+                          array(rows, dtype=float), **attributes)
+
+
+@lru_cache(maxsize=256)
+def _default_layout(
+        phases: FrozenSet[str]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """ The circuit and conductor order of a line model without
+        `circuits`: a secondary for phases S1 and S2, otherwise ABC.
+    """
+    neutrals = sorted(phase for phase in phases if phase.startswith("N"))
+    circuit = ("S1", "S2") if phases.difference(neutrals) == {"S1", "S2"} \
+        else ("A", "B", "C")
+    return circuit, circuit + tuple(neutrals)
+
+
+def _check_required(phases: FrozenSet[str], attributes: Mapping[str, Any],
+                    required: Sequence[str]):
+    if not required or attributes.get('library') is not None:
+        return
+    neutrals = phases.intersection(f"N{phase}" for phase in phases)
+    for name in required:
+        values = attributes.get(name)
+        if values is None:
+            raise ValueError(f"The line model has no {name!r}")
+        described = neutrals if name in CONCENTRIC_NEUTRAL_ATTRIBUTES \
+            else phases
+        for conductor in sorted(described):
+            if conductor not in values:
+                raise ValueError(f"Conductor {conductor!r} has no {name}")
+
+
+def _raise_missing(conductor: str, *values: Mapping):
+    for name, given in zip(('wire_positions', 'geometric_mean_radius',
+                            'resistance'), values):
+        if conductor not in given:
+            raise ValueError(f"Conductor {conductor!r} has no {name}")
+
+
+def _raise_invalid(conductor: str, x, y, gmr, resistance):
+    if not (isfinite(x) and isfinite(y)):
+        raise ValueError(f"Conductor {conductor!r} has a position that is "
+                         f"not finite")
+    if not (isfinite(gmr) and gmr > 0):
+        raise ValueError(f"Conductor {conductor!r} has a geometric mean "
+                         f"radius of {gmr}, expected a positive value")
+    raise ValueError(
+        f"Conductor {conductor!r} has a resistance of {resistance}, "
+        f"expected a non-negative value in ohms / meter")
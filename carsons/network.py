@@ -0,0 +1,131 @@
+""" Assembly of the three phase bus admittance matrix of a network of line
+    segments.
+
+    A network is described by arrays over its segments: the buses at each
+    end, the line code and the length. The phase impedance of each line
+    code in use is computed and inverted once, in one batch, and each
+    segment's series admittance is that of its line code divided by its
+    length. The admittances of every segment are then scattered into the
+    Ybus in one vectorized pass as COO triplets,
+
+        Ybus[f, f] += Y,  Ybus[t, t] += Y,  Ybus[f, t] -= Y,  Ybus[t, f] -= Y
+
+    for each segment from bus f to bus t, where the rows and columns of
+    bus b are `b * dim` to `b * dim + dim - 1`.
+
+    The sparse matrix is built with scipy (`pip install carsons[sparse]`);
+    without it, the triplets can still be assembled into a dense matrix.
+"""
+from typing import NamedTuple, Optional, Sequence, Union
+
+from numpy import (absolute, add, arange, asarray, broadcast_to, concatenate,
+                   diagonal, eye, ndarray, stack, unique, where, zeros)
+from numpy.linalg import inv
+
+from carsons.carsons import calculate_impedance
+
+try:
+    from scipy.sparse import coo_matrix
+except ImportError:  # pragma: no cover - depends on the environment
+    coo_matrix = None
+
+
+class YbusTriplets(NamedTuple):
+    """ The entries of a Ybus in COO form; entries with the same row and
+        column are summed.
+    """
+    row: ndarray
+    col: ndarray
+    data: ndarray
+    shape: tuple
+
+    def to_dense(self) -> ndarray:
+        Y = zeros(self.shape, dtype=self.data.dtype)
+        add.at(Y, (self.row, self.col), self.data)
+        return Y
+
+
+def invert_line_codes(z_codes: ndarray) -> ndarray:
+    """ The inverses of a `(K, dim, dim)` stack of phase impedances, over
+        the phases present in each line code. Absent phases, the zero rows
+        and columns of the impedance matrix, are zero in the result.
+    """
+    present = absolute(diagonal(z_codes, axis1=-2, axis2=-1)) > 0
+    pair = present[..., :, None] & present[..., None, :]
+    # absent phases are given a unit diagonal so that the inverse exists
+    dimension = z_codes.shape[-1]
+    masked = where(pair, z_codes, eye(dimension) * ~present[..., None])
+    return where(pair, inv(masked), 0)
+
+
+def assemble_ybus_triplets(
+        from_bus, to_bus, code, length,
+        line_codes: Union[ndarray, Sequence],
+        num_buses: Optional[int] = None,
+        shunt: Optional[ndarray] = None) -> YbusTriplets:
+    """ The COO entries of the three phase Ybus of a network of segments.
+
+        from_bus, to_bus -- for each segment, the indices of its end buses
+        code, length     -- for each segment, the line code index and the
+                            length in meters
+        line_codes       -- equation objects, e.g. `CarsonsEquations(line)`,
+                            or a `(K, dim, dim)` stack of impedances per
+                            meter, indexed by `code`
+        num_buses        -- the number of buses, by default one more than
+                            the largest bus index
+        shunt            -- an optional `(K, dim, dim)` stack of shunt
+                            admittances per meter, as from
+                            `calculate_admittance`; half of each segment's
+                            shunt admittance is placed at either end
+
+        Only the line codes in use are evaluated and inverted.
+    """
+    from_bus, to_bus = asarray(from_bus), asarray(to_bus)
+    length = asarray(length, dtype=float)
+    used, code = unique(asarray(code), return_inverse=True)
+    if isinstance(line_codes, ndarray):
+        z_codes = line_codes[used]
+    else:
+        z_codes = stack([calculate_impedance(line_codes[index])
+                         for index in used])
+    dimension = z_codes.shape[-1]
+    if num_buses is None:
+        num_buses = int(max(from_bus.max(), to_bus.max())) + 1
+
+    # (segments, dim, dim) series admittances
+    y_series = invert_line_codes(z_codes)[code] / length[:, None, None]
+    y_from = y_to = y_series
+    if shunt is not None:
+        y_shunt = asarray(shunt)[used][code] * length[:, None, None] / 2
+        y_from = y_to = y_series + y_shunt
+
+    phase = arange(dimension)
+    rows, cols, data = [], [], []
+    for f, t, block in ((from_bus, from_bus, y_from),
+                        (to_bus, to_bus, y_to),
+                        (from_bus, to_bus, -y_series),
+                        (to_bus, from_bus, -y_series)):
+        row = f[:, None, None] * dimension + phase[None, :, None]
+        col = t[:, None, None] * dimension + phase[None, None, :]
+        nonzero = block != 0
+        rows.append(broadcast_to(row, block.shape)[nonzero])
+        cols.append(broadcast_to(col, block.shape)[nonzero])
+        data.append(block[nonzero])
+
+    size = num_buses * dimension
+    return YbusTriplets(concatenate(rows), concatenate(cols),
+                        concatenate(data), (size, size))
+
+
+def assemble_ybus(*args, **kwargs):
+    """ The three phase Ybus of a network of segments as a
+        `scipy.sparse.csr_matrix`, with the arguments of
+        `assemble_ybus_triplets`.
+    """
+    if coo_matrix is None:
+        raise ImportError("Sparse Ybus assembly needs scipy; install it "
+                          "with `pip install carsons[sparse]`, or use "
+                          "`assemble_ybus_triplets(...).to_dense()`")
+    triplets = assemble_ybus_triplets(*args, **kwargs)
+    return coo_matrix((triplets.data, (triplets.row, triplets.col)),
+                      shape=triplets.shape).tocsr()
@@ -0,0 +1,191 @@
+""" Search for overhead conductor arrangements that trade off sequence
+    impedance objectives, such as low coupling between sequences or a
+    target Z0/Z1 ratio.
+
+    The search is a small multi-objective evolutionary algorithm: each
+    generation mutates the current layouts, evaluates parents and children
+    together as one batch through the vectorized kernel, and keeps the
+    best layouts by Pareto rank and crowding distance (as in NSGA-II).
+    Layouts that violate the minimum clearance between conductors always
+    rank behind layouts that do not.
+"""
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from numpy import (abs as absolute, arange, argsort, asarray, concatenate,
+                   eye, flatnonzero, inf, isin, lexsort, maximum, ndarray,
+                   sqrt, triu_indices, unique, zeros)
+from numpy.random import default_rng
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    calculate_sequence_impedance_matrix,
+    perform_kron_reduction,
+)
+from carsons.kernels import numpy_z_primitive, stack_models
+
+Objective = Callable[[ndarray], ndarray]
+
+
+def sequence_coupling(Z012: ndarray) -> ndarray:
+    """ The largest mutual coupling between sequence networks, i.e. the
+        largest off-diagonal magnitude of each sequence impedance matrix.
+    """
+    return (absolute(Z012) * (1 - eye(3))).max(axis=(-2, -1))
+
+
+def z0_z1_ratio(target: float) -> Objective:
+    """ An objective measuring how far |Z0/Z1| is from `target`. """
+    def ratio_error(Z012: ndarray) -> ndarray:
+        return absolute(absolute(Z012[..., 0, 0] / Z012[..., 1, 1]) - target)
+    return ratio_error
+
+
+class Layout(NamedTuple):
+    wire_positions: Dict[str, Tuple[float, float]]
+    objectives: ndarray
+    z_abc: ndarray
+
+
+def optimize_layout(
+        model,
+        bounds: Tuple[Tuple[float, float], Tuple[float, float]],
+        clearance: float,
+        objectives: Iterable[Objective] = (sequence_coupling,),
+        fixed: Iterable[str] = (),
+        population_size: int = 100,
+        generations: int = 50,
+        seed=None) -> List[Layout]:
+    """ Searches for positions of the conductors of `model`, an overhead
+        line equation object, that minimize `objectives`, and returns the
+        Pareto-best layouts found, ordered by their first objective.
+
+        bounds     -- ((x_min, x_max), (y_min, y_max)) in meters for every
+                      conductor that is moved
+        clearance  -- minimum distance in meters between any two conductors
+        objectives -- callables mapping a stack of sequence impedance
+                      matrices, as from `calculate_sequence_impedance_matrix`,
+                      to the values to minimize
+        fixed      -- conductors kept at the model's positions, e.g. a
+                      neutral on the pole
+    """
+    if type(model).compute_d is not CarsonsEquations.compute_d:
+        raise ValueError("Conductor placement applies to overhead line "
+                         "models, whose spacing follows their positions")
+    if model.dimension != 3:
+        raise ValueError("Sequence objectives need a three phase model")
+
+    rng = default_rng(seed)
+    objectives = list(objectives)
+    x, y, gmr, r, present, _ = stack_models([model])
+    movable = present[0] & ~isin(model.conductors, list(fixed))
+    (x_min, x_max), (y_min, y_max) = bounds
+    low, high = asarray([x_min, y_min]), asarray([x_max, y_max])
+    spread = (high - low) / 10
+
+    base = asarray([x[0], y[0]]).T
+    population = base + zeros((population_size, 1, 1))
+    population[:, movable] = rng.uniform(
+        low, high, size=(population_size, movable.sum(), 2))
+
+    def evaluate(positions: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+        z_primitive = numpy_z_primitive(
+            positions[..., 0], positions[..., 1], gmr, r, present,
+            model.ω, model.ρ, None,
+            model.number_of_P_terms, model.number_of_Q_terms,
+            isinstance(model, ModifiedCarsonsEquations),
+        )
+        z_abc = perform_kron_reduction(z_primitive, dimension=3)
+        Z012 = calculate_sequence_impedance_matrix(z_abc)
+        values = asarray([objective(Z012) for objective in objectives]).T
+        return values, _clearance_violation(positions, present[0],
+                                            clearance), z_abc
+
+    values, violation, z_abc = evaluate(population)
+    for generation in range(generations):
+        σ = spread * (1 - generation / generations) + 1e-3
+        children = population.copy()
+        moved = children[:, movable]
+        moved += rng.normal(0, 1, moved.shape) * σ
+        children[:, movable] = moved.clip(low, high)
+
+        child_values, child_violation, child_z_abc = evaluate(children)
+        population = concatenate([population, children])
+        values = concatenate([values, child_values])
+        violation = concatenate([violation, child_violation])
+        z_abc = concatenate([z_abc, child_z_abc])
+
+        survivors = _select(values, violation, population_size)
+        population, values = population[survivors], values[survivors]
+        violation, z_abc = violation[survivors], z_abc[survivors]
+
+    ranks = _pareto_ranks(values, violation)
+    best = [index for index in argsort(values[:, 0])
+            if ranks[index] == 0 and violation[index] == 0]
+    return [
+        Layout(
+            wire_positions={
+                conductor: (float(population[index, i, 0]),
+                            float(population[index, i, 1]))
+                for i, conductor in enumerate(model.conductors)
+                if present[0, i]
+            },
+            objectives=values[index],
+            z_abc=z_abc[index],
+        )
+        for index in best
+    ]
+
+
+def _clearance_violation(positions: ndarray, present: ndarray,
+                         clearance: float) -> ndarray:
+    i, j = triu_indices(positions.shape[-2], k=1)
+    pair = present[i] & present[j]
+    Δ = positions[:, i[pair]] - positions[:, j[pair]]
+    distance = sqrt((Δ ** 2).sum(axis=-1))
+    return maximum(clearance - distance, 0).sum(axis=-1)
+
+
+def _pareto_ranks(values: ndarray, violation: ndarray) -> ndarray:
+    """ Non-dominated sorting under constrained domination: a feasible
+        layout dominates every infeasible one, and of two infeasible
+        layouts the one with less clearance violation dominates.
+    """
+    feasible = violation == 0
+    better_or_equal = (values[:, None] <= values[None, :]).all(axis=-1)
+    better = (values[:, None] < values[None, :]).any(axis=-1)
+    dominates = (better_or_equal & better &
+                 feasible[:, None] & feasible[None, :])
+    dominates |= feasible[:, None] & ~feasible[None, :]
+    dominates |= (~feasible[:, None] & ~feasible[None, :] &
+                  (violation[:, None] < violation[None, :]))
+
+    ranks = zeros(len(values), dtype=int)
+    remaining = arange(len(values))
+    rank = 0
+    while remaining.size:
+        dominated = dominates[remaining][:, remaining].any(axis=0)
+        ranks[remaining[~dominated]] = rank
+        remaining = remaining[dominated]
+        rank += 1
+    return ranks
+
+
+def _crowding_distance(values: ndarray, ranks: ndarray) -> ndarray:
+    distance = zeros(len(values))
+    for rank in unique(ranks):
+        front = flatnonzero(ranks == rank)
+        for objective in values[front].T:
+            order = argsort(objective)
+            ordered = objective[order]
+            span = ordered[-1] - ordered[0] or 1.0
+            gaps = (ordered[2:] - ordered[:-2]) / span
+            distance[front[order[1:-1]]] += gaps
+            distance[front[order[[0, -1]]]] = inf
+    return distance
+
+
+def _select(values: ndarray, violation: ndarray, count: int) -> ndarray:
+    ranks = _pareto_ranks(values, violation)
+    crowding = _crowding_distance(values, ranks)
+    return lexsort((-crowding, violation, ranks))[:count]
@@ -0,0 +1,67 @@
+""" Packed storage of complex-symmetric impedance matrices.
+
+    Primitive and phase impedance matrices are symmetric, so only the
+    upper triangle, including the diagonal, needs to be kept. A stack of
+    `(..., N, N)` matrices packs into a `(..., N(N+1)/2)` array holding
+    the triangle row by row, i.e. in the order of `triu_indices(N)`.
+"""
+from functools import lru_cache
+from math import sqrt
+from typing import Optional
+
+from numpy import ascontiguousarray, ndarray, take, triu_indices, zeros
+
+
+def pack_symmetric(matrices: ndarray) -> ndarray:
+    """ The upper triangles of a `(..., N, N)` stack of symmetric
+        matrices, as a contiguous `(..., N(N+1)/2)` array.
+    """
+    i, j = triu_indices(matrices.shape[-1])
+    return ascontiguousarray(matrices[..., i, j])
+
+
+def is_packed(values: ndarray, N: Optional[int] = None) -> bool:
+    """ Whether `values` are packed triangles rather than `(N, N)` dense
+        matrices; without `N`, whether `values` is one packed triangle.
+    """
+    if N is None:
+        return values.ndim == 1
+    return values.shape[-2:] != (N, N)
+
+
+def unpack_symmetric(packed: ndarray,
+                     out: Optional[ndarray] = None) -> ndarray:
+    """ The dense `(..., N, N)` matrices of a `(..., N(N+1)/2)` packed
+        stack, gathered in one pass from a cached index map. The result is
+        written into `out` when given, so that a caller unpacking many
+        chunks can reuse one buffer.
+    """
+    N = packed_dimension(packed.shape[-1])
+    index = _unpack_index(N)
+    if out is None:
+        out = zeros(packed.shape[:-1] + (N, N), dtype=packed.dtype)
+    take(packed, index, axis=-1, out=out)
+    return out
+
+
+def packed_dimension(size: int) -> int:
+    """ N for a packed triangle of `size` entries. """
+    N = (int(sqrt(8 * size + 1)) - 1) // 2
+    # the float square root may be one off for very large sizes
+    while N * (N + 1) // 2 > size:
+        N -= 1
+    while (N + 1) * (N + 2) // 2 <= size:
+        N += 1
+    if N * (N + 1) // 2 != size:
+        raise ValueError(f"{size} entries are not the triangle of a square "
+                         f"matrix")
+    return N
+
+
+@lru_cache(maxsize=64)
+def _unpack_index(N: int) -> ndarray:
+    index = zeros((N, N), dtype=int)
+    i, j = triu_indices(N)
+    index[i, j] = index[j, i] = range(len(i))
+    index.flags.writeable = False
+    return index
@@ -0,0 +1,114 @@
+""" Thread-pool evaluation of impedance batches.
+
+    The heavy steps of a batch -- the primitive matrix kernels and the
+    stacked inversions in `perform_kron_reduction` -- run in numpy, Numba
+    (`nogil`) or LAPACK code that releases the GIL, so shards of a batch
+    evaluated on a thread pool run concurrently without forking processes.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator, List, Optional, Sequence
+
+from numpy import concatenate, ndarray
+
+from carsons.carsons import perform_kron_reduction
+from carsons.kernels import build_z_primitives
+from carsons.packed import pack_symmetric
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # pragma: no cover - depends on the environment
+    threadpool_limits = None
+
+
+def calculate_impedances_threaded(
+        models: Sequence,
+        max_workers: Optional[int] = None,
+        shard_size: Optional[int] = None,
+        blas_threads: Optional[int] = None,
+        backend: Optional[str] = None,
+        packed: bool = False) -> ndarray:
+    """ Computes `calculate_impedance(model)` for every model in `models`,
+        returning a `(len(models), dim, dim)` stack.
+
+        The batch is split into shards of `shard_size` models (by default
+        one shard per worker), and each shard's primitive matrices and kron
+        reduction are evaluated on one of `max_workers` threads. As with
+        `build_z_primitives`, all models must share an equation class and
+        conductors.
+
+        `blas_threads` caps the threads each BLAS/LAPACK call may use, so
+        that pool threads times BLAS threads does not oversubscribe the
+        cores. It defaults to the cores left per worker and needs the
+        optional `threadpoolctl` package; without it the BLAS defaults
+        apply.
+
+        With `packed`, each shard's matrices are packed as it completes and
+        a `(len(models), dim(dim+1)/2)` array of upper triangles is
+        returned (see `carsons.packed`).
+    """
+    models = list(models)
+    cores = os.cpu_count() or 1
+    max_workers = max_workers or cores
+    shard_size = shard_size or max(1, -(-len(models) // max_workers))
+    shards = [models[start:start + shard_size]
+              for start in range(0, len(models), shard_size)]
+
+    def calculate_shard(shard: List) -> ndarray:
+        z_primitives = build_z_primitives(shard, backend=backend)
+        z_abc = perform_kron_reduction(z_primitives,
+                                       dimension=shard[0].dimension)
+        return pack_symmetric(z_abc) if packed else z_abc
+
+    with limit_blas_threads(blas_threads or max(1, cores // max_workers)):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return concatenate(list(pool.map(calculate_shard, shards)))
+
+
+_blas_lock = Lock()
+_blas_counts: List[int] = []  # the limits of the open contexts
+_blas_limits = None
+_blas_limit: Optional[int] = None  # the limit applied
+
+
+@contextmanager
+def limit_blas_threads(count: Optional[int]) -> Iterator[None]:
+    """ Limits BLAS/LAPACK to `count` threads while the context is open.
+
+        The limit is process-wide, so concurrent callers share it: BLAS is
+        limited to the smallest count of the open contexts, and the last
+        caller out restores the original BLAS settings.
+    """
+    if threadpool_limits is None or count is None:
+        yield
+        return
+
+    with _blas_lock:
+        _blas_counts.append(count)
+        _apply_blas_limit()
+    try:
+        yield
+    finally:
+        with _blas_lock:
+            _blas_counts.remove(count)
+            _apply_blas_limit()
+
+
+def _apply_blas_limit():
+    global _blas_limits, _blas_limit
+    if not _blas_counts:
+        if _blas_limits is not None:
+            _blas_limits.restore_original_limits()
+            _blas_limits = _blas_limit = None
+        return
+    limit = min(_blas_counts)
+    if limit == _blas_limit:
+        return
+    _blas_limit = limit
+    if _blas_limits is None:
+        # the first limit applied keeps the original settings to restore
+        _blas_limits = threadpool_limits(limits=limit, user_api='blas')
+    else:
+        threadpool_limits(limits=limit, user_api='blas')
@@ -0,0 +1,336 @@
+""" A local impedance service for tools that compute one line at a time.
+
+    Requests arriving within a short window of each other are coalesced
+    into one batch and evaluated with the vectorized kernels, and repeated
+    configurations are answered from an in-memory cache. The service
+    speaks a minimal subset of HTTP/1.1 over a localhost TCP port or a unix
+    socket:
+
+        POST /impedance   {"equations": "CarsonsEquations",
+                           "model": {"phases": [...], "wire_positions": ...,
+                                     "geometric_mean_radius": ...,
+                                     "resistance": ..., "frequency": 60}}
+                       -> {"real": [[...]], "imag": [[...]]}
+        GET  /metrics  -> request, cache and batch statistics
+
+    Start it with `python -m carsons.service --port 8765` or
+    `python -m carsons.service --unix /tmp/carsons.sock`.
+"""
+import argparse
+import asyncio
+import json
+from collections import defaultdict, deque
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from numpy import ndarray, percentile
+
+from carsons.cache import (
+    ImpedanceCache,
+    canonical_form,
+    from_canonical,
+    model_key,
+    to_canonical,
+)
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    MultiConductorCarsonsEquations,
+)
+from carsons.dispatch import calculate_impedances
+
+EQUATIONS = {
+    equations.__name__: equations for equations in (
+        CarsonsEquations,
+        ModifiedCarsonsEquations,
+        ConcentricNeutralCarsonsEquations,
+        MultiConductorCarsonsEquations,
+    )
+}
+
+
+def equations_from_request(request: dict):
+    """ Builds an equation object from a decoded request body. """
+    try:
+        equations = EQUATIONS[request.get("equations", "CarsonsEquations")]
+    except KeyError:
+        raise ValueError(f"Unknown equations {request['equations']!r}")
+    model = dict(request["model"])
+    model["wire_positions"] = {
+        phase: tuple(position)
+        for phase, position in model["wire_positions"].items()
+    }
+    return equations(SimpleNamespace(**model))
+
+
+class ServiceMetrics():
+    def __init__(self, samples: int = 10000):
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes: Dict[int, int] = defaultdict(int)
+        self.latencies: Deque[float] = deque(maxlen=samples)
+
+    def report(self, cache: ImpedanceCache) -> dict:
+        latencies = list(self.latencies) or [0.0]
+        p50, p95, p99 = percentile(latencies, [50, 95, 99])
+        return {
+            "requests": self.requests,
+            "cache": {"hits": cache.hits, "misses": cache.misses,
+                      "entries": len(cache)},
+            "batches": self.batches,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "latency_seconds": {"p50": p50, "p95": p95, "p99": p99,
+                                "max": max(latencies)},
+        }
+
+
+class ImpedanceBatcher():
+    """ Coalesces concurrent `calculate` calls into batches.
+
+        A batch is evaluated once `window` seconds have passed since its
+        first request, or as soon as it holds `max_batch_size` requests.
+        Requests in a batch are grouped by equation class and conductors,
+        and each group is evaluated in a worker thread by
+        `carsons.dispatch.calculate_impedances`, with the strategy it
+        selects for the group.
+
+        With `symmetries`, requests that are phase relabellings or mirror
+        images of each other share one cache entry and one evaluation (see
+        `canonical_form`).
+    """
+
+    def __init__(self, window: float = 0.002, max_batch_size: int = 1024,
+                 cache: Optional[ImpedanceCache] = None,
+                 symmetries: bool = False):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.cache = cache if cache is not None else ImpedanceCache()
+        self.symmetries = symmetries
+        self.metrics = ServiceMetrics()
+        # requests waiting for the next batch, and the futures of every
+        # request not yet answered, so repeats join the earlier request
+        self._pending: Dict = {}
+        self._futures: Dict = {}
+        self._tasks: Set[asyncio.Future] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def calculate(self, model) -> ndarray:
+        start = perf_counter()
+        self.metrics.requests += 1
+        if self.symmetries:
+            key, order = canonical_form(model)
+        else:
+            key, order = model_key(model), None
+        z_abc = self.cache.get(key)
+        if z_abc is None:
+            z_abc = await asyncio.shield(self._join(key, model, order))
+        self.metrics.latencies.append(perf_counter() - start)
+        return from_canonical(z_abc, order)
+
+    def _join(self, key, model, order) -> "asyncio.Future[ndarray]":
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.get_event_loop().create_future()
+            self._futures[key] = future
+            self._pending[key] = (model, order)
+            self._schedule()
+        return future
+
+    def _schedule(self):
+        loop = asyncio.get_event_loop()
+        if len(self._pending) >= self.max_batch_size:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+    def _flush(self):
+        self._timer = None
+        batch, self._pending = self._pending, {}
+        self.metrics.batches += 1
+        self.metrics.batch_sizes[len(batch)] += 1
+
+        groups: Dict[Tuple, List] = defaultdict(list)
+        for key, (model, order) in batch.items():
+            groups[type(model), tuple(model.conductors)].append(
+                (key, model, order))
+        for group in groups.values():
+            task = asyncio.ensure_future(self._evaluate(group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate(self, group: List):
+        models = [model for _, model, _ in group]
+        try:
+            z_abc = await asyncio.get_event_loop().run_in_executor(
+                None, calculate_batch, models)
+        except Exception as error:
+            for key, _, _ in group:
+                self._futures.pop(key).set_exception(error)
+            return
+        for (key, _, order), z in zip(group, z_abc):
+            # cached in the canonical order, as a copy that does not keep
+            # the whole batch alive, shared read-only with the waiters
+            z = to_canonical(z, order).copy()
+            z.flags.writeable = False
+            self.cache.put(key, z)
+            self._futures.pop(key).set_result(z)
+
+
+def calculate_batch(models: List) -> ndarray:
+    return calculate_impedances(models)
+
+
+class ImpedanceService():
+    def __init__(self, batcher: Optional[ImpedanceBatcher] = None):
+        self.batcher = batcher or ImpedanceBatcher()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle, unix_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode().split(" ", 2)
+                    headers = {}
+                    while True:
+                        line = (await reader.readline()).decode().strip()
+                        if not line:
+                            break
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(f"Negative content length {length}")
+                except ValueError as error:
+                    # the rest of the stream cannot be framed, so the
+                    # connection is closed after the response
+                    await self.reply(writer, "400 Bad Request",
+                                     {"error": repr(error)})
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, response = await self.respond(method, path, body)
+                await self.reply(writer, status, response)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def reply(self, writer: asyncio.StreamWriter, status: str,
+                    response: dict):
+        payload = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode()
+            + payload)
+        await writer.drain()
+
+    async def respond(self, method: str, path: str,
+                      body: bytes) -> Tuple[str, dict]:
+        if method == "GET" and path == "/metrics":
+            return "200 OK", self.batcher.metrics.report(self.batcher.cache)
+        if method != "POST" or path != "/impedance":
+            return "404 Not Found", {"error": f"No route for {method} {path}"}
+        try:
+            model = equations_from_request(json.loads(body))
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return "400 Bad Request", {"error": repr(error)}
+        try:
+            z_abc = await self.batcher.calculate(model)
+        except Exception as error:
+            return "500 Internal Server Error", {"error": repr(error)}
+        return "200 OK", {"real": z_abc.real.tolist(),
+                          "imag": z_abc.imag.tolist()}
+
+
+def run(coroutine):
+    """ Runs `coroutine` to completion on a new event loop and cancels the
+        tasks it leaves behind, as `asyncio.run` does from Python 3.7.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        all_tasks = getattr(asyncio, "all_tasks", None) or \
+            getattr(asyncio.Task, "all_tasks")
+        pending = [task for task in all_tasks(loop) if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+
+async def http_request(reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter, method: str, path: str,
+                       payload: Optional[dict] = None) -> Tuple[int, dict]:
+    """ Sends one request over an open keep-alive connection to the
+        service and returns the response status and decoded body.
+    """
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\n"
+                 f"Host: localhost\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).decode().split(" ")[1])
+    length = 0
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line:
+            break
+        name, value = line.split(":", 1)
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="serve on this unix socket path")
+    parser.add_argument("--window", type=float, default=0.002,
+                        help="batching window in seconds")
+    parser.add_argument("--max-batch-size", type=int, default=1024)
+    parser.add_argument("--symmetries", action="store_true",
+                        help="reuse results across phase relabellings and "
+                             "mirror images")
+    arguments = parser.parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    service = ImpedanceService(ImpedanceBatcher(
+        window=arguments.window,
+        max_batch_size=arguments.max_batch_size,
+        symmetries=arguments.symmetries))
+    server = loop.run_until_complete(
+        service.start(arguments.host, arguments.port, arguments.unix))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import json
+import os
+from hashlib import sha256
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from numpy import dtype as as_dtype
+from numpy import memmap, ndarray
+from numpy.lib.format import open_memmap
+
+from carsons.cache import content_hash
+from carsons.carsons import CarsonsEquations
+from carsons.dispatch import calculate_impedances
+from carsons.packed import (
+    is_packed,
+    pack_symmetric,
+    packed_dimension,
+    unpack_symmetric,
+)
+
+DATA_FILE = "impedance.npy"
+INDEX_FILE = "index.json"
+
+
+class ImpedanceStore():
+    """ A stack of impedance matrices kept in a memory-mapped `.npy` file.
+
+        The store is a directory holding the array file and a small json
+        index describing its shape, which chunks of segments have been
+        written and a digest of the models each was computed for. Indexing the
+        store slices the memory map directly, so a reader only pages in the
+        segments it touches.
+
+        A `packed` store keeps only the upper triangle of each symmetric
+        matrix (see `carsons.packed`), halving its size on disk. Indexing
+        still returns dense matrices; `data` holds the packed rows.
+    """
+
+    def __init__(self, path: str, mode: str = 'r'):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), 'r') as f:
+            index = json.load(f)
+        self.chunk_size: int = index["chunk_size"]
+        self.completed = set(index["completed"])
+        self.packed: bool = index.get("packed", False)
+        self.digests: Dict[int, str] = {
+            int(chunk): digest
+            for chunk, digest in index.get("digests", {}).items()}
+        self.data: memmap = open_memmap(
+            os.path.join(path, DATA_FILE), mode=mode)
+
+    @classmethod
+    def create(cls, path: str, count: int, shape: Tuple[int, ...],
+               chunk_size: int = 4096, dtype=complex,
+               packed: bool = False) -> 'ImpedanceStore':
+        os.makedirs(path, exist_ok=True)
+        if packed:
+            N = shape[-1]
+            shape = (*shape[:-2], N * (N + 1) // 2)
+        data = open_memmap(os.path.join(path, DATA_FILE), mode='w+',
+                           dtype=as_dtype(dtype), shape=(count, *shape))
+        del data
+        _write_index(path, chunk_size, [], packed)
+        return cls(path, mode='r+')
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, key) -> ndarray:
+        if self.packed:
+            return unpack_symmetric(self.data[key])
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        # a packed store takes dense matrices or rows already packed
+        if self.packed and \
+                not is_packed(value, packed_dimension(self.data.shape[-1])):
+            value = pack_symmetric(value)
+        self.data[key] = value
+
+    @property
+    def number_of_chunks(self) -> int:
+        return -(-len(self) // self.chunk_size)
+
+    def chunk_bounds(self, chunk: int) -> Tuple[int, int]:
+        start = chunk * self.chunk_size
+        return start, min(start + self.chunk_size, len(self))
+
+    def pending_chunks(self) -> Iterator[int]:
+        for chunk in range(self.number_of_chunks):
+            if chunk not in self.completed:
+                yield chunk
+
+    def is_complete(self) -> bool:
+        return len(self.completed) == self.number_of_chunks
+
+    def mark_complete(self, chunk: int, digest: Optional[str] = None):
+        """ Flush the chunk's results to disk, then record it in the index.
+            Ordering the writes this way means an interrupted run can never
+            leave a chunk marked complete that was not persisted.
+        """
+        self.data.flush()
+        self.completed.add(chunk)
+        if digest is not None:
+            self.digests[chunk] = digest
+        _write_index(self.path, self.chunk_size, sorted(self.completed),
+                     self.packed, self.digests)
+
+
+def calculate_impedances_to_store(
+        path: str,
+        models: Sequence,
+        equations: Callable = CarsonsEquations,
+        chunk_size: int = 4096,
+        packed: bool = False) -> ImpedanceStore:
+    """ Computes the phase impedance of `equations(model)` for every model
+        and writes the results into the store at `path`, one chunk at a
+        time. Each chunk is computed as one batch by
+        `carsons.dispatch.calculate_impedances`.
+
+        If `path` already holds a store for the same models, chunks
+        recorded as complete are skipped, so a crashed run can simply be
+        restarted with the same arguments. Each chunk is recorded with a
+        digest of the `content_hash`es of its equation objects, and resuming
+        over different models raises ValueError. With `packed`, a new store
+        keeps only the upper triangle of each matrix.
+    """
+    if not models:
+        raise ValueError("There are no models to store")
+    count = len(models)
+
+    def chunk_models(chunk: int) -> List:
+        start = chunk * chunk_size
+        return [equations(model)
+                for model in models[start:min(start + chunk_size, count)]]
+
+    store: Optional[ImpedanceStore] = None
+    pending: Sequence[int] = range(-(-count // chunk_size))
+    if os.path.exists(os.path.join(path, INDEX_FILE)):
+        store = ImpedanceStore(path, mode='r+')
+        if len(store) != count or store.chunk_size != chunk_size:
+            raise ValueError(
+                f"Existing store at {path} holds {len(store)} segments in "
+                f"chunks of {store.chunk_size}; cannot resume a run over "
+                f"{count} segments in chunks of {chunk_size}"
+            )
+        # every completed chunk is checked before any chunk is written
+        for chunk in sorted(store.completed):
+            if store.digests.get(chunk) != chunk_digest(chunk_models(chunk)):
+                raise ValueError(
+                    f"Chunk {chunk} of the existing store at {path} was "
+                    f"computed for different models; cannot resume")
+        pending = list(store.pending_chunks())
+
+    for chunk in pending:
+        batch = chunk_models(chunk)
+        z_abc = calculate_impedances(batch)
+        if store is None:
+            store = ImpedanceStore.create(path, count, z_abc.shape[1:],
+                                          chunk_size, z_abc.dtype, packed)
+        start = chunk * chunk_size
+        store[start:start + len(batch)] = z_abc
+        store.mark_complete(chunk, chunk_digest(batch))
+
+    assert store is not None  # there is at least one chunk
+    return store
+
+
+def chunk_digest(models: Sequence) -> str:
+    """ A digest of the `content_hash` of every equation object in
+        `models`, in order, identifying the inputs of a chunk of a store.
+    """
+    digest = sha256()
+    for model in models:
+        digest.update(content_hash(model).encode())
+    return digest.hexdigest()
+
+
+def _write_index(path: str, chunk_size: int, completed: List[int],
+                 packed: bool = False,
+                 digests: Optional[Dict[int, str]] = None):
+    temporary = os.path.join(path, INDEX_FILE + ".tmp")
+    with open(temporary, 'w') as f:
+        json.dump({"chunk_size": chunk_size, "completed": completed,
+                   "packed": packed,
+                   "digests": {str(chunk): digest for chunk, digest
+                               in sorted((digests or {}).items())}}, f)
+    os.replace(temporary, os.path.join(path, INDEX_FILE))
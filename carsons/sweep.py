@@ -0,0 +1,200 @@
+""" Parametric sweeps of one line over earth resistivity, frequency and
+    conductor resistance.
+
+    The conductor geometry -- the real and image distances and angles
+    between conductors -- is computed once per line, and every sweep point
+    is then evaluated in one broadcast pass of the vectorized kernel.
+
+    Harmonic sweeps may also account for the skin effect, from the
+    internal impedance of a solid round conductor,
+
+        Zᵢ = R_dc · (mr/2) · I₀(mr) / I₁(mr),    m = √(jωμ/ρ_c),
+
+    where r is the conductor radius and ρ_c its resistivity, found from the
+    DC resistance. The Bessel function ratio is evaluated from its power
+    series for |mr| < 20 and from its asymptotic expansion beyond.
+"""
+from functools import lru_cache
+from typing import Mapping, Optional, Tuple, Union
+
+from numpy import (abs as absolute, asarray, broadcast_arrays, eye,
+                   ndarray, ones_like, sqrt, stack, where)
+from numpy import pi as π
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    perform_kron_reduction,
+)
+from carsons.kernels import numpy_z_primitive, stack_models
+
+μ = CarsonsEquations.μ
+
+# temperature coefficient of resistance of aluminium, per °C
+ALUMINUM_TEMPERATURE_COEFFICIENT = 0.00403
+
+# |mr| beyond which the asymptotic expansion of I₀/I₁ is used
+ASYMPTOTIC_SKIN_DEPTH_RATIO = 20.0
+
+
+def temperature_adjusted_resistance(
+        model, temperature,
+        reference_temperature: float = 20.0,
+        α=ALUMINUM_TEMPERATURE_COEFFICIENT) -> ndarray:
+    """ The model's conductor resistances, given at `reference_temperature`,
+        adjusted linearly to each of `temperature` (°C).
+
+        Returns an array of shape `temperature.shape + (N,)` in the order
+        of `model.conductors`, suitable as the `resistance` of
+        `sweep_impedance`. `α` may also be an array of per-conductor
+        coefficients in the same order.
+    """
+    resistance = stack_models([model])[3][0]
+    ΔT = asarray(temperature, dtype=float)[..., None] - reference_temperature
+    return resistance * (1 + asarray(α) * ΔT)
+
+
+def internal_impedance(resistance, radius, frequency) -> ndarray:
+    """ The internal impedance per meter, R_ac + jX_internal, of solid
+        round conductors with DC `resistance` (Ω/m) and `radius` (m) at
+        `frequency` (Hz). The arguments broadcast against each other.
+    """
+    resistance = asarray(resistance, dtype=float)
+    radius = asarray(radius, dtype=float)
+    ω = 2.0 * π * asarray(frequency, dtype=float)
+    ρ_c = resistance * π * radius**2
+    mr = sqrt(1j * ω * μ / ρ_c) * radius
+    return resistance * _half_z_bessel_ratio(mr)
+
+
+@lru_cache(maxsize=1024)
+def conductor_internal_impedance(resistance: float, radius: float,
+                                 frequency: Tuple[float, ...]) -> ndarray:
+    """ `internal_impedance` of one conductor type at a tuple of
+        frequencies, cached so that repeated sweeps over the same harmonic
+        orders evaluate each conductor type once.
+    """
+    z_internal = internal_impedance(resistance, radius, frequency)
+    z_internal.flags.writeable = False
+    return z_internal
+
+
+def _half_z_bessel_ratio(z: ndarray) -> ndarray:
+    """ (z/2)·I₀(z)/I₁(z), which tends to 1 as z goes to 0. """
+    small = absolute(z) < ASYMPTOTIC_SKIN_DEPTH_RATIO
+    series_z = where(small, z, 0)
+    # I₀(z) = Σ qᵏ/(k!)² and I₁(z) = (z/2)·Σ qᵏ/(k!(k+1)!), with q = z²/4
+    q = series_z**2 / 4
+    I0_term, I1_term = ones_like(q), ones_like(q)
+    I0, I1 = ones_like(q), ones_like(q)
+    for k in range(1, 80):
+        I0_term = I0_term * q / (k * k)
+        I1_term = I1_term * q / (k * (k + 1))
+        I0, I1 = I0 + I0_term, I1 + I1_term
+
+    # Iᵥ(z) ~ eᶻ/√(2πz)·Σ (-1)ᵏ·aₖ(ν)/zᵏ, and the leading factor cancels
+    asymptotic_z = where(small, 1, z)
+    series = []
+    for ν in (0, 1):
+        term = total = ones_like(asymptotic_z)
+        for k in range(1, 12):
+            term = -term * (4 * ν**2 - (2*k - 1)**2) / (8 * k * asymptotic_z)
+            total = total + term
+        series.append(total)
+    return where(small, I0 / I1, z / 2 * series[0] / series[1])
+
+
+def sweep_impedance(
+        model,
+        resistivity=None,
+        frequency=None,
+        resistance: Optional[Union[ndarray, Mapping]] = None,
+        reduce: bool = True,
+        skin_effect: bool = False) -> ndarray:
+    """ Evaluates `model` at every sweep point, without building an
+        equation object per point.
+
+        `resistivity` (Ω·m) and `frequency` (Hz) are arrays of sweep points,
+        and `resistance` is an array of per-conductor resistances with
+        shape `(..., N)` in the order of `model.conductors` (see
+        `temperature_adjusted_resistance`), or a mapping from conductor to
+        an array of resistances. Any of them left out keep the model's own
+        value. The sweep points broadcast against each other, so
+        `resistivity[:, None]` and `frequency[None, :]` sweep a grid.
+
+        With `skin_effect`, the resistances are taken as DC resistances and
+        each conductor's self impedance is corrected by the change of its
+        internal impedance from DC to the sweep frequency. This needs the
+        `conductor_radius` of every conductor present, and raises
+        ValueError for a conductor without one or for bundled conductors,
+        whose equivalent radius is not that of their subconductors.
+
+        Returns the phase impedance matrices stacked with shape
+        `sweep_shape + (dim, dim)`, or the primitive impedance matrices
+        with `reduce=False`.
+    """
+    x, y, gmr, r, present, d = stack_models([model])
+    x, y, gmr, r, present = x[0], y[0], gmr[0], r[0], present[0]
+    d = d if d is None else d[0]
+
+    ρ = asarray(model.ρ if resistivity is None else resistivity, dtype=float)
+    ω = 2.0 * π * asarray(model.ƒ if frequency is None else frequency,
+                          dtype=float)
+    if isinstance(resistance, Mapping):
+        resistance = _resistance_array(model, resistance)
+    if resistance is not None:
+        r = asarray(resistance, dtype=float)
+
+    z_primitive = numpy_z_primitive(
+        x, y, gmr, r, present, ω, ρ, d,
+        model.number_of_P_terms, model.number_of_Q_terms,
+        isinstance(model, ModifiedCarsonsEquations),
+    )
+    if skin_effect:
+        ΔZ = _skin_effect_correction(model, present, r, ω,
+                                     sweep_resistance=resistance is not None)
+        z_primitive = z_primitive + ΔZ[..., :, None] * eye(len(present))
+    z_primitive = z_primitive.astype(model.dtype, copy=False)
+
+    if not reduce:
+        return z_primitive
+    return perform_kron_reduction(z_primitive, dimension=model.dimension)
+
+
+def _skin_effect_correction(model, present: ndarray, r: ndarray,
+                            ω: ndarray, sweep_resistance: bool) -> ndarray:
+    """ Zᵢ(ω) - Zᵢ(0) for every conductor, with shape `(..., N)`. The
+        internal reactance at low frequency, ωμ/8π, is already part of
+        Carson's self impedance through the conductor's GMR.
+    """
+    if any(count > 1 for count, _ in model.bundles.values()):
+        raise ValueError("The skin effect of bundled conductors is not "
+                         "supported")
+    for conductor, is_present in zip(model.conductors, present):
+        if is_present and conductor not in model.conductor_radius:
+            raise ValueError(f"Conductor {conductor!r} has no "
+                             f"conductor_radius for the skin effect")
+    radius = asarray([model.conductor_radius.get(conductor, 1.0)
+                      for conductor in model.conductors])
+    frequency = ω[..., None] / (2.0 * π)
+    if sweep_resistance:
+        z_internal = internal_impedance(where(present, r, 1.0), radius,
+                                        frequency)
+    else:
+        frequencies = tuple(float(ƒ) for ƒ in frequency.ravel())
+        z_internal = stack([
+            conductor_internal_impedance(
+                float(r[i]), float(radius[i]), frequencies
+            ).reshape(frequency.shape[:-1]) if present[i]
+            else ω * 0 for i in range(len(present))
+        ], axis=-1)
+    ΔZ = z_internal - r - 1j * ω[..., None] * μ / (8 * π)
+    return where(present, ΔZ, 0)
+
+
+def _resistance_array(model, resistance: Mapping) -> ndarray:
+    return stack(broadcast_arrays(*(
+        asarray(resistance.get(conductor, model.r.get(conductor, 0.0)),
+                dtype=float)
+        for conductor in model.conductors
+    )), axis=-1)
@@ -0,0 +1,89 @@
+""" Sequence impedances of transposed three phase lines, computed directly
+    for a batch of models.
+
+    A transposed line has the same averaged self impedance Zs and mutual
+    impedance Zm between every pair of phases, so that
+
+        Z1 = Zs - Zm,    Z0 = Zs + 2·Zm.
+
+    Zs and Zm only need the sums of the diagonal and of the off-diagonal
+    entries of the phase impedance matrix. After the Kron reduction
+
+        Z_abc = Ẑpp - C,    C = Ẑpn · Ẑnn⁻¹ · Ẑnp,
+
+    these are the sums of Ẑpp less the trace and the total of C, which
+    follow from Ẑpn and X = Ẑnn⁻¹·Ẑnp without forming C. Carson's equations
+    are only evaluated for one of each pair of symmetric entries, and the
+    primitive and phase impedance matrices are never built.
+"""
+from typing import NamedTuple, Sequence
+
+from numpy import (arange, array, concatenate, eye, ndarray, repeat, tile,
+                   triu_indices, where, zeros)
+from numpy.linalg import solve
+
+from carsons.carsons import ModifiedCarsonsEquations
+from carsons.kernels import check_batch, numpy_z_pairs, stack_models
+
+
+class TransposedImpedances(NamedTuple):
+    z_self: ndarray  # averaged self impedance of the phases, Zs
+    z_mutual: ndarray  # averaged mutual impedance between phases, Zm
+    z1: ndarray
+    z0: ndarray
+
+
+def calculate_transposed_impedances(
+        models: Sequence) -> TransposedImpedances:
+    """ The averaged self and mutual impedances and the sequence impedances
+        of every model in `models`, as if the line were transposed, each an
+        array of shape `(len(models),)`.
+
+        `models` are three phase equation objects with every phase present,
+        batched as for `carsons.kernels.build_z_primitives`. The sequence
+        impedances equal those of `calculate_sequence_impedances` on the
+        full phase impedance matrix, which are the diagonal of Z012.
+    """
+    check_batch(models)
+    first = models[0]
+    if first.dimension != 3:
+        raise ValueError("Transposed sequence impedances need a three phase "
+                         "model")
+    x, y, gmr, r, present, d = stack_models(models)
+    if not present[:, :3].all():
+        raise ValueError("Transposed sequence impedances need every phase "
+                         "to be present")
+    ω = array([model.ω for model in models], dtype=float)
+    ρ = array([model.ρ for model in models], dtype=float)
+
+    # the upper triangles of Ẑpp and Ẑnn, and all of Ẑpn
+    M = x.shape[-1] - 3
+    phase_i, phase_j = triu_indices(3)
+    neutral_i, neutral_j = triu_indices(M)
+    i = concatenate([phase_i, repeat(arange(3), M), neutral_i + 3])
+    j = concatenate([phase_j, tile(arange(3, 3 + M), 3), neutral_j + 3])
+    z = numpy_z_pairs(
+        x, y, gmr, r, i, j, ω, ρ, d,
+        first.number_of_P_terms, first.number_of_Q_terms,
+        isinstance(first, ModifiedCarsonsEquations))
+    z = where(present[:, i] & present[:, j], z, 0)
+
+    self_sum = z[:, :6][:, phase_i == phase_j].sum(axis=-1)
+    mutual_sum = z[:, :6][:, phase_i != phase_j].sum(axis=-1)
+    if M:
+        Ẑpn = z[:, 6:6 + 3 * M].reshape(-1, 3, M)
+        Ẑnn = zeros((len(models), M, M), dtype=z.dtype)
+        Ẑnn[:, neutral_i, neutral_j] = z[:, 6 + 3 * M:]
+        Ẑnn[:, neutral_j, neutral_i] = z[:, 6 + 3 * M:]
+        # neutrals missing from a model are decoupled with a unit diagonal
+        Ẑnn += eye(M) * ~present[:, 3:, None]
+        X = solve(Ẑnn, Ẑpn.transpose(0, 2, 1))
+        trace = (Ẑpn * X.transpose(0, 2, 1)).sum(axis=(-2, -1))
+        total = (Ẑpn.sum(axis=-2) * X.sum(axis=-1)).sum(axis=-1)
+        self_sum = self_sum - trace
+        mutual_sum = mutual_sum - (total - trace) / 2
+
+    z_self = (self_sum / 3).astype(first.dtype, copy=False)
+    z_mutual = (mutual_sum / 3).astype(first.dtype, copy=False)
+    return TransposedImpedances(z_self, z_mutual,
+                                z_self - z_mutual, z_self + 2 * z_mutual)
@@ -0,0 +1,87 @@
+""" Exact distributed-parameter two-port models of line segments.
+
+    A segment of length ℓ with per-length series impedance Z and shunt
+    admittance Y relates its sending and receiving end quantities by
+
+        [V_s] = [A  B] [V_r]        A = cosh(√(ZY) ℓ)
+        [I_s]   [C  D] [I_r]        B = sinh(√(ZY) ℓ) √(ZY)⁻¹ Z
+                                    C = Y sinh(√(ZY) ℓ) √(ZY)⁻¹
+                                    D = Aᵀ
+
+    The matrix functions are evaluated from one eigendecomposition
+    ZY = T Λ T⁻¹ per line code, so every further segment length of the
+    same code only costs the scaling of the eigenvalues and two matrix
+    products.
+"""
+from typing import NamedTuple, Optional
+
+from numpy import (arange, asarray, cosh, eye, ndarray, sinh, sqrt, swapaxes,
+                   where, zeros_like)
+from numpy.linalg import eig, inv, pinv
+
+
+class ABCD(NamedTuple):
+    A: ndarray
+    B: ndarray
+    C: ndarray
+    D: ndarray
+
+
+class PiModel(NamedTuple):
+    Z: ndarray  # series impedance
+    Y: ndarray  # total shunt admittance, half of it at each end
+
+
+def calculate_abcd(z: ndarray, y: Optional[ndarray] = None, length=1.0,
+                   code=None) -> ABCD:
+    """ The ABCD parameters of line segments.
+
+        z      -- per-length series impedance, a `(K, n, n)` stack of line
+                  codes or a single `(n, n)` matrix
+        y      -- per-length shunt admittance of the same shape, or None to
+                  neglect the shunt admittance
+        length -- segment lengths, of shape `(S,)`, in the length unit of
+                  `z` and `y`
+        code   -- for each segment, the index of its line code in `z`. By
+                  default segment s uses line code s, or the only line code
+                  if `z` is a single matrix.
+
+        Returns the four parameters as `(S, n, n)` stacks.
+    """
+    z = asarray(z)
+    y = zeros_like(z) if y is None else asarray(y)
+    length = asarray(length, dtype=float)
+    if z.ndim == 2:
+        z, y = z[None], y[None]
+        code = 0 if code is None else code
+    code = arange(len(z)) if code is None else asarray(code)
+
+    # one eigendecomposition per line code, shared by all its segments
+    λ, T = eig(z @ y)
+    Tinv = inv(T)
+    γ = sqrt(λ)
+
+    γℓ = γ[code] * length[..., None]
+    safe_γ = where(γ == 0, 1, γ)[code]
+    # sinh(γℓ)/γ tends to ℓ as γ goes to zero
+    sinhc = where(γℓ == 0, length[..., None] + 0 * γℓ, sinh(γℓ) / safe_γ)
+
+    def matrix_function(values: ndarray) -> ndarray:
+        return (T[code] * values[..., None, :]) @ Tinv[code]
+
+    A = matrix_function(cosh(γℓ))
+    F = matrix_function(sinhc)
+    B = F @ z[code]
+    C = y[code] @ F
+    return ABCD(A, B, C, swapaxes(A, -2, -1))
+
+
+def calculate_pi_model(abcd: ABCD) -> PiModel:
+    """ The exact equivalent pi model of segments with the given ABCD
+        parameters: a series impedance B and a total shunt admittance
+        2·B⁻¹(A − I), half of it at each end. B is pseudo-inverted, so
+        absent phases get zero rows and columns.
+    """
+    A, B = abcd.A, abcd.B
+    Y = 2 * pinv(B) @ (A - eye(A.shape[-1]))
+    return PiModel(B, Y)
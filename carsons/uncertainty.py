@@ -0,0 +1,124 @@
+""" Monte Carlo estimates of line impedance under uncertain geometry,
+    conductor properties and earth resistivity.
+
+    Each uncertain input is described by a distribution: a callable taking
+    a numpy random `Generator` and an output shape and returning samples,
+    such as those made by `normal`, `uniform` and `lognormal` below. All
+    samples are evaluated as one vectorized batch.
+"""
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+
+from numpy import asarray, ndarray, percentile
+from numpy.random import Generator, default_rng
+
+from carsons.carsons import (
+    ModifiedCarsonsEquations,
+    calculate_sequence_impedances,
+    perform_kron_reduction,
+)
+from carsons.kernels import numpy_z_primitive, stack_models
+
+Distribution = Callable[[Generator, tuple], ndarray]
+
+
+def normal(std: float, mean: float = 0.0) -> Distribution:
+    return lambda rng, shape: rng.normal(mean, std, size=shape)
+
+
+def uniform(low: float, high: float) -> Distribution:
+    return lambda rng, shape: rng.uniform(low, high, size=shape)
+
+
+def lognormal(median: float, σ: float) -> Distribution:
+    """ Log-normal samples, e.g. of earth resistivity, with the given median
+        and standard deviation `σ` of the underlying normal distribution.
+    """
+    return lambda rng, shape: median * rng.lognormal(0.0, σ, size=shape)
+
+
+class ImpedanceStatistics(NamedTuple):
+    """ Mean and percentiles of a sampled complex quantity. Percentiles are
+        taken separately over the real and imaginary parts.
+    """
+    mean: ndarray
+    percentiles: Dict[float, ndarray]
+
+
+class MonteCarloResult(NamedTuple):
+    z_abc: ImpedanceStatistics
+    z1: Optional[ImpedanceStatistics]  # for three phase models
+    z0: Optional[ImpedanceStatistics]
+    samples: Optional[ndarray] = None
+
+
+def sample_impedance(
+        model,
+        number_of_samples: int,
+        horizontal: Optional[Distribution] = None,
+        vertical: Optional[Distribution] = None,
+        gmr: Optional[Distribution] = None,
+        resistance: Optional[Distribution] = None,
+        resistivity: Optional[Distribution] = None,
+        percentiles: Sequence[float] = (5, 50, 95),
+        seed=None,
+        keep_samples: bool = False) -> MonteCarloResult:
+    """ Samples the phase impedance of `model`, an equation object, under
+        the given uncertainties, and summarises Z_abc and, for three phase
+        models, the positive and zero sequence impedances.
+
+        horizontal, vertical -- offsets in meters added to each conductor's
+                                x and y position, e.g. sag or pole height
+        gmr, resistance      -- factors multiplying each conductor's GMR and
+                                resistance
+        resistivity          -- earth resistivity in Ω·m, one per sample
+
+        Each conductor is perturbed independently; inputs without a
+        distribution keep the model's value. The cable models keep their
+        nominal conductor spacing, since it is fixed by the cable's
+        construction rather than its position. `seed` makes the samples
+        reproducible, and `keep_samples` returns every sampled Z_abc too.
+    """
+    rng = default_rng(seed)
+    x, y, gmr_, r, present, d = stack_models([model])
+    shape = (number_of_samples, x.shape[-1])
+
+    if horizontal is not None:
+        x = x + horizontal(rng, shape)
+    if vertical is not None:
+        y = y + vertical(rng, shape)
+    if gmr is not None:
+        gmr_ = gmr_ * gmr(rng, shape)
+    if resistance is not None:
+        r = r * resistance(rng, shape)
+    ρ = model.ρ if resistivity is None else \
+        resistivity(rng, (number_of_samples,))
+
+    z_primitive = numpy_z_primitive(
+        x, y, gmr_, r, present, asarray(model.ω), asarray(ρ), d,
+        model.number_of_P_terms, model.number_of_Q_terms,
+        isinstance(model, ModifiedCarsonsEquations),
+    ).astype(model.dtype, copy=False)
+    z_abc = perform_kron_reduction(z_primitive, dimension=model.dimension)
+    z1 = z0 = None
+    if z_abc.shape[-2:] == (3, 3):
+        z1, z0 = (_statistics(z, percentiles)
+                  for z in calculate_sequence_impedances(z_abc))
+
+    return MonteCarloResult(
+        z_abc=_statistics(z_abc, percentiles),
+        z1=z1,
+        z0=z0,
+        samples=z_abc if keep_samples else None,
+    )
+
+
+def _statistics(samples: ndarray,
+                percentiles: Sequence[float]) -> ImpedanceStatistics:
+    return ImpedanceStatistics(
+        mean=samples.mean(axis=0),
+        percentiles={
+            q: percentile(samples.real, q, axis=0) +
+            1j * percentile(samples.imag, q, axis=0)
+            for q in percentiles
+        },
+    )
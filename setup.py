@@ -37,7 +37,7 @@ setup(
     keywords=["carsons", "cables", "lines", "power systems"],
     license="MIT",
     install_requires=[
-        'numpy>=1.13.1',
+        'numpy>=1.17',
     ],
     zip_safe=False,
     extras_require={
@@ -47,5 +47,14 @@ setup(
             "pytest-mypy",
             "pint",
         ],
+        "jit": [
+            "numba",
+        ],
+        "threads": [
+            "threadpoolctl",
+        ],
+        "sparse": [
+            "scipy",
+        ],
     },
 )
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_calibration(monkeypatch, tmp_path):
+    """ Keeps the tests independent of a calibration or strategy saved or
+        set on the machine running them.
+    """
+    monkeypatch.setenv("CARSONS_CALIBRATION",
+                       str(tmp_path / "calibration.json"))
+    monkeypatch.delenv("CARSONS_STRATEGY", raising=False)
@@ -124,3 +124,53 @@ class MultiLineModel:
     @property
     def outside_radius(self):
         return self._outside_radius
+
+
+def concentric_cable(phases='ABC', spacing=6):
+    """ Kersting's 250 kcmil 1/3 concentric neutral cables, one for each of
+        `phases`, laid side by side `spacing` inches apart.
+    """
+    neutral = {
+        'neutral_strand_gmr': 0.000633984,
+        'neutral_strand_resistance': 0.00923963,
+        'neutral_strand_diameter': 0.00162814,
+        'diameter_over_neutral': 0.032766,
+        'neutral_strand_count': 13,
+    }
+    conductors = {}
+    for index, phase in enumerate(phases):
+        conductors[phase] = {
+            'resistance': 0.00025476, 'gmr': 0.00521208,
+            'wire_positions': (spacing * index * 0.0254, 0),
+        }
+        conductors[f"N{phase}"] = neutral
+    cable = ConcentricLineModel(conductors)
+    cable.conductor_radius = {phase: 0.567 / 2 * 0.0254 for phase in phases}
+    return cable
+
+
+def triplex_cable():
+    conductor = {
+        'resistance': 0.000602723, 'gmr': 0.00338328,
+        'wire_positions': (0, 5), 'outside_radius': 0.00726,
+    }
+    return MultiLineModel({'A': conductor, 'B': conductor, 'N': conductor})
+
+
+def line_request(height=8.5344, frequency=60):
+    """ A request of `carsons.service` for the IEEE 13 configuration 601
+        line, with its phase conductors at `height` meters.
+    """
+    return {
+        "equations": "CarsonsEquations",
+        "model": {
+            "phases": ["A", "B", "C", "N"],
+            "wire_positions": {"A": [0.762, height], "B": [0, height],
+                               "C": [2.1336, height], "N": [1.2192, 7.3152]},
+            "geometric_mean_radius": {"A": 0.00947938, "B": 0.00947938,
+                                      "C": 0.00947938, "N": 0.00248107},
+            "resistance": {"A": 0.000115575, "B": 0.000115575,
+                           "C": 0.000115575, "N": 0.000367852},
+            "frequency": frequency,
+        },
+    }
@@ -0,0 +1,87 @@
+import json
+
+from numpy.testing import assert_allclose
+
+from carsons.accuracy import (
+    MAX_P_TERMS,
+    MAX_Q_TERMS,
+    cheapest_variant,
+    default_variants,
+    format_table,
+    main,
+    profile_variants,
+    variant,
+)
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    calculate_impedance,
+)
+from tests.test_overhead_line import (
+    ACBN_geometry_line,
+    CBN_geometry_line,
+    CN_geometry_line,
+)
+
+LINES = [ACBN_geometry_line(), CBN_geometry_line(), CN_geometry_line()]
+
+
+def test_variants():
+    variants = default_variants()
+
+    assert len(variants) == MAX_P_TERMS * MAX_Q_TERMS + MAX_P_TERMS
+    modified = variant(ModifiedCarsonsEquations, 1, 1)
+    assert_allclose(
+        calculate_impedance(modified(LINES[0])),
+        calculate_impedance(ModifiedCarsonsEquations(LINES[0])))
+
+
+def test_profiles():
+    variants = [variant(ModifiedCarsonsEquations, 1, 1),
+                variant(CarsonsEquations, 1, 2),
+                variant(CarsonsEquations, MAX_P_TERMS, MAX_Q_TERMS)]
+
+    profiles = profile_variants(LINES, variants, repeat=1)
+
+    assert len(profiles) == 3
+    by_name = {profile.name: profile for profile in profiles}
+    full = by_name[f"CarsonsEquations(P={MAX_P_TERMS}, Q={MAX_Q_TERMS})"]
+    assert full.max_error == 0
+    modified = by_name["ModifiedCarsonsEquations(P=1, Q=1)"]
+    assert modified.errors.shape == (3,)
+    assert 1e-4 < modified.max_error < 1e-2
+    assert (modified.runtimes > 0).all()
+    assert [profile.runtime for profile in profiles] == \
+        sorted(profile.runtime for profile in profiles)
+
+
+def test_cheapest_variant():
+    profiles = profile_variants(LINES, [
+        variant(CarsonsEquations, p, q) for p, q in ((1, 1), (2, 3), (6, 4))
+    ], repeat=1)
+
+    assert cheapest_variant(profiles, 1e-3).name in (
+        "CarsonsEquations(P=2, Q=3)", "CarsonsEquations(P=6, Q=4)")
+    assert cheapest_variant(profiles, 1e-6).name == \
+        "CarsonsEquations(P=6, Q=4)"
+    assert cheapest_variant(profiles, 1e-12) is None
+    table = format_table(profiles, 1e-6)
+    assert "* CarsonsEquations(P=6, Q=4)" in table
+
+
+def test_catalog(tmp_path, capsys):
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(json.dumps([{
+        "phases": list(line.phases),
+        "wire_positions": line.wire_positions,
+        "geometric_mean_radius": line.geometric_mean_radius,
+        "resistance": line.resistance,
+    } for line in LINES]))
+
+    main([str(catalog), "--tolerance", "1e-3", "--repeat", "1",
+          "--per-model"])
+
+    output = capsys.readouterr().out
+    assert "max error" in output
+    assert "*" in output
+    assert output.count("ModifiedCarsonsEquations(P=1, Q=1)") == 2
@@ -0,0 +1,146 @@
+import pint
+from numpy import array, log, pi, stack
+from numpy.testing import assert_allclose, assert_array_almost_equal
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    MultiConductorCarsonsEquations,
+    calculate_admittance,
+    calculate_impedance,
+    perform_admittance_reduction,
+)
+from carsons.kernels import build_z_primitives, build_zy_primitives
+from tests.helpers import concentric_cable, triplex_cable
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+
+ureg: pint.UnitRegistry = pint.UnitRegistry()
+inches = ureg.inches
+feet = ureg.feet
+
+MICROSIEMENS_PER_MILE = 1e-6 / (1 * ureg.miles).to('meters').magnitude
+
+PHASE_RADIUS = (0.927 / 2 * inches).to('meters').magnitude
+NEUTRAL_RADIUS = (0.563 / 2 * inches).to('meters').magnitude
+
+
+class ACBN_line_with_radius(ACBN_geometry_line):
+    conductor_radius = {'A': PHASE_RADIUS, 'B': PHASE_RADIUS,
+                        'C': PHASE_RADIUS, 'N': NEUTRAL_RADIUS}
+
+
+class CBN_line_with_radius(CBN_geometry_line):
+    conductor_radius = ACBN_line_with_radius.conductor_radius
+
+
+def test_overhead_line_admittance_IEEE13_601():
+    y_abc = calculate_admittance(CarsonsEquations(ACBN_line_with_radius()))
+
+    # IEEE 13 node test feeder, configuration 601; the feeder data rounds
+    # the permittivity of free space, hence the tolerance
+    assert_allclose(
+        y_abc,
+        1j * array([
+            [6.2998, -1.9958, -1.2595],
+            [-1.9958, 5.9597, -0.7417],
+            [-1.2595, -0.7417, 5.6386],
+        ]) * MICROSIEMENS_PER_MILE,
+        rtol=1e-3,
+    )
+
+
+def test_missing_phase_has_zero_admittance():
+    y_abc = calculate_admittance(CarsonsEquations(CBN_line_with_radius()))
+
+    assert_array_almost_equal(y_abc[0], [0, 0, 0])
+    assert_array_almost_equal(y_abc[:, 0], [0, 0, 0])
+    assert (y_abc[1:, 1:].imag.diagonal() > 0).all()
+
+
+def test_concentric_neutral_cable_admittance():
+    y_abc = calculate_admittance(
+        ConcentricNeutralCarsonsEquations(concentric_cable()))
+
+    # Kersting, Distribution System Modeling and Analysis, example 5.3,
+    # which rounds the permittivity and the neutral circle radius
+    assert_allclose(
+        y_abc, 96.5569j * MICROSIEMENS_PER_MILE * array([
+            [1, 0, 0],
+            [0, 1, 0],
+            [0, 0, 1],
+        ]),
+        rtol=5e-3, atol=1e-15,
+    )
+
+
+def test_batched_impedance_and_admittance_match_models():
+    models = [
+        CarsonsEquations(ACBN_line_with_radius(ƒ)) for ƒ in (50, 60)
+    ] + [CarsonsEquations(CBN_line_with_radius())]
+
+    z_primitives, p_primitives = build_zy_primitives(models)
+
+    assert_array_almost_equal(
+        z_primitives, build_z_primitives(models, backend='numpy'))
+    assert_allclose(
+        p_primitives,
+        stack([model.build_p_primitive() for model in models]))
+    y_abc = perform_admittance_reduction(
+        p_primitives, [model.ω for model in models])
+    for model, y in zip(models, y_abc):
+        assert_allclose(y, calculate_admittance(model), atol=1e-18)
+
+
+def test_batched_concentric_cables():
+    models = [
+        ConcentricNeutralCarsonsEquations(concentric_cable(spacing=spacing))
+        for spacing in (6, 12)
+    ]
+
+    z_primitives, p_primitives = build_zy_primitives(models)
+
+    assert p_primitives.shape == (2, 3, 3)
+    for model, z_primitive, p_primitive in zip(
+            models, z_primitives, p_primitives):
+        assert_array_almost_equal(z_primitive, model.build_z_primitive())
+        assert_allclose(
+            perform_admittance_reduction(p_primitive, model.ω),
+            calculate_admittance(model))
+
+
+def test_concentric_cable_with_missing_phase():
+    model = ConcentricNeutralCarsonsEquations(concentric_cable('AC'))
+
+    y_abc = calculate_admittance(model)
+
+    assert y_abc[1, 1] == 0
+    assert y_abc[0, 0] == y_abc[2, 2] != 0
+
+
+def test_modified_equations_share_the_geometry():
+    model = ModifiedCarsonsEquations(ACBN_line_with_radius())
+
+    z_primitives, _ = build_zy_primitives([model])
+
+    assert_array_almost_equal(
+        z_primitives[0], model.build_z_primitive())
+    assert calculate_impedance(model).shape == (3, 3)
+
+
+def test_multi_conductor_cable_potential_coefficients():
+    cable = triplex_cable()
+    cable.conductor_radius = {'A': 0.0047, 'B': 0.0047, 'N': 0.0047}
+    model = MultiConductorCarsonsEquations(cable)
+    ε0 = CarsonsEquations.ε0
+
+    p_primitive = model.build_p_primitive()
+
+    # conductors at a height of 5 m, touching at their outside radius
+    self, mutual = log(10 / 0.0047), log(10 / (2 * 0.00726))
+    assert_allclose(p_primitive[[0, 1, 3], [0, 1, 3]],
+                    self / (2 * pi * ε0))
+    assert_allclose(p_primitive[0, [1, 3]], mutual / (2 * pi * ε0))
+    assert not p_primitive[2].any()
+    _, p_primitives = build_zy_primitives([model])
+    assert_allclose(p_primitives[0], p_primitive)
@@ -0,0 +1,30 @@
+import json
+
+from benchmarks.bench_memory import regressions, run
+
+
+def test_small_batches_are_measured():
+    results = run(batch_sizes=(100,), neutral_counts=(1, 4))
+
+    assert set(results) == {"overhead-4", "overhead-7", "concentric-6",
+                            "quadruplex-4"}
+    assert set(results["overhead-4"]["100"]) == {"primitive", "kron",
+                                                 "sequence"}
+    for stages in results.values():
+        for measured in stages["100"].values():
+            assert set(measured) == {"peak_bytes", "retained_blocks",
+                                     "rss_bytes"}
+            assert measured["peak_bytes"] > 0
+            assert measured["retained_blocks"] > 0
+    assert regressions(results, results, tolerance=0.0) == []
+
+
+def test_regressions_are_reported():
+    results = run(batch_sizes=(100,), neutral_counts=(1,))
+    shrunk = json.loads(json.dumps(results))
+    shrunk["overhead-4"]["100"]["kron"]["peak_bytes"] //= 2
+    del shrunk["quadruplex-4"]
+
+    found = regressions(results, shrunk, tolerance=0.1)
+
+    assert len(found) == 1 and found[0].startswith("overhead-4 x 100 kron")
@@ -0,0 +1,97 @@
+from math import sqrt
+from types import SimpleNamespace
+
+import pytest
+from numpy.testing import assert_allclose, assert_array_almost_equal
+
+from carsons.bundles import calculate_impedance_exact, subconductor_positions
+from carsons.carsons import (
+    CarsonsEquations,
+    ModifiedCarsonsEquations,
+    bundle_gmr,
+    calculate_impedance,
+)
+from carsons.models import normalize_model
+
+
+def bundled_line(count=1, spacing=0.4572, **bundles):
+    return SimpleNamespace(
+        phases=['A', 'B', 'C', 'N'],
+        #                    (x, y)
+        wire_positions={'A': (-8.0, 20.0), 'B': (0.0, 20.0),
+                        'C': (8.0, 20.0), 'N': (0.0, 27.0)},
+        geometric_mean_radius={'A': 0.0118, 'B': 0.0118, 'C': 0.0118,
+                               'N': 0.004},
+        resistance={'A': 6e-5, 'B': 6e-5, 'C': 6e-5, 'N': 3e-4},
+        bundles=bundles or {phase: (count, spacing) for phase in 'ABC'},
+    )
+
+
+def test_bundle_gmr():
+    assert bundle_gmr(0.0118, 1, 0.0) == 0.0118
+    assert bundle_gmr(0.0118, 2, 0.4572) == pytest.approx(
+        sqrt(0.0118 * 0.4572))
+    assert bundle_gmr(0.0118, 4, 0.4572) == pytest.approx(
+        1.0905 * (0.0118 * 0.4572**3) ** (1/4), rel=1e-4)
+
+
+def test_subconductors_are_evenly_spaced():
+    for count in (2, 3, 4):
+        positions = subconductor_positions((1.0, 10.0), count, 0.4572)
+        sides = [
+            CarsonsEquations.calculate_distance(
+                positions[k], positions[(k + 1) % count])
+            for k in range(count)
+        ]
+        assert_allclose(sides, 0.4572)
+
+
+def test_bundles_keep_one_conductor_per_phase():
+    model = CarsonsEquations(bundled_line(4))
+
+    assert model.conductors == ['A', 'B', 'C', 'N']
+    assert model.build_z_primitive().shape == (4, 4)
+    assert model.r['A'] == pytest.approx(6e-5 / 4)
+    assert model.gmr['A'] == pytest.approx(bundle_gmr(0.0118, 4, 0.4572))
+    assert model.gmr['N'] == 0.004
+
+
+@pytest.mark.parametrize("count", [2, 3, 4])
+@pytest.mark.parametrize(
+    "equations", [CarsonsEquations, ModifiedCarsonsEquations])
+def test_equivalent_bundle_matches_exact_reduction(count, equations):
+    line = bundled_line(count)
+
+    z_abc = calculate_impedance(equations(line))
+    exact = calculate_impedance_exact(line, equations)
+
+    assert exact.shape == (3, 3)
+    assert_allclose(z_abc, exact, rtol=1e-3)
+
+
+def test_exact_reduction_without_bundles():
+    line = bundled_line(1, spacing=0.0)
+
+    assert_array_almost_equal(
+        calculate_impedance_exact(line),
+        calculate_impedance(CarsonsEquations(line)))
+
+
+def test_bundled_neutral_and_missing_phase():
+    line = bundled_line(A=(2, 0.4), C=(2, 0.4), N=(2, 0.3))
+    line.phases = ['A', 'C', 'N']
+
+    z_abc = calculate_impedance(CarsonsEquations(line))
+    exact = calculate_impedance_exact(line)
+
+    assert_array_almost_equal(z_abc[1], [0, 0, 0])
+    assert_allclose(z_abc, exact, rtol=1e-3, atol=1e-12)
+
+
+def test_exact_reduction_of_mappings_and_normalized_models():
+    line = bundled_line(A=(2, 0.4), C=(3, 0.4))
+    expected = calculate_impedance_exact(line)
+
+    assert_allclose(calculate_impedance_exact(vars(line)), expected)
+    assert_allclose(calculate_impedance_exact(normalize_model(line)),
+                    expected)
@@ -0,0 +1,164 @@
+import json
+
+import pytest
+from numpy.testing import assert_allclose
+
+from carsons.accuracy import variant
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    calculate_impedance,
+)
+from carsons.dispatch import (
+    STRATEGIES,
+    available_strategies,
+    calculate_impedances,
+    calibrate,
+    kernel_compatible,
+    last_strategy,
+    load_calibration,
+    select_strategy,
+)
+from tests.helpers import concentric_cable
+from tests.test_overhead_line import ACBN_geometry_line
+from tests.test_sweep import line_with
+
+MODELS = [CarsonsEquations(line_with(ACBN_geometry_line(), resistivity=ρ))
+          for ρ in (10, 30, 100, 300, 1000)]
+
+
+class ScaledResistance(CarsonsEquations):
+    def compute_R(self, i, j):
+        return 2 * super().compute_R(i, j)
+
+
+def test_defaults_without_calibration():
+    assert load_calibration() is None
+    assert select_strategy(1, 4) == 'scalar'
+    assert select_strategy(1000, 4) in ('jit', 'numpy')
+
+
+def test_subclasses_overriding_equations_use_the_scalar_path():
+    assert kernel_compatible(CarsonsEquations)
+    assert kernel_compatible(variant(CarsonsEquations, 2, 3))
+    assert not kernel_compatible(ScaledResistance)
+    assert select_strategy(1000, 4, ScaledResistance) == 'scalar'
+
+    models = [ScaledResistance(ACBN_geometry_line())] * 3
+    z_abc = calculate_impedances(models)
+
+    assert last_strategy() == 'scalar'
+    assert_allclose(z_abc[0], calculate_impedance(models[0]))
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_strategies_agree(strategy):
+    if strategy not in available_strategies(cores=2):
+        pytest.skip(f"{strategy} is not available")
+    expected = [calculate_impedance(model, strategy='scalar')
+                for model in MODELS]
+
+    z_abc = calculate_impedances(MODELS, strategy=strategy, max_workers=2)
+
+    assert last_strategy() == strategy
+    assert_allclose(z_abc, expected, rtol=1e-10)
+
+
+def test_cables_can_be_sent_to_processes():
+    models = [ConcentricNeutralCarsonsEquations(concentric_cable(spacing=s))
+              for s in (5, 6, 7)]
+
+    z_abc = calculate_impedances(models, strategy='processes', max_workers=2)
+
+    assert_allclose(z_abc, [calculate_impedance(model, strategy='scalar')
+                            for model in models], rtol=1e-10)
+
+
+def test_override_by_environment(monkeypatch):
+    monkeypatch.setenv("CARSONS_STRATEGY", "numpy")
+
+    calculate_impedances(MODELS)
+
+    assert last_strategy() == 'numpy'
+
+
+def test_environment_does_not_override_the_scalar_path(monkeypatch):
+    monkeypatch.setenv("CARSONS_STRATEGY", "numpy")
+    models = [ScaledResistance(ACBN_geometry_line())] * 3
+
+    z_abc = calculate_impedances(models)
+
+    assert last_strategy() == 'scalar'
+    assert_allclose(z_abc[0], calculate_impedance(models[0]))
+
+
+def test_environment_does_not_override_mixed_batches(monkeypatch):
+    monkeypatch.setenv("CARSONS_STRATEGY", "numpy")
+    models = [CarsonsEquations(ACBN_geometry_line()),
+              ConcentricNeutralCarsonsEquations(concentric_cable())]
+
+    calculate_impedances(models)
+
+    assert last_strategy() == 'scalar'
+
+
+def test_forcing_kernels_on_incompatible_batches_is_refused():
+    with pytest.raises(ValueError):
+        calculate_impedances([ScaledResistance(ACBN_geometry_line())] * 3,
+                             strategy='numpy')
+    with pytest.raises(ValueError):
+        calculate_impedances(
+            [CarsonsEquations(ACBN_geometry_line()),
+             ConcentricNeutralCarsonsEquations(concentric_cable())],
+            strategy='threads')
+
+
+def test_single_models_do_not_dispatch(monkeypatch):
+    monkeypatch.setenv("CARSONS_STRATEGY", "unknown")
+
+    assert_allclose(calculate_impedance(MODELS[0]),
+                    calculate_impedance(MODELS[0], strategy='scalar'))
+
+
+def test_mixed_batches_use_the_scalar_path():
+    models = [CarsonsEquations(ACBN_geometry_line()),
+              ConcentricNeutralCarsonsEquations(concentric_cable())]
+
+    z_abc = calculate_impedances(models)
+
+    assert last_strategy() == 'scalar'
+    assert_allclose(z_abc[1], calculate_impedance(models[1]))
+
+
+def test_calibration(tmp_path):
+    path = str(tmp_path / "calibration.json")
+
+    calibration = calibrate(path, batch_sizes=(1, 20),
+                            conductor_counts=(4, 6), repeat=1)
+
+    with open(path) as f:
+        assert json.load(f) == calibration
+    timings = calibration["timings"]["CarsonsEquations"]["6"]["20"]
+    assert set(timings) <= set(available_strategies())
+    assert select_strategy(25, 7, calibration=calibration) == \
+        min(timings, key=timings.__getitem__)
+    assert load_calibration(path) == calibration
+
+
+def test_selection_follows_calibration():
+    calibration = {"timings": {"CarsonsEquations": {
+        "4": {"1": {"scalar": 1.0, "numpy": 2.0},
+              "1000": {"numpy": 2.0, "threads": 1.0}},
+        "16": {"1": {"scalar": 2.0, "numpy": 1.0}},
+    }}}
+
+    assert select_strategy(1, 4, calibration=calibration) == 'scalar'
+    assert select_strategy(2, 14, calibration=calibration) == 'numpy'
+    assert select_strategy(5000, 5, cores=4,
+                           calibration=calibration) == 'threads'
+    # threads are not available on one core
+    assert select_strategy(5000, 5, cores=1,
+                           calibration=calibration) == 'numpy'
+    # subclasses use the calibration of their base class
+    assert select_strategy(1, 16, variant(CarsonsEquations, 2, 2),
+                           calibration=calibration) == 'numpy'
@@ -0,0 +1,76 @@
+import pytest
+from numpy import array, eye
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedances,
+)
+from carsons.feeder import bus_depths, calculate_path_impedances
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+
+# buses are deliberately not in tree order
+PARENT = array([3, -1, 0, 1, 1, 4, 2])
+CODE = array([0, 0, 1, 0, 0, 1, 1])
+LENGTH = array([300.0, 0.0, 150.0, 500.0, 200.0, 80.0, 40.0])
+
+
+def line_codes():
+    return [CarsonsEquations(ACBN_geometry_line()),
+            CarsonsEquations(CBN_geometry_line())]
+
+
+def walk(parent, code, length, z_codes, source=0):
+    z_abc = []
+    for bus in range(len(parent)):
+        z = source
+        while parent[bus] >= 0:
+            z = z + z_codes[code[bus]] * length[bus]
+            bus = parent[bus]
+        z_abc.append(z + 0 * z_codes[0])
+    return array(z_abc)
+
+
+def test_bus_depths():
+    assert bus_depths(PARENT).tolist() == [2, 0, 3, 1, 1, 2, 4]
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        bus_depths([-1, 2, 1])
+
+
+def test_path_impedances_match_tree_walk():
+    models = line_codes()
+    z_codes = [calculate_impedance(model) for model in models]
+
+    result = calculate_path_impedances(PARENT, CODE, LENGTH, models)
+
+    assert result.z_abc.shape == (7, 3, 3)
+    assert_allclose(result.z_abc, walk(PARENT, CODE, LENGTH, z_codes))
+    assert not result.z_abc[1].any()
+    z1, z0 = calculate_sequence_impedances(result.z_abc[6])
+    assert result.z1[6] == pytest.approx(z1)
+    assert result.z0[6] == pytest.approx(z0)
+
+
+def test_source_impedance_and_impedance_stack():
+    z_codes = array([calculate_impedance(model) for model in line_codes()])
+    source = (0.1 + 1j) * eye(3)
+
+    result = calculate_path_impedances(PARENT, CODE, LENGTH, z_codes,
+                                       source_impedance=source)
+
+    assert_allclose(result.z_abc,
+                    walk(PARENT, CODE, LENGTH, z_codes, source))
+
+
+def test_two_phase_feeder_has_no_sequence_impedances():
+    z_codes = array([[[1 + 1j, 0.2j], [0.2j, 1 + 1j]]])
+
+    result = calculate_path_impedances([-1, 0, 1], [0, 0, 0],
+                                       [0, 10.0, 20.0], z_codes)
+
+    assert_allclose(result.z_abc[2], 30 * z_codes[0])
+    assert result.z1 is None and result.z0 is None
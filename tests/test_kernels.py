@@ -0,0 +1,87 @@
+import pytest
+from numpy import complex64
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    MultiConductorCarsonsEquations,
+)
+from carsons.kernels import BACKENDS, build_z_primitives
+from tests.helpers import concentric_cable, triplex_cable
+from tests.test_overhead_line import (
+    ACBN_geometry_line,
+    CBN_geometry_line,
+    CN_geometry_line,
+)
+
+LINES = [ACBN_geometry_line(60), ACBN_geometry_line(50)]
+SPARSE_LINES = [CBN_geometry_line(60), CN_geometry_line(50)]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("equations", [
+    CarsonsEquations, ModifiedCarsonsEquations])
+@pytest.mark.parametrize("lines", [LINES, SPARSE_LINES])
+def test_batch_matches_reference(backend, equations, lines):
+    models = [equations(line) for line in lines]
+
+    z_primitives = build_z_primitives(models, backend=backend)
+
+    assert z_primitives.shape == (len(models), 4, 4)
+    for model, z_primitive in zip(models, z_primitives):
+        assert_allclose(z_primitive, model.build_z_primitive(),
+                        rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("equations", [
+    CarsonsEquations, ModifiedCarsonsEquations])
+@pytest.mark.parametrize("number_of_P_terms, number_of_Q_terms", [
+    (6, 7), (4, 3), (2, 1)])
+def test_batch_matches_reference_series_terms(
+        backend, equations, number_of_P_terms, number_of_Q_terms):
+    models = [equations(line) for line in LINES]
+    for model in models:
+        model.number_of_P_terms = number_of_P_terms
+        model.number_of_Q_terms = number_of_Q_terms
+
+    z_primitives = build_z_primitives(models, backend=backend)
+
+    for model, z_primitive in zip(models, z_primitives):
+        assert_allclose(z_primitive, model.build_z_primitive(),
+                        rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("equations, line", [
+    (ConcentricNeutralCarsonsEquations, concentric_cable),
+    (MultiConductorCarsonsEquations, triplex_cable)])
+def test_batch_matches_reference_cables(backend, equations, line):
+    models = [equations(line()), equations(line())]
+
+    z_primitives = build_z_primitives(models, backend=backend)
+
+    for model, z_primitive in zip(models, z_primitives):
+        assert_allclose(z_primitive, model.build_z_primitive(),
+                        rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_keeps_model_precision(backend):
+    models = [CarsonsEquations(line, dtype=complex64) for line in LINES]
+
+    assert build_z_primitives(models, backend=backend).dtype == complex64
+
+
+def test_batch_rejects_mixed_models():
+    models = [CarsonsEquations(LINES[0]), ModifiedCarsonsEquations(LINES[0])]
+
+    with pytest.raises(ValueError):
+        build_z_primitives(models)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        build_z_primitives([CarsonsEquations(LINES[0])], backend='fortran')
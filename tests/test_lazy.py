@@ -0,0 +1,71 @@
+from numpy import asarray
+from numpy.testing import assert_array_equal
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    calculate_impedance,
+    perform_kron_reduction,
+)
+from tests.helpers import LineModel, concentric_cable
+from tests.test_overhead_line import CBN_geometry_line
+
+
+def many_neutral_line(neutrals=8):
+    conductors = {
+        "A": (0.000115575, 0.00947938, (0.762, 8.5344)),
+        "B": (0.000115575, 0.00947938, (0.0, 8.5344)),
+        "C": (0.000115575, 0.00947938, (2.1336, 8.5344)),
+    }
+    for n in range(neutrals):
+        conductors[f"N{n + 1}"] = (0.000367852, 0.00248107,
+                                   (0.5 * n, 7.3152))
+    return LineModel(conductors)
+
+
+def test_diagonal_evaluates_only_self_impedances():
+    model = CarsonsEquations(many_neutral_line())
+    z_primitive = model.build_z_primitive()
+
+    lazy = model.build_lazy_z_primitive()
+    diagonal = lazy.diagonal()
+
+    assert lazy.shape == (11, 11)
+    assert lazy.evaluated == 11
+    assert_array_equal(diagonal, z_primitive.diagonal())
+
+
+def test_entries_are_memoized_with_their_transpose():
+    model = CarsonsEquations(many_neutral_line())
+    z_primitive = model.build_z_primitive()
+    lazy = model.build_lazy_z_primitive()
+
+    assert lazy.entry("A", "N3") == z_primitive[0, 5]
+    assert lazy.evaluated == 2
+    assert lazy[5, 0] == z_primitive[5, 0]
+    assert lazy.evaluated == 2
+
+    assert_array_equal(lazy.block(["A", "B"], ["N1", "N2"]),
+                       z_primitive[0:2, 3:5])
+    assert lazy.evaluated == 2 + 8
+    # row B has two entries in the block, and its diagonal has no transpose
+    assert_array_equal(lazy[1], z_primitive[1])
+    assert lazy.evaluated == 10 + 2 * 9 - 1
+
+
+def test_materialized_by_kron_reduction():
+    model = CarsonsEquations(many_neutral_line())
+    lazy = model.build_lazy_z_primitive()
+
+    z_abc = perform_kron_reduction(lazy, dimension=model.dimension)
+
+    assert lazy.evaluated == 11 * 11
+    assert_array_equal(z_abc, calculate_impedance(model))
+    assert_array_equal(asarray(lazy), model.build_z_primitive())
+
+
+def test_absent_and_derived_conductors():
+    for model in (CarsonsEquations(CBN_geometry_line()),
+                  ConcentricNeutralCarsonsEquations(concentric_cable())):
+        assert_array_equal(model.build_lazy_z_primitive().toarray(),
+                           model.build_z_primitive())
@@ -0,0 +1,110 @@
+import pytest
+from numpy import array, isnan
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    MultiConductorCarsonsEquations,
+    calculate_impedance,
+)
+from carsons.kernels import build_z_primitives
+from carsons.library import (
+    ConcentricNeutralCableType,
+    ConductorLibrary,
+    ConductorType,
+    build_z_primitives_from_types,
+)
+from tests.helpers import concentric_cable, triplex_cable
+from tests.test_overhead_line import ACBN_geometry_line
+
+LIBRARY = ConductorLibrary({
+    "556,500 26/7": ConductorType(resistance=0.000115575, gmr=0.00947938),
+    "4/0 6/1": ConductorType(resistance=0.000367852, gmr=0.00248107),
+    "1/0 triplex": ConductorType(resistance=0.000602723, gmr=0.00338328,
+                                 outside_radius=0.00726),
+    "250 kcmil 1/3 CN": ConcentricNeutralCableType(
+        resistance=0.00025476, gmr=0.00521208,
+        neutral_strand_gmr=0.000633984,
+        neutral_strand_resistance=0.00923963,
+        neutral_strand_diameter=0.00162814,
+        diameter_over_neutral=0.032766,
+        neutral_strand_count=13,
+    ),
+})
+
+
+class LibraryLine():
+    def __init__(self, line, types):
+        self.library = LIBRARY
+        self.conductor_types = {
+            conductor: LIBRARY.index(name) for conductor, name in types.items()
+        }
+        self.wire_positions = line.wire_positions
+        self.phases = line.phases
+
+
+def test_types_by_name_and_index():
+    index = LIBRARY.index("4/0 6/1")
+
+    assert LIBRARY[index] is LIBRARY["4/0 6/1"]
+    assert LIBRARY.names[index] == "4/0 6/1"
+    assert LIBRARY.gmr[index] == 0.00248107
+    assert isnan(LIBRARY.neutral_gmr[index])
+    with pytest.raises(ValueError):
+        LIBRARY.add("4/0 6/1", LIBRARY["4/0 6/1"])
+
+
+@pytest.mark.parametrize(
+    "equations", [CarsonsEquations, ModifiedCarsonsEquations])
+def test_overhead_line_from_library(equations):
+    line = ACBN_geometry_line()
+    by_type = LibraryLine(line, {"A": "556,500 26/7", "B": "556,500 26/7",
+                                 "C": "556,500 26/7", "N": "4/0 6/1"})
+
+    assert_allclose(calculate_impedance(equations(by_type)),
+                    calculate_impedance(equations(line)))
+
+
+def test_concentric_neutral_constants_are_precomputed():
+    cable = concentric_cable('AB')
+    reference = ConcentricNeutralCarsonsEquations(cable)
+    index = LIBRARY.index("250 kcmil 1/3 CN")
+
+    assert LIBRARY.neutral_gmr[index] == pytest.approx(reference.gmr["NA"])
+    assert LIBRARY.neutral_radius[index] == reference.radius["NA"]
+    assert LIBRARY.neutral_resistance[index] == reference.r["NA"]
+
+    by_type = LibraryLine(cable, {"A": "250 kcmil 1/3 CN",
+                                  "B": "250 kcmil 1/3 CN"})
+    assert_allclose(
+        calculate_impedance(ConcentricNeutralCarsonsEquations(by_type)),
+        calculate_impedance(reference))
+
+
+def test_multi_conductor_cable_from_library():
+    cable = triplex_cable()
+    by_type = LibraryLine(cable, {conductor: "1/0 triplex"
+                                  for conductor in "ABN"})
+
+    assert_allclose(
+        calculate_impedance(MultiConductorCarsonsEquations(by_type)),
+        calculate_impedance(MultiConductorCarsonsEquations(cable)))
+
+
+def test_catalog_of_type_arrays():
+    phase, neutral = LIBRARY.index("556,500 26/7"), LIBRARY.index("4/0 6/1")
+    line = ACBN_geometry_line()
+    x = array([[0.762, 0.0, 2.1336, 1.2192]] * 2)
+    y = array([[8.5344, 8.5344, 8.5344, 7.3152]] * 2)
+    types = array([[phase, phase, phase, neutral],
+                   [-1, phase, phase, neutral]])
+
+    z_primitives = build_z_primitives_from_types(
+        LIBRARY, types, x, y, frequency=array([60, 50]))
+
+    models = [CarsonsEquations(line), CarsonsEquations(ACBN_geometry_line(50))]
+    models[1].phases = ["B", "C", "N"]
+    assert_allclose(z_primitives, build_z_primitives(models, 'numpy'),
+                    rtol=1e-12)
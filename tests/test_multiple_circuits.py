@@ -0,0 +1,95 @@
+from numpy import block, stack
+from numpy.testing import assert_array_almost_equal
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_circuit_impedances,
+    calculate_impedance,
+    perform_block_kron_reduction,
+    perform_kron_reduction,
+)
+from tests.helpers import LineModel
+from tests.test_overhead_line import ACBN_geometry_line
+
+
+def double_circuit_line(height=0.0):
+    line = LineModel({
+        #    resistance   gmr         (x, y)
+        #   ==========================================
+        "A1": (0.000115575, 0.00947938, (-3.0, 20.0 + height)),
+        "B1": (0.000115575, 0.00947938, (-3.0, 18.0 + height)),
+        "C1": (0.000115575, 0.00947938, (-3.0, 16.0 + height)),
+        "A2": (0.000115575, 0.00947938, (3.0, 20.0 + height)),
+        "B2": (0.000115575, 0.00947938, (3.0, 18.0 + height)),
+        "C2": (0.000115575, 0.00947938, (3.0, 16.0 + height)),
+        "N1": (0.000367852, 0.00248107, (-1.5, 23.0 + height)),
+        "N2": (0.000367852, 0.00248107, (1.5, 23.0 + height)),
+    })
+    line.circuits = [["A1", "B1", "C1"], ["A2", "B2", "C2"]]
+    return line
+
+
+def test_double_circuit_conductors():
+    model = CarsonsEquations(double_circuit_line())
+
+    assert model.dimension == 6
+    assert model.conductors == [
+        "A1", "B1", "C1", "A2", "B2", "C2", "N1", "N2"]
+    assert model.build_z_primitive().shape == (8, 8)
+    assert calculate_impedance(model).shape == (6, 6)
+
+
+def test_block_reduction_matches_full_reduction():
+    model = CarsonsEquations(double_circuit_line())
+    z_primitive = model.build_z_primitive()
+
+    Z = calculate_circuit_impedances(model)
+
+    assert len(Z) == 2 and all(len(row) == 2 for row in Z)
+    assert_array_almost_equal(
+        block(Z), perform_kron_reduction(z_primitive, dimension=6))
+    assert_array_almost_equal(Z[1][0], Z[0][1].T)
+
+
+def test_symmetric_tower_has_equal_circuits():
+    Z = calculate_circuit_impedances(CarsonsEquations(double_circuit_line()))
+
+    assert_array_almost_equal(Z[0][0], Z[1][1])
+
+
+def test_circuits_of_different_sizes():
+    model = CarsonsEquations(double_circuit_line())
+    z_primitive = model.build_z_primitive()
+
+    Z = perform_block_kron_reduction(z_primitive, circuits=(3, 2, 1))
+
+    assert [[z.shape for z in row] for row in Z] == [
+        [(3, 3), (3, 2), (3, 1)],
+        [(2, 3), (2, 2), (2, 1)],
+        [(1, 3), (1, 2), (1, 1)],
+    ]
+    assert_array_almost_equal(
+        block(Z), perform_kron_reduction(z_primitive, dimension=6))
+
+
+def test_single_circuit_is_the_phase_impedance():
+    model = CarsonsEquations(ACBN_geometry_line())
+
+    Z = calculate_circuit_impedances(model)
+
+    assert len(Z) == 1
+    assert_array_almost_equal(Z[0][0], calculate_impedance(model))
+
+
+def test_block_reduction_of_a_stack():
+    z_primitives = stack([
+        CarsonsEquations(double_circuit_line(height)).build_z_primitive()
+        for height in (0.0, 1.0, 2.0)
+    ])
+
+    Z = perform_block_kron_reduction(z_primitives, circuits=(3, 3))
+
+    assert Z[0][1].shape == (3, 3, 3)
+    for index, z_primitive in enumerate(z_primitives):
+        expected = perform_block_kron_reduction(z_primitive, circuits=(3, 3))
+        assert_array_almost_equal(Z[0][1][index], expected[0][1])
@@ -0,0 +1,109 @@
+import pytest
+from numpy import array, eye, zeros
+from numpy.linalg import inv
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_admittance,
+    calculate_impedance,
+)
+from carsons.network import (
+    assemble_ybus,
+    assemble_ybus_triplets,
+    invert_line_codes,
+)
+from tests.test_admittance import ACBN_line_with_radius, CBN_line_with_radius
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+
+LINE_CODES = [CarsonsEquations(ACBN_geometry_line()),
+              CarsonsEquations(CBN_geometry_line())]
+
+#  0 -- 1 -- 2
+#       |
+#       3 -- 4
+FROM_BUS = array([0, 1, 1, 3])
+TO_BUS = array([1, 2, 3, 4])
+CODE = array([0, 0, 1, 1])
+LENGTH = array([300.0, 150.0, 500.0, 250.0])
+
+
+def loop_ybus(z_codes, y_shunt=None):
+    Y = zeros((15, 15), dtype=complex)
+    for f, t, code, length in zip(FROM_BUS, TO_BUS, CODE, LENGTH):
+        z = z_codes[code] * length
+        present = abs(z.diagonal()) > 0
+        y = zeros((3, 3), dtype=complex)
+        y[[[i] for i in range(3) if present[i]], present] = \
+            inv(z[present][:, present])
+        shunt = 0 if y_shunt is None else y_shunt[code] * length / 2
+        F, T = slice(3 * f, 3 * f + 3), slice(3 * t, 3 * t + 3)
+        Y[F, F] += y + shunt
+        Y[T, T] += y + shunt
+        Y[F, T] -= y
+        Y[T, F] -= y
+    return Y
+
+
+def test_ybus_matches_segment_loop():
+    z_codes = array([calculate_impedance(model) for model in LINE_CODES])
+
+    triplets = assemble_ybus_triplets(FROM_BUS, TO_BUS, CODE, LENGTH,
+                                      LINE_CODES)
+
+    assert triplets.shape == (15, 15)
+    assert_allclose(triplets.to_dense(), loop_ybus(z_codes), rtol=1e-10)
+
+
+def test_missing_phases_have_no_entries():
+    triplets = assemble_ybus_triplets(FROM_BUS, TO_BUS, CODE, LENGTH,
+                                      LINE_CODES)
+
+    # phase A is missing from line code 1, which alone feeds buses 3 and 4
+    assert not ({9, 12} & set(triplets.row) | {9, 12} & set(triplets.col))
+    assert (triplets.data != 0).all()
+
+
+def test_invert_line_codes():
+    z_codes = array([calculate_impedance(model) for model in LINE_CODES])
+
+    y_codes = invert_line_codes(z_codes)
+
+    assert_allclose(y_codes[0] @ z_codes[0], eye(3), atol=1e-12)
+    assert_allclose(y_codes[1, 0], 0)
+    assert_allclose(y_codes[1, 1:, 1:], inv(z_codes[1, 1:, 1:]))
+
+
+def test_unused_line_codes_are_not_evaluated():
+    class Unused():
+        def __getattr__(self, name):
+            raise AssertionError("an unused line code was evaluated")
+
+    triplets = assemble_ybus_triplets(
+        FROM_BUS, TO_BUS, CODE + 1, LENGTH, [Unused()] + LINE_CODES)
+
+    assert triplets.shape == (15, 15)
+
+
+def test_shunt_admittance():
+    models = [CarsonsEquations(ACBN_line_with_radius()),
+              CarsonsEquations(CBN_line_with_radius())]
+    z_codes = array([calculate_impedance(model) for model in models])
+    y_shunt = array([calculate_admittance(model) for model in models])
+
+    triplets = assemble_ybus_triplets(FROM_BUS, TO_BUS, CODE, LENGTH,
+                                      z_codes, shunt=y_shunt)
+
+    assert_allclose(triplets.to_dense(), loop_ybus(z_codes, y_shunt),
+                    rtol=1e-10)
+
+
+def test_sparse_ybus():
+    pytest.importorskip("scipy")
+    z_codes = array([calculate_impedance(model) for model in LINE_CODES])
+
+    Y = assemble_ybus(FROM_BUS, TO_BUS, CODE, LENGTH, z_codes,
+                      num_buses=6)
+
+    assert Y.shape == (18, 18)
+    assert_allclose(Y.toarray()[:15, :15], loop_ybus(z_codes), rtol=1e-10)
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+from numpy.testing import assert_array_equal
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    MultiConductorCarsonsEquations,
+    calculate_impedance,
+)
+from carsons.models import NormalizedLine, normalize_model
+from tests.helpers import MultiLineModel, concentric_cable, triplex_cable
+from tests.test_overhead_line import ACBN_geometry_line
+
+
+def mapping(line):
+    return {
+        'phases': line.phases,
+        'resistance': line.resistance,
+        'geometric_mean_radius': line.geometric_mean_radius,
+        'wire_positions': line.wire_positions,
+    }
+
+
+@pytest.mark.parametrize("shape", [
+    lambda line: mapping(line),
+    lambda line: SimpleNamespace(**mapping(line)),
+    lambda line: dict(mapping(line), phases=set(line.phases)),
+    lambda line: dict(mapping(line),
+                      phases={phase: phase for phase in line.phases}),
+])
+def test_model_shapes_are_equivalent(shape):
+    line = ACBN_geometry_line()
+    expected = calculate_impedance(CarsonsEquations(line))
+
+    model = CarsonsEquations(shape(line))
+
+    assert model.conductors == ["A", "B", "C", "N"]
+    assert_array_equal(calculate_impedance(model), expected)
+
+
+def test_normalize_is_idempotent():
+    line = normalize_model(ACBN_geometry_line())
+
+    assert isinstance(line, NormalizedLine)
+    assert normalize_model(line) is line
+    assert line.phases == frozenset("ABCN")
+    assert line.frequency == 60
+
+
+def test_conductors_are_ordered_once():
+    model = CarsonsEquations(ACBN_geometry_line())
+
+    assert model.conductors is model.conductors
+    assert model.phase_conductors == ["A", "B", "C"]
+    assert model.dimension == 3
+
+
+def test_cable_models_are_normalized():
+    cable = ConcentricNeutralCarsonsEquations(concentric_cable())
+    conductor = {'resistance': 6e-4, 'gmr': 3.4e-3,
+                 'wire_positions': (0, 1), 'outside_radius': 6.7e-3}
+    triplex = MultiConductorCarsonsEquations(MultiLineModel(
+        {'S1': conductor, 'S2': conductor, 'N': conductor}))
+
+    assert cable.conductors == ["A", "B", "C", "NA", "NB", "NC"]
+    assert triplex.conductors == ["S1", "S2", "N"]
+    assert triplex.is_secondary
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda m: m.pop('wire_positions'), "no 'wire_positions'"),
+    (lambda m: m['resistance'].pop('B'), "'B' has no resistance"),
+    (lambda m: m['geometric_mean_radius'].update(N=0), "positive value"),
+    (lambda m: m['resistance'].update(A=-1e-4), "non-negative"),
+    (lambda m: m['wire_positions'].update(C=(float('nan'), 8.5)),
+     "not finite"),
+    (lambda m: m.update(frequency=0), "frequency of 0"),
+])
+def test_invalid_models(change, message):
+    line = ACBN_geometry_line()
+    model = {name: dict(value) if isinstance(value, dict) else value
+             for name, value in mapping(line).items()}
+    change(model)
+
+    with pytest.raises(ValueError, match=message):
+        CarsonsEquations(model)
+
+
+def without(line, name, conductor=None):
+    attributes = {attribute: getattr(line, attribute) for attribute in (
+        'phases', 'wire_positions', 'geometric_mean_radius', 'resistance',
+        'neutral_strand_gmr', 'neutral_strand_resistance',
+        'neutral_strand_diameter', 'diameter_over_neutral',
+        'neutral_strand_count', 'outside_radius')
+        if hasattr(line, attribute)}
+    if conductor is None:
+        attributes.pop(name)
+    else:
+        attributes[name] = {key: value for key, value
+                            in attributes[name].items() if key != conductor}
+    return attributes
+
+
+@pytest.mark.parametrize("equations, line, name, conductor, message", [
+    (ConcentricNeutralCarsonsEquations, concentric_cable(),
+     'neutral_strand_count', None, "no 'neutral_strand_count'"),
+    (ConcentricNeutralCarsonsEquations, concentric_cable(),
+     'diameter_over_neutral', 'NB', "'NB' has no diameter_over_neutral"),
+    (MultiConductorCarsonsEquations, triplex_cable(),
+     'outside_radius', None, "no 'outside_radius'"),
+    (MultiConductorCarsonsEquations, triplex_cable(),
+     'outside_radius', 'N', "'N' has no outside_radius"),
+])
+def test_missing_attributes_of_the_equation_class(equations, line, name,
+                                                  conductor, message):
+    with pytest.raises(ValueError, match=message):
+        equations(without(line, name, conductor))
+
+
+def test_normalized_models_are_checked_for_each_class():
+    line = normalize_model(without(triplex_cable(), 'outside_radius'))
+
+    assert CarsonsEquations(line).conductors == ["A", "B", "C", "N"]
+    with pytest.raises(ValueError, match="no 'outside_radius'"):
+        MultiConductorCarsonsEquations(line)
@@ -0,0 +1,71 @@
+from itertools import combinations
+from math import hypot
+
+import pytest
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedance_matrix,
+)
+from carsons.optimize import optimize_layout, sequence_coupling, z0_z1_ratio
+from tests.helpers import LineModel, concentric_cable
+from tests.test_overhead_line import ACBN_geometry_line
+
+BOUNDS = ((-1.5, 3.0), (8.0, 10.0))
+CLEARANCE = 0.6
+
+
+def test_layouts_are_pareto_optimal_and_feasible():
+    line = ACBN_geometry_line()
+    model = CarsonsEquations(line)
+    objectives = (sequence_coupling, z0_z1_ratio(3.0))
+
+    layouts = optimize_layout(model, BOUNDS, CLEARANCE, objectives,
+                              fixed={'N'}, population_size=40,
+                              generations=20, seed=1)
+
+    assert layouts
+    for layout in layouts:
+        positions = layout.wire_positions
+        assert positions['N'] == line.wire_positions['N']
+        for (x1, y1), (x2, y2) in combinations(positions.values(), 2):
+            assert hypot(x1 - x2, y1 - y2) >= CLEARANCE
+        for phase in 'ABC':
+            x, y = positions[phase]
+            assert BOUNDS[0][0] <= x <= BOUNDS[0][1]
+            assert BOUNDS[1][0] <= y <= BOUNDS[1][1]
+
+        z_abc = calculate_impedance(CarsonsEquations(LineModel({
+            phase: (line.resistance[phase], line.geometric_mean_radius[phase],
+                    positions[phase])
+            for phase in line.phases
+        })))
+        Z012 = calculate_sequence_impedance_matrix(z_abc)
+        assert_allclose(layout.z_abc, z_abc, rtol=1e-12)
+        assert_allclose(layout.objectives,
+                        [objective(Z012) for objective in objectives])
+
+    for first, second in combinations(layouts, 2):
+        assert not (first.objectives <= second.objectives).all() or \
+            (first.objectives == second.objectives).all()
+
+
+def test_optimized_coupling_beats_the_original_layout():
+    model = CarsonsEquations(ACBN_geometry_line())
+    original = sequence_coupling(
+        calculate_sequence_impedance_matrix(calculate_impedance(model)))
+
+    layouts = optimize_layout(model, BOUNDS, CLEARANCE, fixed={'N'},
+                              population_size=30, generations=20, seed=2)
+
+    assert layouts[0].objectives[0] < original
+
+
+def test_cable_models_are_rejected():
+    model = ConcentricNeutralCarsonsEquations(concentric_cable('AB'))
+
+    with pytest.raises(ValueError):
+        optimize_layout(model, BOUNDS, CLEARANCE)
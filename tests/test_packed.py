@@ -0,0 +1,126 @@
+import os
+from io import BytesIO
+
+import pytest
+from numpy import empty, load, save, stack
+from numpy.testing import assert_allclose, assert_array_equal
+
+from carsons.cache import ImpedanceCache, PersistentImpedanceCache, _decode
+from carsons.carsons import CarsonsEquations, calculate_impedance
+from carsons.kernels import build_z_primitives
+from carsons.packed import (
+    pack_symmetric,
+    packed_dimension,
+    unpack_symmetric,
+)
+from carsons.parallel import calculate_impedances_threaded
+from carsons.store import DATA_FILE, ImpedanceStore, \
+    calculate_impedances_to_store
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+from tests.test_store import LINES
+from tests.test_sweep import line_with
+
+MODELS = [CarsonsEquations(line_with(ACBN_geometry_line(), resistivity=ρ))
+          for ρ in (10, 100, 1000)]
+
+
+def test_round_trip():
+    z_primitives = build_z_primitives(MODELS)
+
+    packed = pack_symmetric(z_primitives)
+
+    assert packed.shape == (3, 10)
+    assert packed.flags.c_contiguous
+    assert_array_equal(unpack_symmetric(packed), z_primitives)
+    assert_array_equal(unpack_symmetric(packed[1]), z_primitives[1])
+
+
+def test_unpack_into_buffer():
+    packed = build_z_primitives(MODELS, packed=True)
+    buffer = empty((3, 4, 4), dtype=complex)
+
+    assert unpack_symmetric(packed, out=buffer) is buffer
+    assert_array_equal(buffer, build_z_primitives(MODELS))
+
+
+def test_packed_dimension():
+    assert packed_dimension(1) == 1
+    assert packed_dimension(6) == 3
+    assert packed_dimension(2**40 * (2**40 + 1) // 2) == 2**40
+    assert packed_dimension(2**52 * (2**52 + 1) // 2) == 2**52
+    with pytest.raises(ValueError):
+        packed_dimension(7)
+
+
+def test_packed_batches():
+    expected = [calculate_impedance(model) for model in MODELS]
+
+    packed = calculate_impedances_threaded(MODELS, max_workers=2,
+                                           packed=True)
+
+    assert packed.shape == (3, 6)
+    assert_allclose(unpack_symmetric(packed), expected, rtol=1e-12)
+
+
+def test_packed_cache():
+    cache = ImpedanceCache(packed=True)
+    model = CarsonsEquations(CBN_geometry_line())
+
+    first = cache.get_or_compute(model)
+    second = cache.get_or_compute(model)
+
+    assert cache.hits == 1
+    assert next(iter(cache._entries.values())).shape == (6,)
+    assert_array_equal(first, calculate_impedance(model))
+    assert_array_equal(second, first)
+
+
+def test_packed_cache_takes_packed_matrices():
+    cache = ImpedanceCache(packed=True)
+    z_abc = calculate_impedance(MODELS[0])
+
+    cache.put("key", pack_symmetric(z_abc))
+
+    assert_allclose(cache.get("key"), z_abc, rtol=1e-12)
+
+
+def test_packed_store_takes_packed_rows(tmp_path):
+    store = ImpedanceStore.create(str(tmp_path / "store"), 3, (3, 3),
+                                  packed=True)
+    z_abc = stack([calculate_impedance(model) for model in MODELS])
+
+    store[0] = pack_symmetric(z_abc[0])
+    store[1:] = pack_symmetric(z_abc[1:])
+
+    assert_allclose(store[:], z_abc, rtol=1e-12)
+
+
+def test_packed_store(tmp_path):
+    path = str(tmp_path / "store")
+    calculate_impedances_to_store(path, LINES, chunk_size=4, packed=True)
+
+    store = ImpedanceStore(path)
+    assert store.packed
+    assert load(os.path.join(path, DATA_FILE)).shape == (len(LINES), 6)
+    assert store[2:5].shape == (3, 3, 3)
+    for position, line in enumerate(LINES):
+        assert_allclose(store[position],
+                        calculate_impedance(CarsonsEquations(line)))
+
+
+def test_persistent_cache_packs_entries(tmp_path):
+    cache = PersistentImpedanceCache(str(tmp_path / "cache.sqlite"))
+    model = MODELS[0]
+    record = cache.get_record(model)
+
+    z_primitive, = cache._connection().execute(
+        "SELECT z_primitive FROM impedances").fetchone()
+    assert_array_equal(cache.get(model).z_primitive, record.z_primitive)
+    assert load(BytesIO(z_primitive)).shape == (10,)
+
+
+def test_dense_entries_still_decode():
+    z_abc = calculate_impedance(MODELS[0])
+    buffer = BytesIO()
+    save(buffer, z_abc)
+    assert_array_equal(_decode(buffer.getvalue()), z_abc)
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    calculate_impedance,
+)
+from carsons import parallel
+from carsons.parallel import calculate_impedances_threaded, limit_blas_threads
+from tests.helpers import concentric_cable
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+
+
+@pytest.mark.parametrize("shard_size", [None, 1, 3])
+def test_threaded_batch_matches_sequential(shard_size):
+    lines = [ACBN_geometry_line(60), ACBN_geometry_line(50),
+             CBN_geometry_line(60)] * 4
+    models = [CarsonsEquations(line) for line in lines]
+
+    z_abc = calculate_impedances_threaded(
+        models, max_workers=4, shard_size=shard_size, blas_threads=1)
+
+    assert z_abc.shape == (len(models), 3, 3)
+    for model, actual in zip(models, z_abc):
+        assert_allclose(actual, calculate_impedance(model), rtol=1e-12)
+
+
+def test_concurrent_callers_share_models_safely():
+    cable = concentric_cable('AB')
+    wire_positions = dict(cable.wire_positions)
+    expected = calculate_impedance(ConcentricNeutralCarsonsEquations(cable))
+
+    def calculate(_):
+        models = [ConcentricNeutralCarsonsEquations(cable) for _ in range(8)]
+        return calculate_impedances_threaded(models, max_workers=2)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(calculate, range(8)))
+
+    assert cable.wire_positions == wire_positions
+    for z_abc in results:
+        for actual in z_abc:
+            assert_allclose(actual, expected, rtol=1e-12)
+
+
+class RecordedLimits():
+    applied: list = []
+
+    def __init__(self, limits, user_api):
+        self.applied.append(limits)
+
+    def restore_original_limits(self):
+        self.applied.append(None)
+
+
+def test_nested_blas_limits_use_the_smallest(monkeypatch):
+    monkeypatch.setattr(parallel, 'threadpool_limits', RecordedLimits)
+    RecordedLimits.applied = []
+
+    with limit_blas_threads(4):
+        with limit_blas_threads(2):
+            with limit_blas_threads(3):
+                pass
+        assert RecordedLimits.applied == [4, 2, 4]
+
+    assert RecordedLimits.applied == [4, 2, 4, None]
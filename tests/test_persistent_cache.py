@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from numpy.testing import assert_allclose
+
+import carsons.cache
+from carsons.cache import (
+    ImpedanceCache,
+    PersistentImpedanceCache,
+    content_hash,
+)
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedances,
+    convert_geometric_model,
+)
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+from tests.test_sweep import line_with
+
+
+def test_records_round_trip(tmp_path):
+    cache = PersistentImpedanceCache(str(tmp_path / "cache.sqlite"))
+    model = CarsonsEquations(ACBN_geometry_line())
+
+    assert cache.get(model) is None
+    computed = cache.get_record(model)
+    stored = cache.get(model)
+
+    assert_allclose(stored.z_primitive, model.build_z_primitive())
+    assert_allclose(stored.z_abc, calculate_impedance(model))
+    z1, z0 = calculate_sequence_impedances(stored.z_abc)
+    assert stored.z1 == computed.z1 == z1
+    assert stored.z0 == computed.z0 == z0
+
+
+def test_key_depends_on_inputs_and_version(monkeypatch):
+    model = CarsonsEquations(ACBN_geometry_line())
+    key = content_hash(model)
+
+    assert content_hash(CarsonsEquations(ACBN_geometry_line())) == key
+    assert content_hash(CarsonsEquations(ACBN_geometry_line(50))) != key
+    monkeypatch.setattr(carsons.cache, "VERSION", "0.0.0-other")
+    assert content_hash(model) != key
+
+
+def test_entries_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    subprocess.run([
+        sys.executable, "-c",
+        "from carsons.cache import PersistentImpedanceCache\n"
+        "from carsons.carsons import convert_geometric_model\n"
+        "from tests.test_overhead_line import ACBN_geometry_line\n"
+        f"cache = PersistentImpedanceCache({path!r})\n"
+        "convert_geometric_model(ACBN_geometry_line(), cache=cache)\n",
+    ], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+    cache = PersistentImpedanceCache(path)
+    record = cache.get(CarsonsEquations(ACBN_geometry_line()))
+
+    assert record is not None
+    assert_allclose(record.z_abc,
+                    convert_geometric_model(ACBN_geometry_line()))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PersistentImpedanceCache(str(tmp_path / "cache.sqlite"),
+                                     max_entries=2, touch_interval=0)
+    models = [CarsonsEquations(line_with(ACBN_geometry_line(),
+                                         resistivity=ρ))
+              for ρ in (10, 100, 1000)]
+
+    cache.get_record(models[0])
+    cache.get_record(models[1])
+    cache.get(models[0])
+    cache.get_record(models[2])
+
+    assert len(cache) == 2
+    assert cache.get(models[1]) is None
+    assert cache.get(models[0]) is not None
+
+
+def test_caches_plug_into_calculate_impedance(tmp_path):
+    model = CarsonsEquations(CBN_geometry_line())
+    expected = calculate_impedance(model)
+
+    for cache in (ImpedanceCache(),
+                  PersistentImpedanceCache(str(tmp_path / "cache.sqlite"))):
+        assert_allclose(calculate_impedance(model, cache=cache), expected)
+        assert_allclose(calculate_impedance(model, cache=cache), expected)
+        assert_allclose(
+            convert_geometric_model(CBN_geometry_line(), cache=cache),
+            expected)
+
+
+def test_concurrent_writers(tmp_path):
+    cache = PersistentImpedanceCache(str(tmp_path / "cache.sqlite"))
+    models = [CarsonsEquations(line_with(ACBN_geometry_line(),
+                                         resistivity=10 + n))
+              for n in range(40)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(cache.get_or_compute, models + models))
+
+    assert len(cache) == 40
+    for model, z_abc in zip(models + models, results):
+        assert_allclose(z_abc, calculate_impedance(model))
+
+
+def test_recent_hits_do_not_write(tmp_path):
+    cache = PersistentImpedanceCache(str(tmp_path / "cache.sqlite"))
+    model = CarsonsEquations(ACBN_geometry_line())
+    cache.get_record(model)
+    connection = cache._connection()
+    changes = connection.total_changes
+
+    assert cache.get(model) is not None
+    assert connection.total_changes == changes
@@ -0,0 +1,80 @@
+import pytest
+from numpy import array, complex64, complex128
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedance_matrix,
+    perform_kron_reduction,
+)
+from tests.helpers import LineModel
+from tests.test_overhead_line import (
+    ACBN_geometry_line,
+    CBN_geometry_line,
+    CN_geometry_line,
+)
+
+# Worst relative error of the single precision path, normalised by the
+# largest entry; see the accuracy table in the README.
+SINGLE_PRECISION_RTOL = 1e-6
+
+
+@pytest.mark.parametrize("line", [
+    ACBN_geometry_line, CBN_geometry_line, CN_geometry_line])
+@pytest.mark.parametrize("frequency", [50, 60])
+def test_single_precision_matches_double_precision(line, frequency):
+    double = calculate_impedance(CarsonsEquations(line(ƒ=frequency)))
+    single = calculate_impedance(
+        CarsonsEquations(line(ƒ=frequency), dtype=complex64))
+
+    assert single.dtype == complex64
+    assert_allclose(single, double,
+                    atol=SINGLE_PRECISION_RTOL * abs(double).max())
+
+    z_012_double = calculate_sequence_impedance_matrix(double)
+    z_012_single = calculate_sequence_impedance_matrix(single)
+    assert z_012_single.dtype == complex64
+    assert_allclose(z_012_single, z_012_double,
+                    atol=SINGLE_PRECISION_RTOL * abs(z_012_double).max())
+
+
+def test_kron_reduction_casts_to_requested_precision():
+    z_primitive = CarsonsEquations(ACBN_geometry_line()).build_z_primitive()
+
+    assert z_primitive.dtype == complex128
+    assert perform_kron_reduction(z_primitive, dtype=complex64).dtype == \
+        complex64
+
+
+def test_ill_conditioned_neutrals_are_reduced_in_double_precision():
+    z_primitive = array([
+        [2, 0, 0, 1, 1],
+        [0, 2, 0, 1, 1],
+        [0, 0, 2, 1, 1],
+        [1, 1, 1, 1, 1],
+        [1, 1, 1, 1, 1 + 1e-6],
+    ], dtype=complex128)
+    double = perform_kron_reduction(z_primitive)
+
+    z_abc = perform_kron_reduction(z_primitive, dtype=complex64)
+
+    assert z_abc.dtype == complex128
+    assert_allclose(z_abc, double, rtol=1e-12)
+
+
+def test_ill_conditioned_models_are_not_rounded_to_single_precision():
+    # two low resistance neutrals one GMR apart
+    line = LineModel({
+        "A": (0.000115575, 0.00947938, (0.762, 8.5344)),
+        "B": (0.000115575, 0.00947938, (0.0, 8.5344)),
+        "C": (0.000115575, 0.00947938, (2.1336, 8.5344)),
+        "N1": (1e-7, 0.00248107, (1.2192, 7.3152)),
+        "N2": (1e-7, 0.00248107, (1.2217, 7.3152)),
+    })
+    double = calculate_impedance(CarsonsEquations(line))
+
+    single = calculate_impedance(CarsonsEquations(line, dtype=complex64))
+
+    assert single.dtype == complex128
+    assert_allclose(single, double, rtol=1e-12)
@@ -0,0 +1,165 @@
+import asyncio
+
+from numpy import array
+from numpy.testing import assert_allclose
+
+from carsons.cache import ImpedanceCache
+from carsons.carsons import CarsonsEquations, calculate_impedance
+from carsons.service import (
+    ImpedanceBatcher,
+    ImpedanceService,
+    equations_from_request,
+    http_request,
+    run,
+)
+from tests.helpers import line_request
+from tests.test_overhead_line import ACBN_geometry_line
+
+ACBN_Z_ABC = calculate_impedance(CarsonsEquations(ACBN_geometry_line()))
+
+
+def test_request_builds_equations():
+    model = equations_from_request(line_request())
+
+    assert isinstance(model, CarsonsEquations)
+    assert_allclose(calculate_impedance(model), ACBN_Z_ABC)
+
+
+def test_concurrent_requests_are_coalesced_into_one_batch():
+    models = [equations_from_request(line_request(height=8 + 0.1 * n))
+              for n in range(10)]
+    batcher = ImpedanceBatcher(window=0.05)
+
+    async def calculate_all():
+        return await asyncio.gather(*map(batcher.calculate, models))
+
+    results = run(calculate_all())
+
+    assert batcher.metrics.batches == 1
+    assert dict(batcher.metrics.batch_sizes) == {10: 1}
+    for model, z_abc in zip(models, results):
+        assert_allclose(z_abc, calculate_impedance(model), rtol=1e-12)
+
+
+def test_repeated_configurations_are_computed_once():
+    batcher = ImpedanceBatcher(window=0.01)
+
+    async def calculate_repeats():
+        first = await asyncio.gather(*(
+            batcher.calculate(equations_from_request(line_request()))
+            for _ in range(5)))
+        second = await batcher.calculate(
+            equations_from_request(line_request()))
+        return first + [second]
+
+    results = run(calculate_repeats())
+
+    assert dict(batcher.metrics.batch_sizes) == {1: 1}
+    assert batcher.cache.hits == 1
+    for z_abc in results:
+        assert z_abc is results[0]
+
+
+def test_cache_freezes_its_own_copy():
+    cache = ImpedanceCache()
+    model = CarsonsEquations(ACBN_geometry_line())
+
+    computed = calculate_impedance(model, cache=cache)
+    cached = calculate_impedance(model, cache=cache)
+
+    assert computed.flags.writeable
+    assert not cached.flags.writeable
+    assert cached is not computed
+    assert_allclose(cached, computed)
+
+
+def test_service_over_http():
+    async def exchange():
+        service = ImpedanceService(ImpedanceBatcher(window=0.001))
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        impedance = await http_request(reader, writer, "POST", "/impedance",
+                                       line_request())
+        bad = await http_request(reader, writer, "POST", "/impedance",
+                                 {"equations": "Unknown", "model": {}})
+        metrics = await http_request(reader, writer, "GET", "/metrics")
+
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return impedance, bad, metrics
+
+    (status, body), (bad_status, _), (_, metrics) = run(exchange())
+
+    assert status == 200
+    assert_allclose(array(body["real"]) + 1j * array(body["imag"]),
+                    ACBN_Z_ABC)
+    assert bad_status == 400
+    assert metrics["requests"] == 1
+    assert metrics["batches"] == 1
+
+
+def test_malformed_requests_are_rejected():
+    async def exchange(head):
+        service = ImpedanceService(ImpedanceBatcher(window=0.001))
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        writer.write(head)
+        status_line = await reader.readline()
+        closed = (await reader.read()).endswith(b"}")
+
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return status_line, closed
+
+    for head in (b"GARBAGE\r\n\r\n",
+                 b"POST /impedance HTTP/1.1\r\nNo colon\r\n\r\n",
+                 b"POST /impedance HTTP/1.1\r\nContent-Length: x\r\n\r\n"):
+        status_line, closed = run(exchange(head))
+
+        assert status_line.startswith(b"HTTP/1.1 400")
+        assert closed
+
+
+def test_service_over_unix_socket(tmp_path):
+    path = str(tmp_path / "carsons.sock")
+
+    async def exchange():
+        server = await ImpedanceService().start(unix_path=path)
+        reader, writer = await asyncio.open_unix_connection(path)
+        response = await http_request(reader, writer, "POST", "/impedance",
+                                      line_request())
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    status, _ = run(exchange())
+
+    assert status == 200
+
+
+def test_relabelled_requests_share_an_evaluation():
+    request = line_request()
+    relabelled = line_request()
+    for name in ("wire_positions", "geometric_mean_radius", "resistance"):
+        values = relabelled["model"][name]
+        values["A"], values["B"] = values["B"], values["A"]
+    models = [equations_from_request(request),
+              equations_from_request(relabelled)]
+    batcher = ImpedanceBatcher(window=0.01, symmetries=True)
+
+    async def calculate_all():
+        return await asyncio.gather(*map(batcher.calculate, models))
+
+    results = run(calculate_all())
+
+    assert dict(batcher.metrics.batch_sizes) == {1: 1}
+    for model, z_abc in zip(models, results):
+        assert_allclose(z_abc, calculate_impedance(model), rtol=1e-12)
+    assert_allclose(results[1][0, 0], results[0][1, 1])
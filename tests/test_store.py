@@ -0,0 +1,116 @@
+import pytest
+from numpy import memmap
+from numpy.testing import assert_array_almost_equal
+
+from carsons.carsons import CarsonsEquations, calculate_impedance
+from carsons.dispatch import last_strategy
+from carsons.store import ImpedanceStore, calculate_impedances_to_store
+from tests.test_overhead_line import (
+    ACBN_geometry_line,
+    CBN_geometry_line,
+    CN_geometry_line,
+)
+from tests.test_sweep import line_with
+
+LINES = [ACBN_geometry_line(), CBN_geometry_line(), CN_geometry_line()] * 3
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingEquations(CarsonsEquations):
+    calls = 0
+    crash_at = None
+
+    def build_z_primitive(self):
+        if CrashingEquations.calls == CrashingEquations.crash_at:
+            raise Crash()
+        CrashingEquations.calls += 1
+        return super().build_z_primitive()
+
+
+def test_store_holds_impedances(tmp_path):
+    path = str(tmp_path / "store")
+    calculate_impedances_to_store(path, LINES, chunk_size=4)
+
+    store = ImpedanceStore(path)
+    assert len(store) == len(LINES)
+    assert store.is_complete()
+    assert isinstance(store.data, memmap)
+    for position, line in enumerate(LINES):
+        expected = calculate_impedance(CarsonsEquations(line))
+        assert_array_almost_equal(store[position], expected)
+
+
+def test_store_slices_without_copying(tmp_path):
+    path = str(tmp_path / "store")
+    calculate_impedances_to_store(path, LINES, chunk_size=4)
+
+    store = ImpedanceStore(path)
+    subset = store[2:5]
+    assert subset.shape == (3, 3, 3)
+    assert subset.base is not None
+    assert_array_almost_equal(
+        store[[0, 3]][1], calculate_impedance(CarsonsEquations(LINES[3])))
+
+
+def test_restarted_run_skips_completed_chunks(tmp_path):
+    path = str(tmp_path / "store")
+    CrashingEquations.calls, CrashingEquations.crash_at = 0, 6
+    with pytest.raises(Crash):
+        calculate_impedances_to_store(
+            path, LINES, equations=CrashingEquations, chunk_size=4)
+
+    assert ImpedanceStore(path).completed == {0}
+
+    CrashingEquations.calls, CrashingEquations.crash_at = 0, None
+    store = calculate_impedances_to_store(
+        path, LINES, equations=CrashingEquations, chunk_size=4)
+
+    assert CrashingEquations.calls == len(LINES) - 4
+    assert store.is_complete()
+    assert_array_almost_equal(
+        store[8], calculate_impedance(CarsonsEquations(LINES[8])))
+
+
+def test_resuming_with_different_models_is_refused(tmp_path):
+    path = str(tmp_path / "store")
+    calculate_impedances_to_store(path, LINES, chunk_size=4)
+
+    with pytest.raises(ValueError):
+        calculate_impedances_to_store(path, LINES[:5], chunk_size=4)
+
+
+def test_resuming_with_changed_models_is_refused(tmp_path):
+    path = str(tmp_path / "store")
+    calculate_impedances_to_store(path, LINES, chunk_size=4)
+    changed = [line_with(LINES[0], resistivity=10)] + LINES[1:]
+
+    with pytest.raises(ValueError):
+        calculate_impedances_to_store(path, changed, chunk_size=4)
+
+
+class CountedEquations(CarsonsEquations):
+    built = 0
+
+    def __init__(self, model):
+        CountedEquations.built += 1
+        super().__init__(model)
+
+
+def test_chunks_are_built_once_and_computed_as_batches(tmp_path):
+    path = str(tmp_path / "store")
+    CountedEquations.built = 0
+
+    calculate_impedances_to_store(path, LINES, equations=CountedEquations,
+                                  chunk_size=3)
+
+    assert CountedEquations.built == len(LINES)
+    assert last_strategy() != 'scalar'
+
+    # resuming a complete store only rebuilds its models to check them
+    CountedEquations.built = 0
+    calculate_impedances_to_store(path, LINES, equations=CountedEquations,
+                                  chunk_size=3)
+    assert CountedEquations.built == len(LINES)
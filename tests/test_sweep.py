@@ -0,0 +1,196 @@
+import pytest
+from numpy import array, diag, exp, linspace, pi, sqrt
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    calculate_impedance,
+)
+from carsons.sweep import (
+    conductor_internal_impedance,
+    internal_impedance,
+    sweep_impedance,
+    temperature_adjusted_resistance,
+)
+from tests.helpers import LineModel, concentric_cable
+from tests.test_overhead_line import ACBN_geometry_line, CBN_geometry_line
+
+
+def line_with(line, resistivity=100, frequency=60, resistance=None):
+    line = LineModel({
+        phase: (
+            (resistance or line.resistance)[phase],
+            line.geometric_mean_radius[phase],
+            line.wire_positions[phase],
+        )
+        for phase in line.phases
+    })
+    line.resistivity = resistivity
+    line.frequency = frequency
+    return line
+
+
+def test_resistivity_is_a_model_parameter():
+    default = CarsonsEquations(line_with(ACBN_geometry_line()))
+    wet = CarsonsEquations(line_with(ACBN_geometry_line(), resistivity=10))
+
+    assert default.ρ == 100
+    assert wet.ρ == 10
+    assert not (calculate_impedance(default) ==
+                calculate_impedance(wet)).all()
+
+
+@pytest.mark.parametrize("line", [ACBN_geometry_line(), CBN_geometry_line()])
+def test_resistivity_frequency_grid(line):
+    resistivities = array([10, 100, 1000])
+    frequencies = array([50, 60])
+    model = CarsonsEquations(line)
+
+    z_abc = sweep_impedance(model, resistivity=resistivities[:, None],
+                            frequency=frequencies[None, :])
+
+    assert z_abc.shape == (3, 2, 3, 3)
+    for i, ρ in enumerate(resistivities):
+        for j, ƒ in enumerate(frequencies):
+            expected = calculate_impedance(CarsonsEquations(
+                line_with(line, resistivity=ρ, frequency=ƒ)))
+            assert_allclose(z_abc[i, j], expected, rtol=1e-12)
+
+
+def test_temperature_sweep():
+    line = ACBN_geometry_line()
+    model = CarsonsEquations(line)
+    temperatures = linspace(-20, 75, 5)
+    resistances = temperature_adjusted_resistance(model, temperatures)
+
+    z_abc = sweep_impedance(model, resistivity=array([30, 300])[:, None],
+                            resistance=resistances[None, :])
+
+    assert z_abc.shape == (2, 5, 3, 3)
+    for j, T in enumerate(temperatures):
+        adjusted = {
+            phase: r * (1 + 0.00403 * (T - 20))
+            for phase, r in line.resistance.items()
+        }
+        expected = calculate_impedance(CarsonsEquations(line_with(
+            line, resistivity=300, resistance=adjusted)))
+        assert_allclose(z_abc[1, j], expected, rtol=1e-12)
+
+
+def test_sweep_of_cable_with_resistance_mapping():
+    model = ConcentricNeutralCarsonsEquations(concentric_cable('AB'))
+    phase_resistance = array([1.0, 1.1, 1.2]) * model.r['A']
+
+    z_primitive = sweep_impedance(
+        model, resistance={'A': phase_resistance}, reduce=False)
+
+    assert z_primitive.shape == (3, 5, 5)
+    for index, r in enumerate(phase_resistance):
+        model.r['A'] = r
+        assert_allclose(z_primitive[index], model.build_z_primitive(),
+                        rtol=1e-12)
+
+
+@pytest.mark.parametrize("x, ratio", [
+    # R_ac / R_dc of a solid round conductor against x = r·√(ωμ/ρ_c)
+    (1, 1.0052), (2, 1.0782), (3, 1.3181), (5, 2.0427), (10, 3.7986),
+    (30, 10.8610),
+])
+def test_skin_effect_resistance_ratio(x, ratio):
+    resistance, radius = 1e-4, 0.01
+    ρ_c = resistance * pi * radius**2
+    frequency = x**2 * ρ_c / radius**2 / (2 * pi * 4e-7 * pi)
+
+    z_internal = internal_impedance(resistance, radius, frequency)
+
+    assert z_internal.real / resistance == pytest.approx(ratio, abs=1e-4)
+
+
+def test_internal_impedance_limits():
+    z_internal = internal_impedance(1e-4, 0.01, [0, 1, 1e7])
+
+    assert z_internal[0] == 1e-4
+    # the DC internal inductance of a solid conductor is μ/8π
+    assert z_internal[1].imag == pytest.approx(2 * pi * 1e-7 / 2, rel=1e-6)
+    # far past the skin depth δ, R_ac ≈ R_dc·(r/2δ + 1/4)
+    δ = sqrt(2 * 1e-4 * pi * 0.01**2 / (2 * pi * 1e7 * 4e-7 * pi))
+    assert z_internal[2].real == pytest.approx(
+        1e-4 * (0.01 / (2 * δ) + 0.25), rel=1e-3)
+
+
+def solid_conductor_line(radius=0.01):
+    line = line_with(ACBN_geometry_line())
+    line.conductor_radius = {phase: radius for phase in line.phases}
+    for phase in line.phases:
+        line.geometric_mean_radius[phase] = radius * exp(-1/4)
+    return line
+
+
+def test_skin_effect_in_harmonic_sweep():
+    line = solid_conductor_line()
+    model = CarsonsEquations(line)
+    harmonics = 60 * array([1, 5, 11, 25])
+
+    plain = sweep_impedance(model, frequency=harmonics, reduce=False)
+    skin = sweep_impedance(model, frequency=harmonics, reduce=False,
+                           skin_effect=True)
+
+    # the self impedances use the internal impedance in place of the DC
+    # resistance and internal reactance; the mutuals are unchanged
+    for index, ƒ in enumerate(harmonics):
+        expected = internal_impedance(array(list(model.r.values())), 0.01,
+                                      ƒ)
+        Δ = skin[index] - plain[index]
+        assert_allclose(Δ - diag(Δ.diagonal()), 0)
+        assert_allclose(
+            Δ.diagonal(),
+            expected - array(list(model.r.values())) -
+            1j * 2 * pi * ƒ * 4e-7 * pi / (8 * pi))
+    assert (skin.real.diagonal(axis1=-2, axis2=-1) >=
+            plain.real.diagonal(axis1=-2, axis2=-1)).all()
+
+
+def test_skin_effect_is_cached_per_conductor_type():
+    model = CarsonsEquations(solid_conductor_line(radius=0.0123))
+    harmonics = 60 * array([3, 5, 7])
+    conductor_internal_impedance.cache_clear()
+
+    first = sweep_impedance(model, frequency=harmonics, skin_effect=True)
+    second = sweep_impedance(model, frequency=harmonics, skin_effect=True)
+
+    assert_allclose(first, second)
+    # the phase and neutral conductors are two conductor types
+    assert conductor_internal_impedance.cache_info().misses == 2
+    assert conductor_internal_impedance.cache_info().hits == 6
+
+
+def test_skin_effect_with_resistance_sweep():
+    model = CarsonsEquations(solid_conductor_line())
+    temperatures = array([0, 50])
+    resistance = temperature_adjusted_resistance(model, temperatures)
+
+    z_abc = sweep_impedance(model, frequency=300, resistance=resistance,
+                            skin_effect=True)
+
+    for index, temperature in enumerate(temperatures):
+        expected = sweep_impedance(
+            model, frequency=300, resistance=resistance[index],
+            skin_effect=True)
+        assert_allclose(z_abc[index], expected, rtol=1e-12)
+
+
+def test_skin_effect_needs_every_conductor_radius():
+    model = CarsonsEquations(ACBN_geometry_line())
+
+    with pytest.raises(ValueError, match="'A' has no conductor_radius"):
+        sweep_impedance(model, frequency=60, skin_effect=True)
+
+
+def test_skin_effect_rejects_bundles():
+    line = solid_conductor_line()
+    line.bundles = {'A': (2, 0.4)}
+
+    with pytest.raises(ValueError, match="bundled"):
+        sweep_impedance(CarsonsEquations(line), frequency=60,
+                        skin_effect=True)
@@ -0,0 +1,105 @@
+from numpy.testing import assert_allclose
+
+from carsons.cache import ImpedanceCache, canonical_form, model_key
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    calculate_impedance,
+)
+from tests.helpers import LineModel, concentric_cable
+
+#                resistance   gmr
+PHASE_WIRE = (0.000115575, 0.00947938)
+NEUTRAL_WIRE = (0.000367852, 0.00248107)
+
+
+def line(positions, wires=None):
+    """ A line with the phase and neutral wires at `positions`, which map
+        conductors to (x, y).
+    """
+    wires = wires or {}
+    return LineModel({
+        conductor: wires.get(
+            conductor,
+            NEUTRAL_WIRE if conductor.startswith("N") else PHASE_WIRE,
+        ) + (position,)
+        for conductor, position in positions.items()
+    })
+
+
+ABC = {"A": (0.762, 8.5344), "B": (0.0, 8.5344), "C": (2.1336, 8.5344),
+       "N": (1.2192, 7.3152)}
+BCA = {"B": (0.762, 8.5344), "C": (0.0, 8.5344), "A": (2.1336, 8.5344),
+       "N": (1.2192, 7.3152)}
+MIRRORED = {"A": (-0.762, 8.5344), "B": (0.0, 8.5344),
+            "C": (-2.1336, 8.5344), "N": (-1.2192, 7.3152)}
+SHIFTED = {phase: (x + 5.0, y) for phase, (x, y) in ABC.items()}
+
+
+def test_relabelled_and_reflected_lines_share_a_key():
+    key, _ = canonical_form(CarsonsEquations(line(ABC)))
+
+    for positions in (BCA, MIRRORED, SHIFTED):
+        other, _ = canonical_form(CarsonsEquations(line(positions)))
+        assert other == key
+
+
+def test_different_lines_have_different_keys():
+    key, _ = canonical_form(CarsonsEquations(line(ABC)))
+    higher = {phase: (x, y + 1) for phase, (x, y) in ABC.items()}
+    thicker = line(ABC, {"A": (0.000115575, 0.01)})
+
+    assert canonical_form(CarsonsEquations(line(higher)))[0] != key
+    assert canonical_form(CarsonsEquations(thicker))[0] != key
+    assert canonical_form(ModifiedCarsonsEquations(line(ABC)))[0] != key
+
+
+def test_neutrals_may_be_relabelled():
+    two_neutrals = dict(ABC, N1=(0.0, 7.0), N2=(1.5, 7.3))
+    swapped = dict(ABC, N1=(1.5, 7.3), N2=(0.0, 7.0))
+
+    assert canonical_form(CarsonsEquations(line(two_neutrals)))[0] == \
+        canonical_form(CarsonsEquations(line(swapped)))[0]
+
+
+def test_cache_derives_permuted_impedances():
+    cache = ImpedanceCache()
+    first = CarsonsEquations(line(ABC))
+    cache.get_or_compute(first, symmetries=True)
+
+    computed = []
+
+    def compute(model):
+        computed.append(model)
+        return calculate_impedance(model)
+
+    for positions in (BCA, MIRRORED, SHIFTED):
+        model = CarsonsEquations(line(positions))
+        z_abc = cache.get_or_compute(model, compute, symmetries=True)
+        assert_allclose(z_abc, calculate_impedance(model), rtol=1e-9)
+
+    assert computed == []
+    assert len(cache) == 1 and cache.hits == 3
+
+
+def test_missing_phases_are_permuted():
+    cache = ImpedanceCache()
+    ac = {phase: ABC[phase] for phase in "ACN"}
+    bc = {"B": ABC["A"], "C": ABC["C"], "N": ABC["N"]}
+
+    cache.get_or_compute(CarsonsEquations(line(ac)), symmetries=True)
+    model = CarsonsEquations(line(bc))
+    z_abc = cache.get_or_compute(model, symmetries=True)
+
+    assert cache.hits == 1
+    assert_allclose(z_abc, calculate_impedance(model), rtol=1e-9)
+    assert not z_abc[0].any()
+
+
+def test_cables_are_not_relabelled():
+    model = ConcentricNeutralCarsonsEquations(concentric_cable())
+
+    key, order = canonical_form(model)
+
+    assert key == model_key(model) and order is None
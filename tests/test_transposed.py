@@ -0,0 +1,84 @@
+import pytest
+from numpy import array
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    ConcentricNeutralCarsonsEquations,
+    ModifiedCarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedances,
+)
+from carsons.transposed import calculate_transposed_impedances
+from tests.helpers import LineModel, concentric_cable
+from tests.test_overhead_line import (
+    ACBN_geometry_line,
+    ACBN_line_phase_impedance_60Hz,
+    CBN_geometry_line,
+    OHM_PER_MILE_TO_OHM_PER_METER,
+)
+from tests.test_sweep import line_with
+
+DUAL_NEUTRAL_LINE = {
+    "A": (0.000115575, 0.00947938, (0.762, 8.5344)),
+    "B": (0.000115575, 0.00947938, (0.0, 8.5344)),
+    "C": (0.000115575, 0.00947938, (2.1336, 8.5344)),
+    "N1": (0.000367852, 0.00248107, (1.2192, 7.3152)),
+    "N2": (0.000367852, 0.00248107, (1.2192, 6.0960)),
+}
+
+
+@pytest.mark.parametrize("model", [
+    CarsonsEquations(ACBN_geometry_line()),
+    ModifiedCarsonsEquations(ACBN_geometry_line()),
+    CarsonsEquations(ACBN_geometry_line(ƒ=50)),
+    CarsonsEquations(LineModel(DUAL_NEUTRAL_LINE)),
+    CarsonsEquations(LineModel({
+        phase: conductor for phase, conductor in DUAL_NEUTRAL_LINE.items()
+        if not phase.startswith("N")
+    })),
+    ConcentricNeutralCarsonsEquations(concentric_cable()),
+])
+def test_matches_full_path(model):
+    z1, z0 = calculate_sequence_impedances(calculate_impedance(model))
+
+    transposed = calculate_transposed_impedances([model])
+
+    assert_allclose(transposed.z1, [z1], rtol=1e-12)
+    assert_allclose(transposed.z0, [z0], rtol=1e-12)
+
+
+def test_ieee_601_sequence_impedances():
+    z1, z0 = calculate_sequence_impedances(ACBN_line_phase_impedance_60Hz())
+
+    transposed = calculate_transposed_impedances(
+        [CarsonsEquations(ACBN_geometry_line())])
+
+    # the published matrix is rounded to 1e-4 Ω/mile
+    assert_allclose(transposed.z1 / OHM_PER_MILE_TO_OHM_PER_METER,
+                    [z1 / OHM_PER_MILE_TO_OHM_PER_METER], atol=1e-3)
+    assert_allclose(transposed.z0 / OHM_PER_MILE_TO_OHM_PER_METER,
+                    [z0 / OHM_PER_MILE_TO_OHM_PER_METER], atol=1e-3)
+
+
+def test_batch():
+    models = [CarsonsEquations(line_with(ACBN_geometry_line(),
+                                         resistivity=ρ))
+              for ρ in (10, 100, 1000)]
+
+    transposed = calculate_transposed_impedances(models)
+
+    assert transposed.z_self.shape == (3,)
+    for index, model in enumerate(models):
+        Z = calculate_impedance(model)
+        assert_allclose(transposed.z_self[index],
+                        Z.diagonal().mean(), rtol=1e-12)
+        assert_allclose(transposed.z_mutual[index],
+                        array([Z[0, 1], Z[0, 2], Z[1, 2]]).mean(),
+                        rtol=1e-12)
+
+
+def test_missing_phase():
+    with pytest.raises(ValueError, match="every phase"):
+        calculate_transposed_impedances(
+            [CarsonsEquations(CBN_geometry_line())])
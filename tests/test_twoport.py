@@ -0,0 +1,86 @@
+from numpy import array, block, eye, stack
+from numpy.testing import assert_allclose, assert_array_almost_equal
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_admittance,
+    calculate_impedance,
+)
+from carsons.twoport import calculate_abcd, calculate_pi_model
+from tests.test_admittance import ACBN_line_with_radius, CBN_line_with_radius
+
+
+def line_code(line):
+    model = CarsonsEquations(line)
+    return calculate_impedance(model), calculate_admittance(model)
+
+
+def two_port(abcd, index):
+    return block([[abcd.A[index], abcd.B[index]],
+                  [abcd.C[index], abcd.D[index]]])
+
+
+def test_abcd_matches_power_series():
+    z, y = line_code(ACBN_line_with_radius())
+    lengths = array([100.0, 2000.0, 50000.0])
+
+    abcd = calculate_abcd(z, y, lengths)
+
+    for A, length in zip(abcd.A, lengths):
+        # cosh(√(ZY) ℓ) = Σ (ZY ℓ²)ᵏ / (2k)!
+        ZYℓ2 = z @ y * length**2
+        expected = term = eye(3, dtype=complex)
+        for k in range(1, 20):
+            term = term @ ZYℓ2 / ((2*k - 1) * (2*k))
+            expected = expected + term
+        assert_allclose(A, expected, atol=1e-12)
+
+
+def test_segments_cascade():
+    z, y = line_code(ACBN_line_with_radius())
+
+    abcd = calculate_abcd(z, y, [1000.0, 2000.0])
+
+    assert_allclose(two_port(abcd, 0) @ two_port(abcd, 0),
+                    two_port(abcd, 1), atol=1e-12)
+
+
+def test_short_segment_pi_model_is_nominal():
+    z, y = line_code(ACBN_line_with_radius())
+
+    pi = calculate_pi_model(calculate_abcd(z, y, [10.0]))
+
+    assert_allclose(pi.Z[0], 10 * z, rtol=1e-6)
+    assert_allclose(pi.Y[0], 10 * y, rtol=1e-5, atol=1e-15)
+
+
+def test_segments_share_line_codes():
+    codes = [line_code(ACBN_line_with_radius()),
+             line_code(CBN_line_with_radius())]
+    z = stack([z for z, _ in codes])
+    y = stack([y for _, y in codes])
+    lengths, code = [10.0, 20.0, 30.0, 40.0], [0, 1, 1, 0]
+
+    abcd = calculate_abcd(z, y, lengths, code)
+
+    assert abcd.A.shape == (4, 3, 3)
+    for index, (length, c) in enumerate(zip(lengths, code)):
+        single = calculate_abcd(z[c], y[c], [length])
+        assert_allclose(two_port(abcd, index), two_port(single, 0),
+                        atol=1e-15)
+
+    # the missing phase of the second line code is open
+    assert_array_almost_equal(abcd.A[1, 0], [1, 0, 0])
+    assert_array_almost_equal(abcd.B[1, 0], [0, 0, 0])
+    pi = calculate_pi_model(abcd)
+    assert_array_almost_equal(pi.Y[2, 0], [0, 0, 0])
+
+
+def test_series_impedance_only():
+    z, _ = line_code(ACBN_line_with_radius())
+
+    abcd = calculate_abcd(z, length=[10.0, 20.0])
+
+    assert_array_almost_equal(abcd.A, [eye(3), eye(3)])
+    assert_allclose(abcd.B, [10 * z, 20 * z])
+    assert not abcd.C.any()
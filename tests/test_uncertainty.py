@@ -0,0 +1,74 @@
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+
+from carsons.carsons import (
+    CarsonsEquations,
+    calculate_impedance,
+    calculate_sequence_impedances,
+)
+from carsons.uncertainty import lognormal, normal, sample_impedance, uniform
+from tests.test_overhead_line import ACBN_geometry_line
+from tests.test_sweep import line_with
+
+
+def test_without_uncertainty_samples_are_deterministic():
+    model = CarsonsEquations(ACBN_geometry_line())
+    z_abc = calculate_impedance(model)
+    z1, z0 = calculate_sequence_impedances(z_abc)
+
+    result = sample_impedance(model, 10)
+
+    assert_allclose(result.z_abc.mean, z_abc, rtol=1e-12)
+    assert_allclose(result.z_abc.percentiles[95], z_abc, rtol=1e-12)
+    assert_allclose(result.z1.mean, z1, rtol=1e-12)
+    assert_allclose(result.z0.percentiles[5], z0, rtol=1e-12)
+
+
+def test_seeded_samples_are_reproducible():
+    model = CarsonsEquations(ACBN_geometry_line())
+    uncertainty = dict(
+        horizontal=normal(0.05), vertical=uniform(-0.5, 0.1),
+        gmr=normal(0.01, mean=1), resistance=normal(0.02, mean=1),
+        resistivity=lognormal(100, 0.5),
+    )
+
+    first = sample_impedance(model, 1000, seed=7, **uncertainty)
+    second = sample_impedance(model, 1000, seed=7, **uncertainty)
+
+    assert_allclose(first.z_abc.mean, second.z_abc.mean)
+    assert_allclose(first.z0.percentiles[50], second.z0.percentiles[50])
+    assert first.z_abc.percentiles[5].shape == (3, 3)
+    assert (first.z0.percentiles[5].real < first.z0.percentiles[95].real)
+
+
+def test_samples_match_individual_models():
+    line = ACBN_geometry_line()
+    model = CarsonsEquations(line)
+
+    result = sample_impedance(model, 20, resistivity=lognormal(100, 1.0),
+                              seed=3, keep_samples=True)
+
+    resistivities = 100 * default_rng(3).lognormal(0.0, 1.0, size=20)
+    for ρ, z_abc in zip(resistivities, result.samples):
+        expected = calculate_impedance(
+            CarsonsEquations(line_with(line, resistivity=ρ)))
+        assert_allclose(z_abc, expected, rtol=1e-12)
+    assert_allclose(result.z_abc.mean, result.samples.mean(axis=0))
+
+
+def test_secondaries_have_no_sequence_impedances():
+    line = ACBN_geometry_line()
+    labels = {'S1': 'A', 'S2': 'C', 'N': 'N'}
+    model = CarsonsEquations({
+        'phases': list(labels),
+        'wire_positions': {s: line.wire_positions[labels[s]]
+                           for s in labels},
+        'geometric_mean_radius': {s: line.geometric_mean_radius[labels[s]]
+                                  for s in labels},
+        'resistance': {s: line.resistance[labels[s]] for s in labels},
+    })
+
+    result = sample_impedance(model, 10, horizontal=normal(0.05), seed=1)
+
+    assert result.z_abc.mean.shape == (2, 2)
+    assert result.z1 is None and result.z0 is None